@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
-from recipes.models import User, Recipe, Comment, Rating, Follow, FollowRequest, PlannedDay, PlannedMeal, Report, Notification
+from recipes.models import User, Recipe, Comment, Rating, RecipeStats, RecipeViewBucket, Follow, FollowRequest, PlannedDay, PlannedMeal, Report, Notification
 
 
 @admin.register(User)
@@ -14,10 +14,10 @@ class UserAdmin(admin.ModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author', 'meal_type', 'time', 'total_views', 'is_hidden', 'created_at']
-    list_filter = ['meal_type', 'is_hidden', 'created_at']
+    list_display = ['title', 'author', 'meal_type', 'diet_type', 'time', 'total_views', 'is_hidden', 'created_at']
+    list_filter = ['meal_type', 'diet_type', 'is_hidden', 'created_at']
     search_fields = ['title', 'description', 'author__username']
-    readonly_fields = ['created_at', 'updated_at', 'total_views', 'last_viewed_at']
+    readonly_fields = ['created_at', 'updated_at', 'total_views', 'last_viewed_at', 'diet_type']
 
 
 @admin.register(Comment)
@@ -39,6 +39,21 @@ class RatingAdmin(admin.ModelAdmin):
     search_fields = ['recipe__title', 'user__username']
 
 
+@admin.register(RecipeStats)
+class RecipeStatsAdmin(admin.ModelAdmin):
+    list_display = ['recipe', 'rating_count', 'rating_avg', 'rating_sum', 'trending_score']
+    search_fields = ['recipe__title']
+    readonly_fields = ['recipe', 'rating_count', 'rating_sum', 'rating_avg', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5', 'trending_score', 'trending_updated_at']
+
+
+@admin.register(RecipeViewBucket)
+class RecipeViewBucketAdmin(admin.ModelAdmin):
+    list_display = ['recipe', 'bucket_start', 'views']
+    list_filter = ['bucket_start']
+    search_fields = ['recipe__title']
+    readonly_fields = ['recipe', 'bucket_start', 'views']
+
+
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
     list_display = ['id', 'content_preview', 'reported_by', 'reason', 'status', 'admin_action', 'created_at', 'view_content_link']
@@ -85,6 +100,7 @@ class ReportAdmin(admin.ModelAdmin):
     def bulk_dismiss_reports(self, request, queryset):
         pending_reports = queryset.filter(status='pending')
         count = 0
+        notifications = []
         for report in pending_reports:
             report.status = 'dismissed'
             report.admin_action = 'dismissed'
@@ -92,13 +108,15 @@ class ReportAdmin(admin.ModelAdmin):
             report.reviewed_at = timezone.now()
             report.save()
             
-            # Notify reporter
-            Notification.create_report_resolved_notification(
+            # Notify reporter (inserted together below)
+            notifications.append(Notification.create_report_resolved_notification(
                 report.reported_by,
                 report.admin_action,
-                report.get_content_title()
-            )
+                report.get_content_title(),
+                commit=False
+            ))
             count += 1
+        Notification.create_many(notifications)
         self.message_user(request, f"Dismissed {count} report(s).")
     bulk_dismiss_reports.short_description = "Dismiss selected reports"
     
@@ -106,6 +124,7 @@ class ReportAdmin(admin.ModelAdmin):
         """bulk action to hide content and notify both reporter and author"""
         pending_reports = queryset.filter(status='pending')
         count = 0
+        notifications = []
         for report in pending_reports:
             content_title = report.get_content_title()
             content_author = report.get_content_author()
@@ -122,20 +141,23 @@ class ReportAdmin(admin.ModelAdmin):
                 content_object.is_hidden = True
                 content_object.save()
             
-            # Notify reporter and author
-            Notification.create_report_resolved_notification(
+            # Notify reporter and author (inserted together below)
+            notifications.append(Notification.create_report_resolved_notification(
                 report.reported_by,
                 report.admin_action,
-                content_title
-            )
+                content_title,
+                commit=False
+            ))
             if content_author:
-                Notification.create_content_removed_notification(
+                notifications.append(Notification.create_content_removed_notification(
                     content_author,
                     report.content_type.model,
                     content_title,
-                    report.get_reason_display()
-                )
+                    report.get_reason_display(),
+                    commit=False
+                ))
             count += 1
+        Notification.create_many(notifications)
         self.message_user(request, f"Hidden content from {count} report(s).")
     bulk_hide_content.short_description = "Hide content from selected reports"
     
@@ -143,6 +165,7 @@ class ReportAdmin(admin.ModelAdmin):
         """bulk action to permanently delete content and notify both parties"""
         pending_reports = queryset.filter(status='pending')
         count = 0
+        notifications = []
         for report in pending_reports:
             content_title = report.get_content_title()
             content_author = report.get_content_author()
@@ -158,20 +181,23 @@ class ReportAdmin(admin.ModelAdmin):
             if content_object:
                 content_object.delete()
             
-            # Notify reporter and author
-            Notification.create_report_resolved_notification(
+            # Notify reporter and author (inserted together below)
+            notifications.append(Notification.create_report_resolved_notification(
                 report.reported_by,
                 report.admin_action,
-                content_title
-            )
+                content_title,
+                commit=False
+            ))
             if content_author:
-                Notification.create_content_removed_notification(
+                notifications.append(Notification.create_content_removed_notification(
                     content_author,
                     report.content_type.model,
                     content_title,
-                    report.get_reason_display()
-                )
+                    report.get_reason_display(),
+                    commit=False
+                ))
             count += 1
+        Notification.create_many(notifications)
         self.message_user(request, f"Deleted content from {count} report(s).")
     bulk_delete_content.short_description = "Delete content from selected reports"
     
@@ -0,0 +1,18 @@
+"""Small helpers on top of Django's cache API."""
+from django.core.cache import cache
+
+
+def incr(key, delta=1, timeout=None):
+    """
+    Atomically add ``delta`` to the counter at ``key``.
+
+    ``cache.incr`` fails on missing keys, so the counter is created at 0
+    with ``timeout`` first (``add`` is a no-op if it already exists).
+    """
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # expired between add and incr
+        cache.add(key, 0, timeout)
+        return cache.incr(key, delta)
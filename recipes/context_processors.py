@@ -0,0 +1,32 @@
+"""Template context shared by every page."""
+from django.utils.functional import SimpleLazyObject
+from recipes.live import live_settings
+from recipes.notification_cache import recent_notifications, unread_count
+
+
+def notifications(request):
+    """
+    Unread count and latest notifications for the navbar.
+
+    Both come from recipes.notification_cache, so rendering the navbar
+    normally costs no queries. They are lazy, so pages without a navbar do
+    not look them up (or even load the user) at all. ``live_events_enabled``
+    says whether the navbar opens the live event stream (recipes.live).
+    """
+    def signed_in_user_id():
+        user = getattr(request, 'user', None)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    def count():
+        user_id = signed_in_user_id()
+        return unread_count(user_id) if user_id else 0
+
+    def recent():
+        user_id = signed_in_user_id()
+        return recent_notifications(user_id) if user_id else []
+
+    return {
+        'unread_notifications_count': SimpleLazyObject(count),
+        'recent_notifications': SimpleLazyObject(recent),
+        'live_events_enabled': live_settings()['ENABLED'],
+    }
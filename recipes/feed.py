@@ -0,0 +1,119 @@
+"""
+Materialised following feeds (fan-out on write).
+
+The following tab used to find its recipes by author among everything
+posted. Instead every user has FeedEntry rows for the recipes of the
+accounts they follow, kept up to date as things happen:
+
+* a new recipe is pushed to every follower of its author, on the write
+  queue's writer thread (recipes.write_queue) in chunked bulk inserts,
+* following someone backfills their BACKFILL_RECIPES latest recipes,
+* unfollowing removes the author's entries, hiding a recipe removes its
+  entries (and unhiding pushes it again).
+
+The signal handlers in recipes/signals.py call these; bulk writes that skip
+signals (recipes.follow_acceptance) call them directly.
+
+Authors with CELEBRITY_FOLLOWERS or more followers are not fanned out, a
+single post would be that many inserts. Their recipes are pulled at read
+time instead: ``feed_q`` matches the user's feed entries plus recipes by
+the celebrities they follow, using the cached author id sets
+(recipes.visibility). Recipes an author posted while above the threshold
+are not backfilled into feeds if they later drop below it.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from recipes.visibility import followed_author_ids
+
+CELEBRITY_FOLLOWERS = 10000
+BACKFILL_RECIPES = 50
+CHUNK_SIZE = 1000
+
+CELEBRITIES_KEY = 'feed:celebrities'
+
+
+def _chunks(values, size=CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def celebrity_ids():
+    """Ids of the accounts whose recipes are pulled rather than pushed."""
+    from recipes.models import User
+
+    # as fresh as the visibility sets the pull is combined with
+    timeout = getattr(settings, 'VISIBILITY_CACHE_TIMEOUT', 60 * 60)
+    ids = cache.get(CELEBRITIES_KEY) if timeout else None
+    if ids is None:
+        ids = frozenset(User.objects.filter(followers_count__gte=CELEBRITY_FOLLOWERS).values_list('pk', flat=True))
+        if timeout:
+            cache.set(CELEBRITIES_KEY, ids, timeout)
+    return ids
+
+
+def _is_celebrity(author_id):
+    from recipes.models import User
+
+    return User.objects.filter(pk=author_id, followers_count__gte=CELEBRITY_FOLLOWERS).exists()
+
+
+def push_recipe(recipe_id, author_id, created_at):
+    """Add a recipe to the feeds of its author's followers. Returns the number of feeds written to."""
+    from recipes.models import FeedEntry, Follow
+
+    if _is_celebrity(author_id):
+        return 0
+    follower_ids = list(Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True))
+    for chunk in _chunks(follower_ids):
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user_id=follower_id, recipe_id=recipe_id, author_id=author_id, created_at=created_at)
+                for follower_id in chunk
+            ],
+            ignore_conflicts=True,
+        )
+    return len(follower_ids)
+
+
+def backfill(follower_ids, author_id):
+    """Add the latest recipes of ``author_id`` to the feeds of ``follower_ids``."""
+    from recipes.models import FeedEntry, Recipe
+
+    if not follower_ids or _is_celebrity(author_id):
+        return
+    recipes = list(
+        Recipe.objects.filter(author_id=author_id, is_hidden=False)
+        .order_by('-created_at', '-pk')
+        .values_list('pk', 'created_at')[:BACKFILL_RECIPES]
+    )
+    entries = [
+        FeedEntry(user_id=follower_id, recipe_id=recipe_id, author_id=author_id, created_at=created_at)
+        for follower_id in follower_ids
+        for recipe_id, created_at in recipes
+    ]
+    FeedEntry.objects.bulk_create(entries, batch_size=CHUNK_SIZE, ignore_conflicts=True)
+
+
+def remove_author(follower_id, author_id):
+    from recipes.models import FeedEntry
+
+    FeedEntry.objects.filter(user_id=follower_id, author_id=author_id).delete()
+
+
+def remove_recipe(recipe_id):
+    from recipes.models import FeedEntry
+
+    FeedEntry.objects.filter(recipe_id=recipe_id).delete()
+
+
+def feed_q(user):
+    """Recipes in ``user``'s following feed: their feed entries plus the celebrities they follow."""
+    from recipes.models import FeedEntry
+
+    condition = Q(pk__in=FeedEntry.objects.filter(user=user).values('recipe_id'))
+    pulled = followed_author_ids(user) & celebrity_ids()
+    if pulled:
+        condition |= Q(author_id__in=sorted(pulled))
+    return condition
@@ -0,0 +1,163 @@
+"""
+Accepting every pending follow request at once, when an account goes public.
+
+Requests are converted a chunk at a time. Each chunk is one short
+transaction that bulk inserts the follows (``ignore_conflicts``, so a
+follow that already exists is not an error), bumps the new followers'
+``following_count`` and deletes the requests; between chunks the SQLite
+write lock is free for other requests.
+
+Backlogs above BACKGROUND_THRESHOLD are left to the
+``accept_follow_requests`` command (run from cron), so the profile form
+returns at once and the write queue's single writer thread is not held up.
+The command accepts the requests of every public account that still has
+some, so a run that died halfway is simply continued by the next one.
+``progress()`` reports how far it got.
+
+Bulk inserts skip the Follow signals, so the account's ``followers_count``
+is recounted and the followers' visibility caches are invalidated once at
+the end instead of per follow. Each chunk marks its new followers for the
+next follow suggestion run itself and backfills their following feeds
+(recipes.feed).
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from recipes.feed import backfill
+from recipes.visibility import invalidate_followed_many, invalidate_private_authors
+
+CHUNK_SIZE = 500
+
+# pending requests above which the acceptance runs in the background
+BACKGROUND_THRESHOLD = 2000
+
+PROGRESS_KEY = 'follow_requests:accepting:{}'
+PROGRESS_TIMEOUT = 60 * 60
+
+# held by the command, so overlapping cron runs do not accept the same requests
+LOCK_KEY = 'follow_requests:accepting_lock'
+LOCK_TIMEOUT = 60 * 60
+
+
+def progress(user_id):
+    """``{'done': n, 'total': m}`` while ``user_id``'s requests are being accepted, else None."""
+    return cache.get(PROGRESS_KEY.format(user_id))
+
+
+def _set_progress(user_id, done, total):
+    cache.set(PROGRESS_KEY.format(user_id), {'done': done, 'total': total}, PROGRESS_TIMEOUT)
+
+
+def _accept_chunk(user_id, chunk_size):
+    """Accept up to ``chunk_size`` requests. Returns ``(requests handled, new follower ids)``."""
+    from recipes.models import Follow, FollowRequest, FollowSuggestion, FollowSuggestionRefresh, User
+
+    with transaction.atomic():
+        requests = list(
+            FollowRequest.objects.filter(to_user_id=user_id)
+            .order_by('pk')
+            .values_list('pk', 'from_user_id')[:chunk_size]
+        )
+        if not requests:
+            return 0, []
+
+        # a user can never follow themselves
+        from_ids = {from_user_id for _, from_user_id in requests if from_user_id != user_id}
+        existing = set(
+            Follow.objects.filter(following_id=user_id, follower_id__in=from_ids)
+            .values_list('follower_id', flat=True)
+        )
+        new_ids = sorted(from_ids - existing)
+
+        Follow.objects.bulk_create(
+            [Follow(follower_id=follower_id, following_id=user_id) for follower_id in new_ids],
+            ignore_conflicts=True,
+        )
+        User.objects.filter(pk__in=new_ids).update(following_count=F('following_count') + 1)
+        # what the follow signals would have done for the suggestions (recipes.suggestions)
+        FollowSuggestionRefresh.mark(new_ids)
+        FollowSuggestion.objects.filter(user_id__in=new_ids, suggested_id=user_id).delete()
+        backfill(new_ids, user_id)
+        FollowRequest.objects.filter(pk__in=[pk for pk, _ in requests]).delete()
+    return len(requests), new_ids
+
+
+def accept_all(user_id, total=None, done=0, chunk_size=CHUNK_SIZE):
+    """
+    Turn every pending request to ``user_id`` into a follow. Returns the number of new followers.
+
+    ``total`` and ``done`` are the progress to report from, for a run that
+    continues an earlier one.
+    """
+    from recipes.models import Follow, FollowRequest, User
+
+    if total is None:
+        total = FollowRequest.objects.filter(to_user_id=user_id).count()
+
+    accepted = []
+    try:
+        while True:
+            handled, new_ids = _accept_chunk(user_id, chunk_size)
+            if not handled:
+                break
+            done += handled
+            accepted.extend(new_ids)
+            _set_progress(user_id, done, total)
+    finally:
+        # also after a failure, for the chunks that did commit
+        with transaction.atomic():
+            User.objects.filter(pk=user_id).update(
+                followers_count=Follow.objects.filter(following_id=user_id).count()
+            )
+            invalidate_followed_many(accepted)
+            invalidate_private_authors()
+    # after a failure the progress stays for the run that continues it
+    cache.delete(PROGRESS_KEY.format(user_id))
+    return len(accepted)
+
+
+def accept_pending(user):
+    """
+    Accept ``user``'s pending follow requests now, or leave a large backlog to the command.
+
+    Returns ``(pending, in_background)``.
+    """
+    from recipes.models import FollowRequest
+
+    pending = FollowRequest.objects.filter(to_user=user).count()
+    if not pending:
+        return 0, False
+
+    _set_progress(user.pk, 0, pending)
+    if pending > BACKGROUND_THRESHOLD:
+        return pending, True
+    accept_all(user.pk, total=pending)
+    return pending, False
+
+
+def accept_backlogs():
+    """
+    Accept the pending requests of every public account. Returns ``(accounts, new followers)``.
+
+    Does nothing (and returns ``(0, 0)``) while another run holds the lock.
+    """
+    from recipes.models import FollowRequest
+
+    if not cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        return 0, 0
+    try:
+        backlogs = list(
+            FollowRequest.objects.filter(to_user__is_private=False)
+            .order_by('to_user_id')
+            .values_list('to_user_id')
+            .annotate(pending=Count('pk'))
+        )
+        accepted = 0
+        for user_id, pending in backlogs:
+            # carry on with the progress the profile already shows
+            total = max((progress(user_id) or {}).get('total', 0), pending)
+            accepted += accept_all(user_id, total=total, done=total - pending)
+        return len(backlogs), accepted
+    finally:
+        cache.delete(LOCK_KEY)
@@ -1,4 +1,5 @@
 from django import forms
+from recipes.forms.widgets import RecipePickerInput
 from recipes.helpers import visible_recipes_for
 from datetime import date
 
@@ -24,9 +25,10 @@ class PlannedMealForm(forms.Form):
         widget=forms.Select(attrs={'class': 'form-select'})
     )
     
+    # options are searched on demand, the queryset is only used to validate the choice
     recipe = forms.ModelChoiceField(
         queryset=None,
-        widget=forms.Select(attrs={'class': 'form-select'})
+        widget=RecipePickerInput()
     )
     
     def __init__(self, *args, user=None, recipe=None, **kwargs):
@@ -45,10 +45,7 @@ class RecipeForm(forms.ModelForm):
         
         # If editing an existing recipe, populate meal_types from meal_type
         if self.instance and self.instance.pk and self.instance.meal_type:
-            # Take the first meal type since we now only allow one
-            meal_types_list = [mt.strip() for mt in self.instance.meal_type.split(',')]
-            #self.fields['meal_types'].initial = [meal_types_list[0] if meal_types_list else None]
-            self.fields['meal_types'].initial = meal_types_list
+            self.fields['meal_types'].initial = self.instance.get_meal_types_list()
         
         # Get number of fields from POST data or instance
         if self.data:
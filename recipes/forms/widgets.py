@@ -0,0 +1,43 @@
+from django import forms
+from django.urls import reverse_lazy
+
+__all__ = ['RecipePickerInput']
+
+
+class RecipePickerInput(forms.TextInput):
+    """
+    Text input that searches recipes as the user types.
+
+    Instead of rendering an <option> for every recipe the user can see, the
+    options are fetched page by page from ``search_recipes_ajax`` into a
+    <datalist> (recipe_picker.js). Only the currently selected recipe is
+    rendered server-side. The submitted value is still a recipe pk, so the
+    form field validates it against its queryset as before.
+    """
+    template_name = 'widgets/recipe_picker.html'
+    search_url = reverse_lazy('search_recipes_ajax')
+
+    class Media:
+        js = ['recipe_picker.js']
+
+    def __init__(self, attrs=None):
+        defaults = {'class': 'form-control', 'placeholder': 'Search recipes...', 'autocomplete': 'off'}
+        super().__init__({**defaults, **(attrs or {})})
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        widget = context['widget']
+        widget['list_id'] = f"{widget['attrs'].get('id') or name}-options"
+        widget['search_url'] = str(self.search_url)
+        widget['selected'] = self.selected_option(value)
+        return context
+
+    def selected_option(self, value):
+        """(pk, title) of the selected recipe, looked up without loading the others."""
+        queryset = getattr(getattr(self, 'choices', None), 'queryset', None)
+        if value in (None, '') or queryset is None:
+            return None
+        try:
+            return queryset.filter(pk=value).values_list('pk', 'title').first()
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,71 @@
+"""
+Versions for cached recipe fragments.
+
+Recipe cards and the static parts of the detail page are rendered with
+Django's ``{% cache %}`` tag, keyed by the recipe id and the recipe's
+fragment version. Instead of deleting fragments when a recipe changes, the
+signal handlers in recipes/signals.py bump the version (on edit, hide,
+rating and comment), so every cached fragment of the old version is simply
+never read again and expires on its own.
+
+* ``recipe_fragment_version:<recipe>`` holds the version. Versions are
+  nanosecond timestamps rather than counters, so a version that was evicted
+  from the cache starts again at a value no old fragment was stored under.
+* A change bumps the version at once and again when its transaction
+  commits: a request that read the first bump while its snapshot still had
+  the old data may have cached that data under it.
+* Templates cache fragments for an hour. Old versions are unreachable
+  anyway; the timeout only bounds how long data owned by other models (the
+  author's name) can lag behind.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'recipe_fragment_version:{}'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def fragment_versions(recipe_ids):
+    """Map each recipe id to its fragment version, in one cache round trip."""
+    recipe_ids = list(recipe_ids)
+    found = cache.get_many([VERSION_KEY.format(recipe_id) for recipe_id in recipe_ids])
+    versions = {}
+    for recipe_id in recipe_ids:
+        key = VERSION_KEY.format(recipe_id)
+        version = found.get(key)
+        if version is None:
+            version = _new_version()
+            if not cache.add(key, version, timeout=None):
+                # someone else started this recipe's version first
+                version = cache.get(key, version)
+        versions[recipe_id] = version
+    return versions
+
+
+def fragment_version(recipe_id):
+    return fragment_versions([recipe_id])[recipe_id]
+
+
+def bump_fragment_version(recipe_id):
+    """Make every cached fragment of ``recipe_id`` stale, now and once the transaction commits."""
+    key = VERSION_KEY.format(recipe_id)
+    cache.set(key, _new_version(), timeout=None)
+    transaction.on_commit(lambda: cache.set(key, _new_version(), timeout=None))
+
+
+def prefetch_fragment_versions(recipes):
+    """
+    Load the fragment versions of a page of recipes at once.
+
+    Each recipe's ``get_fragment_version()`` then returns the prefetched
+    version. Like prefetch_active_viewers, a queryset is evaluated in place.
+    """
+    versions = fragment_versions(recipe.pk for recipe in recipes)
+    for recipe in recipes:
+        recipe._fragment_version = versions[recipe.pk]
+    return recipes
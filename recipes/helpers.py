@@ -1,5 +1,4 @@
 ### Helper function and classes go here.
-from django.db.models import Q
 
 def visible_recipes_for(user):
     """
@@ -8,20 +7,10 @@ def visible_recipes_for(user):
     Rules:
     - Anonymous users: only recipes whose author is public (is_private=False)
     - Authenticated users: own recipes OR public authors OR private authors they follow (accepted follows)
-    """
-    from recipes.models.recipes import Recipe
-    from recipes.models.follow import Follow
-
-    # Anonymous user
-    if not user or not user.is_authenticated or user.pk is None:
-        return Recipe.objects.filter(author__is_private=False).distinct()
 
-    following_ids = Follow.objects.filter(
-        follower = user
-    ).values_list("following_id", flat=True)
+    The check is a single cached, join-free predicate on author_id, so no
+    DISTINCT is needed (see recipes/visibility.py).
+    """
+    from recipes.visibility import visible_recipes_for as _visible_recipes_for
 
-    return Recipe.objects.filter(
-        Q(author=user) | # own recipes
-        Q(author__is_private=False) | # public accounts' recipes
-        Q(author_id__in=following_ids) # private accounts' recipes you follow
-    ).distinct()
\ No newline at end of file
+    return _visible_recipes_for(user)
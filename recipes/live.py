@@ -0,0 +1,190 @@
+"""
+In-process publish/subscribe for the live event stream (``live_events``).
+
+Browsers keep one Server-Sent Events connection open per tab instead of
+polling. Each connection is a subscription to a few topics:
+
+* ``user:<id>`` - unread count changes and new notifications,
+* ``recipe:<id>`` - active viewer counts of a recipe page.
+
+``publish()`` can be called from any thread (request threads, the write
+queue's writer thread); events are handed to each subscriber's event loop
+with ``call_soon_threadsafe``. Subscriber queues are small and keep the
+newest events: every event is a snapshot of current state, so a slow
+client only misses intermediate values.
+
+Events published in other worker processes do not reach this process. A
+poller task per process therefore reads the unread counts and viewer counts
+of every subscribed topic from the shared cache every ``POLL_INTERVAL``
+seconds (one ``get_many`` for all connections, no queries) and publishes
+what changed, which also catches viewers dropping out of the window.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # the stream needs an ASGI server, see recipes.views.live_view
+    'ENABLED': False,
+    # seconds between keep-alive comments on an idle stream
+    'HEARTBEAT': 15,
+    # seconds between reads of the shared cache by the poller
+    'POLL_INTERVAL': 5,
+    # events buffered per connection before the oldest are dropped
+    'QUEUE_SIZE': 16,
+    # recipes a single connection may watch
+    'MAX_RECIPES': 20,
+}
+
+
+def live_settings():
+    return {**DEFAULTS, **getattr(settings, 'LIVE_EVENTS', {})}
+
+
+def user_topic(user_id):
+    return f'user:{user_id}'
+
+
+def recipe_topic(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+class Subscription:
+    """A connection's view of the broker: an asyncio queue on its own loop."""
+
+    def __init__(self, topics, maxsize):
+        self.topics = frozenset(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event):
+        # runs on self.loop
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broker:
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._poller = None
+        # last value the poller published per topic
+        self._last = {}
+
+    def subscribe(self, topics):
+        """Subscribe the running event loop to ``topics``; call from a coroutine."""
+        subscription = Subscription(topics, live_settings()['QUEUE_SIZE'])
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        self._ensure_poller()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[topic]
+                    self._last.pop(topic, None)
+
+    def has_subscribers(self, topic):
+        return topic in self._subscribers
+
+    def topics(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    def publish(self, topic, event):
+        """Send ``event`` (a dict with an ``event`` name) to every subscriber of ``topic``."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # the subscriber's loop has closed
+                self.unsubscribe(subscription)
+
+    # ------------------------
+    # Cross-process poller
+    # ------------------------
+
+    def _ensure_poller(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _poll(self):
+        interval = live_settings()['POLL_INTERVAL']
+        while True:
+            await asyncio.sleep(interval)
+            topics = self.topics()
+            if not topics:
+                return
+            try:
+                events = await sync_to_async(snapshot, thread_sensitive=False)(topics)
+            except Exception:
+                logger.exception('Live event poll failed')
+                continue
+            for topic, event in events.items():
+                if self._last.get(topic) != event:
+                    self._last[topic] = event
+                    self.publish(topic, event)
+
+
+def snapshot(topics):
+    """Current state event per topic, read from the cache only (never the database)."""
+    from recipes.notification_cache import cached_unread_counts
+    from recipes.viewers import active_viewer_counts
+
+    user_ids, recipe_ids = [], []
+    for topic in topics:
+        kind, _, object_id = topic.partition(':')
+        if kind == 'user':
+            user_ids.append(int(object_id))
+        elif kind == 'recipe':
+            recipe_ids.append(int(object_id))
+
+    events = {}
+    for user_id, count in cached_unread_counts(user_ids).items():
+        events[user_topic(user_id)] = unread_event(count)
+    for recipe_id, count in active_viewer_counts(recipe_ids).items():
+        events[recipe_topic(recipe_id)] = viewers_event(recipe_id, count)
+    return events
+
+
+def unread_event(count, latest=None):
+    event = {'event': 'notifications', 'unread_count': count}
+    if latest is not None:
+        event['latest'] = latest
+    return event
+
+
+def viewers_event(recipe_id, count):
+    return {'event': 'viewers', 'recipe': recipe_id, 'active_viewers': count}
+
+
+broker = Broker()
+
+
+def publish(topic, event):
+    """Publish ``event`` to this process's subscribers of ``topic``."""
+    broker.publish(topic, event)
+
+
+def has_subscribers(topic):
+    return broker.has_subscribers(topic)
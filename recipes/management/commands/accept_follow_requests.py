@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from recipes.follow_acceptance import accept_backlogs
+
+
+class Command(BaseCommand):
+    """
+    Management command to accept the pending follow requests of public accounts.
+
+    When an account with a large backlog of follow requests goes public,
+    the profile form leaves the backlog to this command instead of holding
+    up the request (recipes.follow_acceptance). Requests are accepted in
+    committed chunks, so a run that is interrupted is continued by the
+    next one. Run it every minute (e.g. from cron).
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help accept_follow_requests`.
+    """
+
+    help = 'Accepts the pending follow requests of every public account'
+
+    def handle(self, *args, **options):
+        """Execute the acceptance and print how many accounts and followers it covered."""
+        accounts, accepted = accept_backlogs()
+        self.stdout.write(self.style.SUCCESS(
+            f'Accepted follow requests of {accounts} account(s), {accepted} new follower(s).'
+        ))
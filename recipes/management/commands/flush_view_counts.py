@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from recipes import view_counter
+
+
+class Command(BaseCommand):
+    """
+    Management command to write buffered recipe view counts to the database.
+
+    Web processes flush their buffer in the background and on shutdown; this
+    command lets cron (or a deploy script) force a flush, e.g. after a worker
+    was killed without running its exit hooks while using a shared cache.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help flush_view_counts`.
+    """
+
+    help = 'Writes buffered recipe view counts to the database'
+
+    def handle(self, *args, **options):
+        """Execute the flush and print how many views were written."""
+        written = view_counter.flush()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {written} buffered view(s).'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from recipes.models import SyncTombstone
+
+
+class Command(BaseCommand):
+    """
+    Management command to delete expired sync tombstones.
+
+    Deleted planned meals and notifications leave a tombstone so that
+    clients syncing with a ``since`` cursor learn about the deletion. After
+    SyncTombstone.RETENTION such clients start over anyway, so older
+    tombstones can go. Run daily (e.g. from cron).
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help prune_sync_tombstones`.
+    """
+
+    help = 'Deletes sync tombstones older than the retention period'
+
+    def handle(self, *args, **options):
+        """Execute the prune and print how many tombstones were deleted."""
+        pruned = SyncTombstone.prune()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} sync tombstone(s).'))
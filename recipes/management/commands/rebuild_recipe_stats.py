@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import RecipeStats
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the denormalised recipe rating stats.
+
+    Recomputes rating count, star sum, average and the 1-5 star histogram of
+    every recipe from the ratings table and reports any rows that had
+    drifted from the source data.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help rebuild_recipe_stats`.
+    """
+
+    help = 'Rebuilds recipe rating stats from the ratings table and reports drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, do not write any changes (exits with an error if drift is found)',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Execute the rebuild.
+
+        Prints one line per drifted recipe followed by a summary. With
+        ``--check`` nothing is written and a CommandError is raised when
+        drift was found, so the command can be used in monitoring.
+        """
+        check_only = options['check']
+        drift = RecipeStats.rebuild(commit=not check_only)
+
+        for recipe_id, stored, expected in drift:
+            if stored is None:
+                self.stdout.write(f'Recipe #{recipe_id}: missing stats row')
+            else:
+                self.stdout.write(
+                    f'Recipe #{recipe_id}: count {stored.rating_count} -> {expected.rating_count}, '
+                    f'sum {stored.rating_sum} -> {expected.rating_sum}'
+                )
+
+        if check_only:
+            if drift:
+                raise CommandError(f'{len(drift)} recipe(s) have drifted stats.')
+            self.stdout.write(self.style.SUCCESS('Recipe stats are in sync.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt recipe stats ({len(drift)} corrected).'))
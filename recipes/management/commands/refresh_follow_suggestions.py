@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from recipes.suggestions import refresh_all, refresh_marked
+
+
+class Command(BaseCommand):
+    """
+    Management command to precompute the "who to follow" suggestions.
+
+    By default only users whose follow graph changed since the last run
+    (marked by the Follow signals) and their followers are recomputed, so
+    it is cheap to run every few minutes (e.g. from cron). ``--full``
+    recomputes everyone from the whole follow graph, which also picks up
+    rating changes; run it daily.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help refresh_follow_suggestions`.
+    """
+
+    help = 'Recomputes follow suggestions for users whose follows changed (or everyone with --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute the suggestions of every user, not only the changed ones',
+        )
+
+    def handle(self, *args, **options):
+        """Execute the refresh and print how many users and suggestions were written."""
+        users, rows = refresh_all() if options['full'] else refresh_marked()
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed follow suggestions of {users} user(s), {rows} suggestion(s) stored.'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from recipes.models import RecipeViewBucket
+
+
+class Command(BaseCommand):
+    """
+    Management command to refresh the stored trending scores.
+
+    Scores are updated whenever a recipe is viewed, but they only decay when
+    recomputed. Running this every few minutes (e.g. from cron) lets recipes
+    drop down the trending order as their views age out of the window, and
+    deletes view buckets that no longer count.
+
+    Attributes:
+        help (str): Short description displayed when running
+            `python manage.py help refresh_trending`.
+    """
+
+    help = 'Recomputes trending scores from recent view buckets and prunes old buckets'
+
+    def handle(self, *args, **options):
+        """Execute the refresh and print how many scores and buckets were touched."""
+        updated = RecipeViewBucket.update_trending_scores()
+        pruned = RecipeViewBucket.prune()
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {updated} trending score(s), pruned {pruned} old view bucket(s).'
+        ))
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_recipe_stats(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Rating = apps.get_model('recipes', 'Rating')
+    RecipeStats = apps.get_model('recipes', 'RecipeStats')
+
+    stats = {pk: RecipeStats(recipe_id=pk) for pk in Recipe.objects.values_list('pk', flat=True)}
+    for recipe_id, stars in Rating.objects.values_list('recipe_id', 'stars').iterator():
+        row = stats[recipe_id]
+        row.rating_count += 1
+        row.rating_sum += stars
+        setattr(row, f'stars_{stars}', getattr(row, f'stars_{stars}') + 1)
+
+    for row in stats.values():
+        row.rating_avg = row.rating_sum / row.rating_count if row.rating_count else 0
+    RecipeStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_comment_is_hidden_recipe_is_hidden_notification_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='recipes.recipe')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_avg', models.FloatField(db_index=True, default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'recipe stats',
+            },
+        ),
+        migrations.RunPython(backfill_recipe_stats, migrations.RunPython.noop),
+    ]
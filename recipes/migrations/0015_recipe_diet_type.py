@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+MEAT_KEYWORDS = ["chicken", "mutton", "fish", "lamb", "pork", "beef", "egg", "eggs", "shrimp", "prawns", "bacon"]
+VEG_KEYWORDS = ["milk", "cheese", "butter", "ghee", "yogurt", "cream", "honey"]
+
+
+def backfill_diet_type(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+
+    batch = []
+    for recipe in Recipe.objects.only('pk', 'ingredients').iterator(chunk_size=500):
+        ingredients = (recipe.ingredients or '').lower()
+        if any(w in ingredients for w in MEAT_KEYWORDS):
+            recipe.diet_type = 'non_veg'
+        elif any(w in ingredients for w in VEG_KEYWORDS):
+            recipe.diet_type = 'veg'
+        else:
+            recipe.diet_type = 'vegan'
+        batch.append(recipe)
+
+        if len(batch) >= 500:
+            Recipe.objects.bulk_update(batch, ['diet_type'])
+            batch = []
+
+    Recipe.objects.bulk_update(batch, ['diet_type'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='diet_type',
+            field=models.CharField(choices=[('vegan', 'Vegan'), ('veg', 'Vegetarian'), ('non_veg', 'Non-Vegetarian')], db_index=True, default='vegan', editable=False, help_text='Derived from the ingredients every time the recipe is saved', max_length=10),
+        ),
+        migrations.RunPython(backfill_diet_type, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# the schema as it was when the index was added; recipes.search only repairs
+# it after migrate (ensure_fts_schema), later changes need a migration of their own
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5("
+    "title, description, ingredients, meal_type, content='recipes_recipe', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_ai AFTER INSERT ON recipes_recipe BEGIN "
+    "INSERT INTO recipes_recipe_fts(rowid, title, description, ingredients, meal_type) "
+    "VALUES (new.id, new.title, new.description, new.ingredients, new.meal_type); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_ad AFTER DELETE ON recipes_recipe BEGIN "
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, title, description, ingredients, meal_type) "
+    "VALUES ('delete', old.id, old.title, old.description, old.ingredients, old.meal_type); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_au "
+    "AFTER UPDATE OF title, description, ingredients, meal_type ON recipes_recipe BEGIN "
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, title, description, ingredients, meal_type) "
+    "VALUES ('delete', old.id, old.title, old.description, old.ingredients, old.meal_type); "
+    "INSERT INTO recipes_recipe_fts(rowid, title, description, ingredients, meal_type) "
+    "VALUES (new.id, new.title, new.description, new.ingredients, new.meal_type); "
+    "END",
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_ai",
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_ad",
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_au",
+    "DROP TABLE IF EXISTS recipes_recipe_fts",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_recipe_diet_type'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
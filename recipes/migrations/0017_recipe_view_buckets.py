@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_recipe_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipestats',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='recipestats',
+            name='trending_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='RecipeViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='recipes.recipe')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket_start'], name='recipes_rec_bucket__a4a8f1_idx')],
+                'constraints': [models.UniqueConstraint(fields=('recipe', 'bucket_start'), name='unique_recipe_view_bucket')],
+            },
+        ),
+    ]
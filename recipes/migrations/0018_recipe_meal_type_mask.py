@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:32
+
+from django.db import migrations, models
+
+# Recipe.MEAL_TYPE_BITS at the time of this migration
+MEAL_TYPE_BITS = {'breakfast': 1, 'lunch': 2, 'dinner': 4, 'snack': 8, 'dessert': 16}
+
+
+def backfill_meal_type_mask(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+
+    recipes = []
+    for recipe in Recipe.objects.only('pk', 'meal_type').iterator():
+        recipe.meal_type_mask = 0
+        for meal_type in recipe.meal_type.split(','):
+            recipe.meal_type_mask |= MEAL_TYPE_BITS.get(meal_type.strip().lower(), 0)
+        if recipe.meal_type_mask:
+            recipes.append(recipe)
+    Recipe.objects.bulk_update(recipes, ['meal_type_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_recipe_view_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='meal_type_mask',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, help_text='Bitmask of MEAL_TYPE_BITS, derived from meal_type every time the recipe is saved'),
+        ),
+        migrations.RunPython(backfill_meal_type_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:57
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_follow_counts(apps, schema_editor):
+    User = apps.get_model('recipes', 'User')
+    Follow = apps.get_model('recipes', 'Follow')
+
+    def count_of(field):
+        counts = (
+            Follow.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(n=Count('pk'))
+            .values('n')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    User.objects.update(followers_count=count_of('following'), following_count=count_of('follower'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0020_sync_cursors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['following', '-created_at'], name='recipes_fol_followi_f8ff52_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at'], name='recipes_fol_followe_c89390_idx'),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
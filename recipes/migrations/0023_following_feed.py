@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_feeds(apps, schema_editor):
+    # recipes.feed.backfill for every existing follow, with its limits at the time
+    User = apps.get_model('recipes', 'User')
+    Follow = apps.get_model('recipes', 'Follow')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    FeedEntry = apps.get_model('recipes', 'FeedEntry')
+
+    authors = (
+        User.objects.filter(followers_count__gt=0, followers_count__lt=10000)
+        .values_list('pk', flat=True)
+        .iterator()
+    )
+    for author_id in authors:
+        recipes = list(
+            Recipe.objects.filter(author_id=author_id, is_hidden=False)
+            .order_by('-created_at', '-pk')
+            .values_list('pk', 'created_at')[:50]
+        )
+        if not recipes:
+            continue
+        follower_ids = Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True)
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(user_id=follower_id, recipe_id=recipe_id, author_id=author_id, created_at=created_at)
+                for follower_id in follower_ids
+                for recipe_id, created_at in recipes
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0022_follow_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-recipe'], name='recipes_fee_user_id_7115db_idx'), models.Index(fields=['user', 'author'], name='recipes_fee_user_id_de3723_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 05:35
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from libgravatar import Gravatar
+
+
+def store_gravatar_hashes(apps, schema_editor):
+    User = apps.get_model('recipes', 'User')
+    users = list(User.objects.only('pk', 'email'))
+    for user in users:
+        user.gravatar_hash = Gravatar(user.email).email_hash
+    User.objects.bulk_update(users, ['gravatar_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('recipes', '0023_following_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='gravatar_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(store_gravatar_hashes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='user_username_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), name='user_first_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='user_last_name_search_idx'),
+        ),
+    ]
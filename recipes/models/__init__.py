@@ -3,8 +3,13 @@ from recipes.models.recipes import Recipe
 from recipes.models.follow import Follow
 from recipes.models.follow_request import FollowRequest
 from recipes.models.rating import Rating
+from recipes.models.recipe_stats import RecipeStats
+from recipes.models.recipe_view_bucket import RecipeViewBucket
 from recipes.models.planned_day import PlannedDay
 from recipes.models.planned_meal import PlannedMeal
 from recipes.models.comment import Comment
 from recipes.models.report import Report
-from recipes.models.notification import Notification
\ No newline at end of file
+from recipes.models.notification import Notification
+from recipes.models.sync_tombstone import SyncTombstone
+from recipes.models.follow_suggestion import FollowSuggestion, FollowSuggestionRefresh
+from recipes.models.feed_entry import FeedEntry
\ No newline at end of file
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import models
+
+
+class FeedEntry(models.Model):
+    """
+    A recipe in one user's following feed.
+
+    Rows are pushed when a followed author posts, backfilled when a user
+    follows someone and removed on unfollow or when the recipe is hidden
+    (recipes.feed). ``author`` and ``created_at`` are copied from the
+    recipe so unfollowing and reading newest first need no join.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'recipe'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            # the feed itself: one range scan per user, newest first
+            models.Index(fields=['user', '-created_at', '-recipe']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+    def __str__(self):
+        return f"Recipe #{self.recipe_id} in the feed of user #{self.user_id}"
@@ -48,6 +48,11 @@ class Follow(models.Model):
         Ensures that a user cannot follow the same user more than once.
         """
         unique_together = ("follower", "following")
+        # follower/following lists are paginated newest first
+        indexes = [
+            models.Index(fields=["following", "-created_at"]),
+            models.Index(fields=["follower", "-created_at"]),
+        ]
 
     def __str__(self):
         """
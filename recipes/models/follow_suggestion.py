@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class FollowSuggestion(models.Model):
+    """
+    A precomputed "who to follow" suggestion: an account followed by people
+    ``user`` follows.
+
+    Rows are written by the ``refresh_follow_suggestions`` command
+    (recipes.suggestions), never per request, so the profile widget is one
+    indexed read of ``(user, -score)``.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    suggested = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # accounts ``user`` follows that follow ``suggested``
+    mutual_count = models.PositiveIntegerField(default=0)
+    # recipes both users rated highly
+    shared_recipes = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'suggested'], name='unique_follow_suggestion'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+    def __str__(self):
+        return f"Suggest user #{self.suggested_id} to user #{self.user_id} ({self.score:g})"
+
+
+class FollowSuggestionRefresh(models.Model):
+    """
+    A user whose follows changed since suggestions were last computed.
+
+    Follow signals mark the follower; the next incremental run recomputes
+    them and everyone who follows them, then deletes the marks it covered.
+    ``user_id`` is a plain column, like SyncTombstone's: marks are written
+    while a deleted account's follows are removed.
+    """
+
+    user_id = models.PositiveIntegerField(primary_key=True)
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Refresh suggestions of user #{self.user_id}"
+
+    @classmethod
+    def mark(cls, user_ids):
+        """Queue ``user_ids`` for the next incremental run (again, if already queued)."""
+        now = timezone.now()
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, marked_at=now) for user_id in set(user_ids)],
+            update_conflicts=True,
+            unique_fields=['user_id'],
+            update_fields=['marked_at'],
+        )
@@ -1,12 +1,32 @@
 """Notification model for user notifications."""
-from django.db import models
+from collections import Counter
+from datetime import timedelta
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from recipes.notification_cache import notifications_created
 
 
 class Notification(models.Model):
-    """Model for in-app notifications to users."""
+    """
+    Model for in-app notifications to users.
+
+    Rating and comment notifications are coalesced: an event on the same
+    recipe within COALESCE_WINDOW is merged into the recipient's unread
+    notification for it ("@a, @b and 12 others rated ...") instead of adding
+    a row. ``coalesce_key`` identifies what can be merged, ``actor_ids``
+    holds every distinct actor and ``actor_names`` the latest two.
+    """
+    
+    COALESCE_WINDOW = timedelta(hours=24)
+    
+    # messages of notifications merged from several actors
+    COALESCED_MESSAGES = {
+        'recipe_rated': '{actors} rated your recipe "{subject}".',
+        'comment_reply': '{actors} commented on your recipe "{subject}".',
+    }
     
     NOTIFICATION_TYPES = [
         ('report_received', 'Report Received'),
@@ -40,21 +60,162 @@ class Notification(models.Model):
     action_url = models.CharField(max_length=500, blank=True)
     
     is_read = models.BooleanField(default=False)
+    # time of the latest event, so merged notifications move back to the top
     created_at = models.DateTimeField(auto_now_add=True)
+    # last change of any kind (merged, marked read), for incremental sync
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    coalesce_key = models.CharField(max_length=100, blank=True, default='')
+    actor_ids = models.JSONField(default=list, blank=True)
+    actor_names = models.JSONField(default=list, blank=True)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['recipient', '-created_at']),
             models.Index(fields=['recipient', 'is_read']),
+            models.Index(fields=['recipient', 'coalesce_key']),
+            models.Index(fields=['recipient', 'updated_at']),
         ]
     
     def __str__(self):
         return f"{self.title} - {self.recipient.username}"
     
+    @property
+    def actor_count(self):
+        return len(self.actor_ids)
+    
+    @staticmethod
+    def describe_actors(names, count):
+        """'@a', '@a and @b' or '@a, @b and 3 others'."""
+        if count <= 1 or len(names) < 2:
+            return names[0]
+        if count == 2:
+            return f"{names[0]} and {names[1]}"
+        others = count - 2
+        return f"{names[0]}, {names[1]} and {others} other{'s' if others != 1 else ''}"
+    
+    def _merge(self, event):
+        """Fold ``event`` (an unsaved notification with one actor) into this one."""
+        actor_id, actor_name = event.actor_ids[0], event.actor_names[0]
+        if actor_id not in self.actor_ids:
+            self.actor_ids = self.actor_ids + [actor_id]
+        self.actor_names = [actor_name] + [name for name in self.actor_names if name != actor_name][:1]
+        self.title = event.title
+        self.action_url = event.action_url
+        self.created_at = self.updated_at = timezone.now()
+        if self.actor_count > 1:
+            self.message = self.COALESCED_MESSAGES[self.notification_type].format(
+                actors=self.describe_actors(self.actor_names, self.actor_count),
+                subject=event.subject,
+            )
+        else:
+            # the same actor again, keep their own wording
+            self.message = event.message
+    
+    @classmethod
+    def create_many(cls, notifications):
+        """
+        Save unsaved ``notifications`` with one bulk insert.
+        
+        Use this instead of ``bulk_create`` so the unread counters are kept
+        up to date. Returns the notifications.
+        """
+        notifications = list(notifications)
+        cls.objects.bulk_create(notifications)
+        for recipient_id, count in Counter(n.recipient_id for n in notifications).items():
+            notifications_created(recipient_id, count)
+        return notifications
+    
     @classmethod
-    def create_report_received_notification(cls, reporter):
-        return cls.objects.create(
+    def coalesce(cls, events):
+        """
+        Save notification ``events``, merging each into an open one where possible.
+        
+        ``events`` are unsaved notifications with a ``coalesce_key``, one
+        actor and a ``subject`` attribute (the text the merged message names).
+        An event is merged into the recipient's unread notification with the
+        same key from the last COALESCE_WINDOW, or into an earlier event of
+        the same batch. The rest are inserted. Everything is written with one
+        SELECT, one bulk insert and one bulk update. Returns the saved
+        notification for each event, in order.
+        """
+        events = list(events)
+        if not events:
+            return []
+        
+        # read and write in one transaction: with IMMEDIATE transactions it
+        # holds the write lock from the SELECT on, so concurrent merges from
+        # other workers queue up instead of duplicating or overwriting rows
+        with transaction.atomic():
+            open_notifications = {}
+            existing = cls.objects.filter(
+                recipient_id__in={event.recipient_id for event in events},
+                coalesce_key__in={event.coalesce_key for event in events},
+                is_read=False,
+                created_at__gte=timezone.now() - cls.COALESCE_WINDOW,
+            ).order_by('created_at', 'pk')
+            for notification in existing:
+                # the newest open notification per key wins
+                open_notifications[(notification.recipient_id, notification.coalesce_key)] = notification
+            
+            created, updated, saved = [], {}, []
+            for event in events:
+                key = (event.recipient_id, event.coalesce_key)
+                notification = open_notifications.get(key)
+                if notification is None:
+                    open_notifications[key] = event
+                    created.append(event)
+                    saved.append(event)
+                    continue
+                notification._merge(event)
+                if notification.pk is not None:
+                    updated[notification.pk] = notification
+                saved.append(notification)
+            
+            cls.objects.bulk_create(created)
+            cls.objects.bulk_update(
+                list(updated.values()),
+                ['title', 'message', 'action_url', 'created_at', 'updated_at', 'actor_ids', 'actor_names'],
+            )
+        
+        new_counts = Counter(n.recipient_id for n in created)
+        for recipient_id in {event.recipient_id for event in events}:
+            # merged notifications only refresh the recipient's recent list
+            notifications_created(recipient_id, new_counts[recipient_id])
+        return saved
+    
+    @classmethod
+    def _create(cls, commit=True, **fields):
+        """
+        Create a notification and count it towards the recipient's unread badge.
+        
+        With ``commit=False`` the notification is returned unsaved, for
+        ``create_many``.
+        """
+        notification = cls(**fields)
+        if commit:
+            notification.save()
+            notifications_created(notification.recipient_id)
+        return notification
+    
+    @classmethod
+    def _recipe_event(cls, actor, recipe, **fields):
+        """An unsaved notification about ``actor`` acting on ``recipe``, for coalesce()."""
+        event = cls(
+            recipient=recipe.author,
+            coalesce_key=f"{fields['notification_type']}:recipe:{recipe.pk}",
+            actor_ids=[actor.pk],
+            actor_names=[actor.username],
+            **fields
+        )
+        event.subject = recipe.title
+        return event
+    
+    @classmethod
+    def create_report_received_notification(cls, reporter, commit=True):
+        return cls._create(
+            commit=commit,
             recipient=reporter,
             notification_type='report_received',
             title='Report Received',
@@ -62,7 +223,7 @@ class Notification(models.Model):
         )
     
     @classmethod
-    def create_report_resolved_notification(cls, reporter, action_taken, content_title):
+    def create_report_resolved_notification(cls, reporter, action_taken, content_title, commit=True):
         if action_taken in ['hidden', 'deleted']:
             message = f'Your report has been reviewed. The content "{content_title}" has been removed. Thank you for helping keep our community safe.'
         elif action_taken == 'dismissed':
@@ -70,7 +231,8 @@ class Notification(models.Model):
         else:
             message = f'Your report has been reviewed and appropriate action has been taken. Thank you.'
         
-        return cls.objects.create(
+        return cls._create(
+            commit=commit,
             recipient=reporter,
             notification_type='report_resolved',
             title='Report Resolved',
@@ -78,8 +240,9 @@ class Notification(models.Model):
         )
     
     @classmethod
-    def create_content_removed_notification(cls, author, content_type_str, content_title, reason):
-        return cls.objects.create(
+    def create_content_removed_notification(cls, author, content_type_str, content_title, reason, commit=True):
+        return cls._create(
+            commit=commit,
             recipient=author,
             notification_type='content_removed',
             title=f'Your {content_type_str} Was Removed',
@@ -87,8 +250,9 @@ class Notification(models.Model):
         )
     
     @classmethod
-    def create_warning_notification(cls, user, reason):
-        return cls.objects.create(
+    def create_warning_notification(cls, user, reason, commit=True):
+        return cls._create(
+            commit=commit,
             recipient=user,
             notification_type='warning_issued',
             title='Community Guidelines Warning',
@@ -98,7 +262,7 @@ class Notification(models.Model):
     @classmethod
     def create_follow_request_notification(cls, from_user, to_user):
         from django.urls import reverse
-        return cls.objects.create(
+        return cls._create(
             recipient=to_user,
             notification_type='follow_request',
             title='New Follow Request',
@@ -109,21 +273,23 @@ class Notification(models.Model):
     @classmethod
     def create_rating_notification(cls, rater, recipe, stars):
         from django.urls import reverse
-        return cls.objects.create(
-            recipient=recipe.author,
+        return cls.coalesce([cls._recipe_event(
+            rater,
+            recipe,
             notification_type='recipe_rated',
             title='New Recipe Rating',
             message=f'{rater.username} rated your recipe "{recipe.title}" {stars} star{"s" if stars != 1 else ""}.',
             action_url=reverse('recipe_detail', kwargs={'pk': recipe.id})
-        )
+        )])[0]
     
     @classmethod
     def create_comment_notification(cls, commenter, recipe):
         from django.urls import reverse
-        return cls.objects.create(
-            recipient=recipe.author,
+        return cls.coalesce([cls._recipe_event(
+            commenter,
+            recipe,
             notification_type='comment_reply',
             title='New Comment',
             message=f'{commenter.username} commented on your recipe "{recipe.title}".',
             action_url=reverse('recipe_detail', kwargs={'pk': recipe.id})
-        )
+        )])[0]
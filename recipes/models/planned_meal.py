@@ -24,6 +24,9 @@ class PlannedMeal(models.Model):
                 on_delete= models.CASCADE,
                 related_name="planned_meals")
 
+    # Last change, for incremental calendar sync (recipes.sync)
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         """
         Prevents the same recipe from being added multiple times
@@ -35,4 +35,11 @@ class Rating(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.user.username} rated {self.recipe.title}: {self.stars} stars"
\ No newline at end of file
+        return f"{self.user.username} rated {self.recipe.title}: {self.stars} stars"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored value so stats can be adjusted on update
+        instance._loaded_stars = instance.__dict__.get('stars')
+        return instance
\ No newline at end of file
@@ -0,0 +1,129 @@
+from django.db import models, transaction
+
+
+class RecipeStats(models.Model):
+    """
+    Denormalised rating aggregates for a single recipe.
+
+    One row per recipe, kept up to date incrementally from the Rating
+    signals so that list and detail pages can read the average, count and
+    star histogram without aggregating over the ratings table.
+    """
+
+    recipe = models.OneToOneField(
+        'Recipe',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0, db_index=True)
+
+    # Histogram of ratings by number of stars
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    # Recency-weighted recent views, maintained by RecipeViewBucket
+    trending_score = models.FloatField(default=0, db_index=True)
+    trending_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'recipe stats'
+
+    def __str__(self):
+        return f"Stats for recipe #{self.recipe_id}: {self.rating_count} ratings"
+
+    def histogram(self):
+        """Return the star histogram as a {stars: count} dict."""
+        return {stars: getattr(self, f'stars_{stars}') for stars in range(1, 6)}
+
+    def _recalculate_average(self):
+        self.rating_avg = self.rating_sum / self.rating_count if self.rating_count else 0
+
+    @classmethod
+    def apply_rating_change(cls, recipe_id, old_stars=None, new_stars=None):
+        """
+        Apply a single rating event to the stats of a recipe.
+
+        ``old_stars`` is the value being removed (update or delete) and
+        ``new_stars`` the value being added (create or update).
+        """
+        # values may still be strings when they come straight from a form
+        old_stars = int(old_stars) if old_stars is not None else None
+        new_stars = int(new_stars) if new_stars is not None else None
+        if old_stars == new_stars:
+            return
+
+        with transaction.atomic():
+            cls.objects.get_or_create(recipe_id=recipe_id)
+            stats = cls.objects.select_for_update().get(recipe_id=recipe_id)
+
+            if old_stars is not None:
+                stats.rating_count = max(stats.rating_count - 1, 0)
+                stats.rating_sum = max(stats.rating_sum - old_stars, 0)
+                field = f'stars_{old_stars}'
+                setattr(stats, field, max(getattr(stats, field) - 1, 0))
+
+            if new_stars is not None:
+                stats.rating_count += 1
+                stats.rating_sum += new_stars
+                field = f'stars_{new_stars}'
+                setattr(stats, field, getattr(stats, field) + 1)
+
+            stats._recalculate_average()
+            stats.save()
+
+    @classmethod
+    def rebuild(cls, recipe_ids=None, commit=True):
+        """
+        Recompute stats from the ratings table.
+
+        Returns a list of ``(recipe_id, stored, expected)`` tuples for every
+        recipe whose stored stats drifted from the ratings. The corrected
+        values are written unless ``commit`` is False.
+        """
+        from recipes.models.recipes import Recipe
+        from recipes.models.rating import Rating
+
+        recipes = Recipe.objects.all()
+        ratings = Rating.objects.all()
+        if recipe_ids is not None:
+            recipes = recipes.filter(pk__in=recipe_ids)
+            ratings = ratings.filter(recipe_id__in=recipe_ids)
+
+        expected = {pk: cls(recipe_id=pk) for pk in recipes.values_list('pk', flat=True)}
+
+        ratings = ratings.values_list('recipe_id', 'stars')
+        for recipe_id, stars in ratings.iterator():
+            stats = expected[recipe_id]
+            stats.rating_count += 1
+            stats.rating_sum += stars
+            field = f'stars_{stars}'
+            setattr(stats, field, getattr(stats, field) + 1)
+
+        stored = cls.objects.in_bulk(expected.keys())
+        fields = ['rating_count', 'rating_sum', 'rating_avg'] + [f'stars_{s}' for s in range(1, 6)]
+        drift = []
+        to_create = []
+        to_update = []
+
+        for recipe_id, stats in expected.items():
+            stats._recalculate_average()
+            current = stored.get(recipe_id)
+            if current is None:
+                drift.append((recipe_id, None, stats))
+                to_create.append(stats)
+            elif any(getattr(current, f) != getattr(stats, f) for f in fields):
+                drift.append((recipe_id, current, stats))
+                to_update.append(stats)
+
+        if commit:
+            with transaction.atomic():
+                cls.objects.bulk_create(to_create, batch_size=500)
+                cls.objects.bulk_update(to_update, fields, batch_size=500)
+
+        return drift
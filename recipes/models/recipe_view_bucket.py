@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+
+class RecipeViewBucket(models.Model):
+    """
+    Number of counted views a recipe received in one fixed time bucket.
+
+    The trending score of a recipe is a recency-weighted sum over its last
+    TRENDING_WINDOW_BUCKETS buckets. It is stored on RecipeStats so the
+    dashboard can order by it in SQL instead of looking every recipe up in
+    the cache.
+    """
+
+    BUCKET_MINUTES = 10
+    TRENDING_WINDOW_BUCKETS = 6
+
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='view_buckets'
+    )
+    bucket_start = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recipe', 'bucket_start'], name='unique_recipe_view_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"Recipe #{self.recipe_id}: {self.views} views from {self.bucket_start:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def bucket_for(cls, moment):
+        """Start of the bucket containing ``moment``."""
+        minute = moment.minute - moment.minute % cls.BUCKET_MINUTES
+        return moment.replace(minute=minute, second=0, microsecond=0)
+
+    @classmethod
+    def window_start(cls, now=None):
+        """Start of the oldest bucket that still counts towards trending."""
+        now = now or timezone.now()
+        return cls.bucket_for(now) - timedelta(minutes=cls.BUCKET_MINUTES * (cls.TRENDING_WINDOW_BUCKETS - 1))
+
+    @classmethod
+    def record_views(cls, recipe_id, count=1, at=None, update_score=True):
+        """
+        Add ``count`` views to the bucket containing ``at``.
+
+        The recipe's trending score is refreshed too unless ``update_score``
+        is False (batch callers refresh all their recipes at once).
+        """
+        at = at or timezone.now()
+        with transaction.atomic():
+            bucket, created = cls.objects.get_or_create(
+                recipe_id=recipe_id,
+                bucket_start=cls.bucket_for(at),
+                defaults={'views': count},
+            )
+            if not created:
+                cls.objects.filter(pk=bucket.pk).update(views=F('views') + count)
+            if update_score:
+                cls.update_trending_scores(recipe_ids=[recipe_id], now=at)
+
+    @classmethod
+    def score(cls, buckets, now=None):
+        """
+        Recency-weighted view score for ``(bucket_start, views)`` pairs.
+
+        Views in the current bucket count fully, older buckets linearly less,
+        and anything outside the window not at all.
+        """
+        current = cls.bucket_for(now or timezone.now())
+        total = 0.0
+        for bucket_start, views in buckets:
+            age = int((current - bucket_start).total_seconds() // (cls.BUCKET_MINUTES * 60))
+            if 0 <= age < cls.TRENDING_WINDOW_BUCKETS:
+                total += views * (cls.TRENDING_WINDOW_BUCKETS - age) / cls.TRENDING_WINDOW_BUCKETS
+        return total
+
+    @classmethod
+    def update_trending_scores(cls, recipe_ids=None, now=None):
+        """
+        Recompute the stored trending score of the given recipes.
+
+        With no ``recipe_ids`` every recipe that currently has a score or
+        recent views is refreshed, which also decays recipes nobody is
+        looking at any more. Returns the number of stats rows updated.
+        """
+        from recipes.models.recipe_stats import RecipeStats
+
+        now = now or timezone.now()
+        recent = cls.objects.filter(bucket_start__gte=cls.window_start(now))
+        stats = RecipeStats.objects.all()
+        if recipe_ids is not None:
+            recent = recent.filter(recipe_id__in=recipe_ids)
+            stats = stats.filter(recipe_id__in=recipe_ids)
+        else:
+            stats = stats.filter(
+                models.Q(trending_score__gt=0) | models.Q(recipe_id__in=recent.values('recipe_id'))
+            )
+
+        buckets = {}
+        for recipe_id, bucket_start, views in recent.values_list('recipe_id', 'bucket_start', 'views'):
+            buckets.setdefault(recipe_id, []).append((bucket_start, views))
+
+        to_update = []
+        for row in stats.only('recipe_id', 'trending_score'):
+            row.trending_score = cls.score(buckets.get(row.recipe_id, []), now=now)
+            row.trending_updated_at = now
+            to_update.append(row)
+
+        RecipeStats.objects.bulk_update(to_update, ['trending_score', 'trending_updated_at'], batch_size=500)
+        return len(to_update)
+
+    @classmethod
+    def trending_score_expression(cls, now=None):
+        """
+        Recipe queryset expression for the stored trending score.
+
+        Scores that have not been refreshed within the window are treated
+        as zero, so a recipe does not stay trending just because nobody has
+        run ``refresh_trending`` since its views dried up.
+        """
+        return Case(
+            When(stats__trending_updated_at__gte=cls.window_start(now), then=F('stats__trending_score')),
+            default=Value(0.0),
+            output_field=models.FloatField(),
+        )
+
+    @classmethod
+    def prune(cls, now=None):
+        """Delete buckets that have left the trending window."""
+        deleted, _ = cls.objects.filter(bucket_start__lt=cls.window_start(now)).delete()
+        return deleted
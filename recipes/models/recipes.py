@@ -1,6 +1,24 @@
 from django.db import models
+from django.db.models.functions import Substr
 from django.conf import settings
-from django.db.models import Avg
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def for_cards(self):
+        """
+        Load only what a recipe card renders.
+
+        The ingredients, instructions and full description stay in the
+        database; cards get the first EXCERPT_LENGTH characters of the
+        description as ``description_excerpt`` (see get_excerpt), the
+        author's username and the rating aggregates from the stats row.
+        """
+        return (
+            self.select_related('author', 'stats')
+            .only(*Recipe.CARD_FIELDS, 'author__username', 'stats__rating_avg', 'stats__rating_count')
+            .annotate(description_excerpt=Substr('description', 1, Recipe.EXCERPT_LENGTH))
+        )
 
 
 class Recipe(models.Model):
@@ -11,7 +29,27 @@ class Recipe(models.Model):
         ('snack', 'Snack'),
         ('dessert', 'Dessert'),
     ]
-    
+    # one bit per meal type, in menu order
+    MEAL_TYPE_BITS = {code: 1 << i for i, (code, _) in enumerate(MEAL_TYPE_CHOICES)}
+
+    MEAT_KEYWORDS = ["chicken", "mutton", "fish", "lamb", "pork", "beef", "egg", "eggs", "shrimp", "prawns", "bacon"]
+    DAIRY_KEYWORDS = ["milk", "cheese", "butter", "ghee", "yogurt", "cream"]
+    HONEY_KEYWORDS = ["honey"]
+
+    # columns list pages load for each card (everything the card templates and
+    # the keyset orderings read), and how much of the description they show
+    CARD_FIELDS = ("id", "author", "title", "time", "meal_type", "image", "image_url", "created_at", "total_views")
+    EXCERPT_LENGTH = 300
+
+    DIET_NON_VEG = "non_veg"
+    DIET_VEG = "veg"
+    DIET_VEGAN = "vegan"
+    DIET_CHOICES = [
+        (DIET_VEGAN, "Vegan"),
+        (DIET_VEG, "Vegetarian"),
+        (DIET_NON_VEG, "Non-Vegetarian"),
+    ]
+
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -24,6 +62,12 @@ class Recipe(models.Model):
     instructions = models.TextField(blank=True, help_text="Step-by-step cooking instructions")
     time = models.PositiveIntegerField(help_text="preparation time in minutes")
     meal_type = models.TextField(help_text="breakfast/lunch/dinner", blank=False, default="")
+    meal_type_mask = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        help_text="Bitmask of MEAL_TYPE_BITS, derived from meal_type every time the recipe is saved"
+    )
     image = models.ImageField(upload_to='recipe_images/', blank=True, null=True, help_text="Upload an image from your device")
     image_url = models.URLField(max_length=500, blank=True, null=True, help_text="Or provide an image URL")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -31,29 +75,93 @@ class Recipe(models.Model):
     total_views = models.PositiveIntegerField(default=0, help_text="Total number of times this recipe has been viewed")
     last_viewed_at = models.DateTimeField(null=True, blank=True, help_text="Last time this recipe was viewed")
     is_hidden = models.BooleanField(default=False, help_text="Hidden by moderator or auto-hidden due to reports")
+    diet_type = models.CharField(
+        max_length=10,
+        choices=DIET_CHOICES,
+        default=DIET_VEGAN,
+        editable=False,
+        db_index=True,
+        help_text="Derived from the ingredients every time the recipe is saved"
+    )
 
-    MEAT_KEYWORDS = ["chicken", "mutton", "fish", "lamb", "pork", "beef", "egg", "eggs", "shrimp", "prawns", "bacon"]
-    DAIRY_KEYWORDS = ["milk", "cheese", "butter", "ghee", "yogurt", "cream"]
-    HONEY_KEYWORDS = ["honey"]
-
-    DIET_NON_VEG = "non_veg"
-    DIET_VEG = "veg"
-    DIET_VEGAN = "vegan"
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ["time"]
 
     def __str__(self):
         return f"Recipe: {self.title} by {self.author}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # lets the feed signal handlers spot hiding and unhiding (recipes/signals.py)
+        instance._loaded_is_hidden = instance.__dict__.get('is_hidden')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # keep the stored diet class and meal type mask in step with their sources
+        self.diet_type = self.classify_diet(self.ingredients)
+        self.meal_type_mask = self.meal_type_mask_for(self.parse_meal_types(self.meal_type))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = set()
+            if 'ingredients' in update_fields:
+                derived.add('diet_type')
+            if 'meal_type' in update_fields:
+                derived.add('meal_type_mask')
+            kwargs['update_fields'] = set(update_fields) | derived
+        super().save(*args, **kwargs)
+        self._loaded_is_hidden = self.is_hidden
+
+    @staticmethod
+    def parse_meal_types(value):
+        """Split a comma-separated meal_type value into lower-case codes."""
+        return [mt.strip().lower() for mt in (value or '').split(',') if mt.strip()]
+
+    @classmethod
+    def meal_type_mask_for(cls, meal_types):
+        """Combine meal type codes into a bitmask; unknown codes are ignored."""
+        mask = 0
+        for meal_type in meal_types:
+            mask |= cls.MEAL_TYPE_BITS.get(meal_type.strip().lower(), 0)
+        return mask
+
+    @classmethod
+    def meal_type_masks_matching(cls, meal_types):
+        """
+        Every stored mask that shares a bit with ``meal_types``.
+
+        There are only 2**5 possible masks, so "has any of these meal types"
+        becomes ``meal_type_mask__in=[...]``, which SQLite answers from the
+        index instead of testing each row's bits.
+        """
+        wanted = cls.meal_type_mask_for(meal_types)
+        return [mask for mask in range(1, 1 << len(cls.MEAL_TYPE_BITS)) if mask & wanted]
     
+    def get_stats(self):
+        """
+        Return the denormalised RecipeStats row (or None if missing).
+
+        Reuses the row loaded by select_related('stats'); otherwise reads it
+        by primary key without caching, so repeated calls stay fresh.
+        """
+        from recipes.models.recipe_stats import RecipeStats
+        if type(self).stats.is_cached(self):
+            return getattr(self, 'stats', None)
+        if self.pk is None:
+            return None
+        return RecipeStats.objects.filter(recipe_id=self.pk).first()
+
     def average_rating(self):
-        """Calculate average rating for this recipe."""
-        result = self.ratings.aggregate(Avg('stars'))
-        return result['stars__avg'] or 0
+        """Average rating for this recipe, read from the stats row."""
+        stats = self.get_stats()
+        return stats.rating_avg if stats and stats.rating_count else 0
 
     def rating_count(self):
         """Count total number of ratings."""
-        return self.ratings.count()
+        stats = self.get_stats()
+        return stats.rating_count if stats else 0
     
     def user_can_rate(self, user):
         """Check if a user can rate this recipe."""
@@ -79,16 +187,22 @@ class Recipe(models.Model):
         except:
             return None
         
-    def get_diet_type(self):
-        ingredients = self.ingredients.lower()
+    @classmethod
+    def classify_diet(cls, ingredients):
+        """Classify an ingredients text as non-veg, veg or vegan by keyword."""
+        ingredients = (ingredients or "").lower()
 
-        if any(w in ingredients for w in self.MEAT_KEYWORDS):
-            return self.DIET_NON_VEG
+        if any(w in ingredients for w in cls.MEAT_KEYWORDS):
+            return cls.DIET_NON_VEG
 
-        if any(w in ingredients for w in self.DAIRY_KEYWORDS + self.HONEY_KEYWORDS):
-            return self.DIET_VEG
+        if any(w in ingredients for w in cls.DAIRY_KEYWORDS + cls.HONEY_KEYWORDS):
+            return cls.DIET_VEG
 
-        return self.DIET_VEGAN
+        return cls.DIET_VEGAN
+
+    def get_diet_type(self):
+        """Return the stored diet class (computed on save)."""
+        return self.diet_type
     
     def get_diet_type_display(self):
         """Return formatted diet type for display."""
@@ -100,42 +214,59 @@ class Recipe(models.Model):
         else:
             return "Vegan"
     
+    def get_excerpt(self):
+        """Start of the description, as loaded by RecipeQuerySet.for_cards."""
+        if hasattr(self, 'description_excerpt'):
+            return self.description_excerpt
+        return self.description[:self.EXCERPT_LENGTH]
+
     def get_image_url(self):
         if self.image:
             return self.image.url
         return self.image_url
     
     def get_active_viewers(self):
-
-        from django.core.cache import cache
-        cache_key = f'recipe_viewers_{self.pk}'
-        viewers = cache.get(cache_key, set())
-        return len(viewers)
+        """Number of people viewing this recipe right now (prefetched for list pages)."""
+        if hasattr(self, '_active_viewers'):
+            return self._active_viewers
+        from recipes.viewers import active_viewers
+        return active_viewers(self.pk)
     
+    def get_fragment_version(self):
+        """Version of this recipe's cached template fragments (prefetched for list pages)."""
+        if hasattr(self, '_fragment_version'):
+            return self._fragment_version
+        from recipes.fragments import fragment_version
+        return fragment_version(self.pk)
+
     def add_viewer(self, user_id):
         # track user view and increment total views
-        from django.core.cache import cache
         from django.utils import timezone
-        
-        cache_key = f'recipe_viewers_{self.pk}'
-        viewers = cache.get(cache_key, set())
-        
+        from recipes.view_counter import record_view
+        from recipes.viewers import add_viewer
+
         # Only count as new view if user wasn't already viewing
-        is_new_viewer = user_id not in viewers
-        
-        viewers.add(user_id)
-        # Keep viewer in cache for 5 minutes (300 seconds)
-        cache.set(cache_key, viewers, 300)
-        
-        if is_new_viewer:
+        if add_viewer(self.pk, user_id):
+            # buffered and written in batches, only this instance is updated now
             self.total_views += 1
             self.last_viewed_at = timezone.now()
-            self.save(update_fields=['total_views', 'last_viewed_at'])
+            record_view(self.pk, at=self.last_viewed_at)
+            self.publish_active_viewers()
+        self.__dict__.pop('_active_viewers', None)
+
+    def publish_active_viewers(self):
+        # push the new count to live event streams watching this recipe
+        from recipes import live
+        from recipes.viewers import active_viewers
+
+        topic = live.recipe_topic(self.pk)
+        if live.has_subscribers(topic):
+            live.publish(topic, live.viewers_event(self.pk, active_viewers(self.pk)))
     
     def get_popularity_score(self):
         """Calculate popularity score based on ratings, views, and recency."""
-        avg_rating = self.average_rating() or 0
-        rating_weight = avg_rating * self.rating_count()
+        stats = self.get_stats()
+        rating_weight = stats.rating_sum if stats else 0
         view_weight = self.total_views * 0.1
         return rating_weight + view_weight
     
@@ -152,10 +283,11 @@ class Recipe(models.Model):
         return [inst.strip() for inst in self.instructions.split('\n') if inst.strip()]
     
     def get_meal_types_list(self):
-        """Return meal types as a list, split by commas."""
-        if not self.meal_type:
-            return []
-        return [mt.strip() for mt in self.meal_type.split(',') if mt.strip()]
+        """Return meal types in menu order, decoded from the stored bitmask."""
+        if not self.meal_type_mask:
+            # unsaved instance, or a value that matches no known meal type
+            return self.parse_meal_types(self.meal_type)
+        return [code for code, bit in self.MEAL_TYPE_BITS.items() if self.meal_type_mask & bit]
     
     def get_meal_types_display(self):
         """Return formatted meal types for display."""
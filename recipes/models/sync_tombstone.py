@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+
+class SyncTombstone(models.Model):
+    """
+    Record of a deleted planned meal or notification.
+
+    Clients that keep a copy of the planner calendar or the notification
+    dropdown ask for changes ``since`` their last cursor (recipes.sync);
+    tombstones tell them which rows disappeared in the meantime. They are
+    kept for RETENTION, clients with an older cursor start over.
+
+    ``user_id`` is a plain column rather than a foreign key: tombstones of a
+    user who is being deleted are written while the account goes away.
+    """
+
+    RETENTION = timedelta(days=30)
+
+    PLANNED_MEAL = 'planned_meal'
+    NOTIFICATION = 'notification'
+    KINDS = [
+        (PLANNED_MEAL, 'Planned meal'),
+        (NOTIFICATION, 'Notification'),
+    ]
+
+    user_id = models.PositiveIntegerField()
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'kind', 'deleted_at']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} of user #{self.user_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def deleted_since(cls, user_id, kind, since):
+        """Ids of ``kind`` rows of ``user_id`` deleted after ``since``."""
+        return list(
+            cls.objects.filter(user_id=user_id, kind=kind, deleted_at__gt=since)
+            .values_list('object_id', flat=True)
+            .distinct()
+        )
+
+    @classmethod
+    def prune(cls, now=None):
+        """Delete tombstones older than RETENTION."""
+        now = now or timezone.now()
+        deleted, _ = cls.objects.filter(deleted_at__lt=now - cls.RETENTION).delete()
+        return deleted
@@ -1,7 +1,12 @@
+from urllib.parse import urlencode
+
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from libgravatar import Gravatar
+from recipes.notification_cache import unread_count
 
 class User(AbstractUser):
     """Model used for user authentication, and team member related information."""
@@ -32,6 +37,13 @@ class User(AbstractUser):
 
     is_private = models.BooleanField(default=False)
 
+    # Denormalised Follow counts, kept in sync by recipes/signals.py
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    # MD5 of the normalised email, so avatar URLs need no hashing per render
+    gravatar_hash = models.CharField(max_length=32, blank=True, editable=False)
+
     def follow(self, other_user):
         other_user.followers.add(self)
 
@@ -45,21 +57,46 @@ class User(AbstractUser):
         return self.followers.filter(pk=other_user.pk).exists()
 
 
+    @classmethod
+    def adjust_follow_counts(cls, follower_id, following_id, delta):
+        """Add ``delta`` follows from ``follower_id`` to ``following_id`` to both counters."""
+        followers = cls.objects.filter(pk=following_id)
+        following = cls.objects.filter(pk=follower_id)
+        if delta < 0:
+            # never go below zero, even if a counter had drifted
+            followers = followers.filter(followers_count__gte=-delta)
+            following = following.filter(following_count__gte=-delta)
+        followers.update(followers_count=F('followers_count') + delta)
+        following.update(following_count=F('following_count') + delta)
+
     class Meta:
         """Model options."""
 
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # prefix lookups for the user search (recipes.user_search)
+            models.Index(Lower('username'), name='user_username_search_idx'),
+            models.Index(Lower('first_name'), name='user_first_name_search_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_search_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.gravatar_hash = Gravatar(self.email).email_hash
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'gravatar_hash'}
+        super().save(*args, **kwargs)
 
     def full_name(self):
         return f'{self.first_name} {self.last_name}'
 
     def gravatar(self, size=120):
-        gravatar_object = Gravatar(self.email)
-        gravatar_url = gravatar_object.get_image(size=size, default='mp')
-        return gravatar_url
+        # users created without save() (fixtures, bulk_create) have no stored hash
+        email_hash = self.gravatar_hash or Gravatar(self.email).email_hash
+        return f'https://www.gravatar.com/avatar/{email_hash}?{urlencode({"size": size, "default": "mp"})}'
 
     def mini_gravatar(self):
         return self.gravatar(size=60)
     
     def unread_notifications_count(self):
-        return self.notifications.filter(is_read=False).count()
\ No newline at end of file
+        return unread_count(self.pk)
\ No newline at end of file
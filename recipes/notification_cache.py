@@ -0,0 +1,125 @@
+"""
+Cached per-user notification state for the navbar.
+
+Every page shows the unread badge and the latest notifications in the
+navbar, so both are kept in the cache instead of being queried per render:
+
+* ``notifications:unread:<user>`` - the unread count. The ``Notification``
+  factories increment it and marking notifications read decrements it; a
+  missing key is recounted from the database (and adjustments to a missing
+  key are dropped, the recount includes them). An adjustment that misses
+  the key bumps ``notifications:unread_missed:<user>``, and a recount that
+  started before the bump deletes the count it just cached, which may
+  predate the adjustment.
+* ``notifications:recent:<user>`` - the latest notifications, as plain
+  dicts. Deleted whenever the user's notifications change.
+
+Adjustments run once the surrounding transaction commits, so rolled back
+notifications never reach the counter, and are then pushed to the user's
+live event streams in this process (recipes.live). Every change also bumps
+the dropdown's sync version (recipes.sync). Writes that bypass these
+helpers (the admin, raw updates) are corrected when the entry expires.
+``NOTIFICATION_CACHE_TIMEOUT = 0`` turns the caching off.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes import live
+from recipes.sync import NOTIFICATIONS, bump_sync_version
+
+UNREAD_KEY = 'notifications:unread:{}'
+UNREAD_MISSED_KEY = 'notifications:unread_missed:{}'
+RECENT_KEY = 'notifications:recent:{}'
+
+# notifications shown in the navbar dropdown
+RECENT_COUNT = 5
+
+
+def cache_timeout():
+    return getattr(settings, 'NOTIFICATION_CACHE_TIMEOUT', 10 * 60)
+
+
+def unread_count(user_id):
+    """Number of unread notifications of ``user_id``."""
+    timeout = cache_timeout()
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key) if timeout else None
+    if count is None:
+        from recipes.models import Notification
+        missed = cache.get(UNREAD_MISSED_KEY.format(user_id)) if timeout else None
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        if timeout and cache.add(key, count, timeout):
+            # an adjustment missed the key while we counted, the count may not include it
+            if cache.get(UNREAD_MISSED_KEY.format(user_id)) != missed:
+                cache.delete(key)
+    return count
+
+
+def cached_unread_counts(user_ids):
+    """``{user_id: unread count}`` for the users whose count is cached."""
+    keys = {UNREAD_KEY.format(user_id): user_id for user_id in user_ids}
+    return {keys[key]: count for key, count in cache.get_many(list(keys)).items()}
+
+
+def recent_notifications(user_id):
+    """The latest notifications of ``user_id`` as dicts, newest first."""
+    timeout = cache_timeout()
+    recent = cache.get(RECENT_KEY.format(user_id)) if timeout else None
+    if recent is None:
+        from recipes.models import Notification
+        recent = list(
+            Notification.objects.filter(recipient_id=user_id)
+            .order_by('-created_at', '-pk')
+            .values('id', 'title', 'message', 'is_read', 'created_at')[:RECENT_COUNT]
+        )
+        if timeout:
+            cache.set(RECENT_KEY.format(user_id), recent, timeout)
+    return recent
+
+
+def _adjust_unread(user_id, delta):
+    key = UNREAD_KEY.format(user_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        # not cached, the next read counts from the database; a read that is
+        # counting right now may have missed this change, so tell it
+        missed_key = UNREAD_MISSED_KEY.format(user_id)
+        try:
+            cache.incr(missed_key)
+        except ValueError:
+            cache.add(missed_key, 1, cache_timeout())
+        cache.delete(key)
+        return
+    if count < 0:
+        cache.delete(key)
+
+
+def _publish(user_id, new_notifications):
+    topic = live.user_topic(user_id)
+    if not live.has_subscribers(topic):
+        return
+    latest = recent_notifications(user_id)[:1] if new_notifications else []
+    live.publish(topic, live.unread_event(unread_count(user_id), latest=latest[0] if latest else None))
+
+
+def _changed(user_id, unread_delta, new_notifications):
+    def apply():
+        if unread_delta:
+            _adjust_unread(user_id, unread_delta)
+        cache.delete(RECENT_KEY.format(user_id))
+        _publish(user_id, new_notifications)
+    transaction.on_commit(apply)
+    bump_sync_version(NOTIFICATIONS, user_id)
+
+
+def notifications_created(user_id, count=1):
+    """Record ``count`` new unread notifications for ``user_id``."""
+    # merged notifications (count 0) still changed the latest one
+    _changed(user_id, count, True)
+
+
+def notifications_read(user_id, count=1):
+    """Record that ``count`` notifications of ``user_id`` were marked read."""
+    _changed(user_id, -count, False)
@@ -0,0 +1,273 @@
+"""
+Keyset (cursor) pagination.
+
+OFFSET pagination gets linearly slower the deeper the page, and Django's
+Paginator also runs a COUNT over the whole queryset. Keyset pagination
+instead remembers the sort key of the last row shown and asks for the rows
+that come after it, which is a single indexed range scan regardless of depth.
+
+Cursors are opaque, URL-safe strings encoding the ordering values of the
+boundary row plus its primary key, so every ordering used here must end in a
+unique field (normally ``pk``) to be stable.
+"""
+import base64
+import datetime
+import json
+from functools import cached_property
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import EmptyPage, InvalidPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return datetime.date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(values, reverse=False):
+    payload = {'v': [_encode_value(v) for v in values]}
+    if reverse:
+        payload['r'] = 1
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(values, reverse)`` for a cursor string."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return [_decode_value(v) for v in payload['v']], bool(payload.get('r'))
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor('Invalid cursor')
+
+
+class CursorPage:
+    """A page of results produced by CursorPaginator (mirrors the Page API templates use)."""
+
+    is_cursor = True
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_url = None
+        self.previous_url = None
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def set_urls(self, request, cursor_param='cursor', page_param='page'):
+        """Build the query strings for the previous/next links from the current request."""
+        for attr, cursor in (('next_url', self.next_cursor), ('previous_url', self.previous_cursor)):
+            if cursor is None:
+                continue
+            params = request.GET.copy()
+            params.pop(page_param, None)
+            params[cursor_param] = cursor
+            setattr(self, attr, f'?{params.urlencode()}')
+        return self
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by seeking past the last row of the previous page.
+
+    ``ordering`` is a sequence of field or annotation names (``-`` prefix for
+    descending) whose last entry must be unique. Each name must also be
+    readable as an attribute on the returned objects, so related lookups
+    should be annotated under a plain name first.
+
+    With ``count=False`` no COUNT query is run and ``count`` is None.
+    """
+
+    def __init__(self, queryset, per_page, ordering, count=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = [
+            (name[1:], True) if name.startswith('-') else (name, False)
+            for name in ordering
+        ]
+        self.count_enabled = count
+
+    @cached_property
+    def count(self):
+        if not self.count_enabled:
+            return None
+        return self.queryset.count()
+
+    def _order_by(self, reverse=False):
+        return [
+            f'{name}' if descending == reverse else f'-{name}'
+            for name, descending in self.ordering
+        ]
+
+    def _seek_filter(self, values, reverse=False):
+        """Rows strictly after ``values`` in ordering order (before, if reverse)."""
+        if len(values) != len(self.ordering):
+            raise InvalidCursor('Cursor does not match the ordering')
+
+        condition = Q()
+        for position, (name, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != reverse else 'gt'
+            branch = Q(**{f'{name}__{lookup}': values[position]})
+            for prior_name, _ in self.ordering[:position]:
+                branch &= Q(**{prior_name: values[self._index(prior_name)]})
+            condition |= branch
+        return condition
+
+    def _index(self, name):
+        return [n for n, _ in self.ordering].index(name)
+
+    def _values_for(self, obj):
+        return [getattr(obj, name) for name, _ in self.ordering]
+
+    def page(self, cursor=None):
+        """Return the CursorPage that follows (or precedes) ``cursor``."""
+        reverse = False
+        queryset = self.queryset
+
+        if cursor:
+            values, reverse = decode_cursor(cursor)
+            queryset = queryset.filter(self._seek_filter(values, reverse=reverse))
+
+        rows = list(queryset.order_by(*self._order_by(reverse=reverse))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        next_cursor = encode_cursor(self._values_for(rows[-1])) if has_next and rows else None
+        previous_cursor = encode_cursor(self._values_for(rows[0]), reverse=True) if has_previous and rows else None
+
+        return CursorPage(rows, self, has_next, has_previous, next_cursor, previous_cursor)
+
+
+def wants_cursor(request, cursor_param='cursor', default=False):
+    """True if this request should be served with keyset pagination."""
+    return cursor_param in request.GET or default
+
+
+def wants_exact_count(request, default=True):
+    """``?count=0`` lets clients skip the exact total count."""
+    value = request.GET.get('count')
+    if value is None:
+        return default
+    return value not in ('0', 'false', 'no')
+
+
+def paginate(request, queryset, per_page, ordering, page_param='page', cursor_param='cursor', count=None):
+    """
+    Paginate ``queryset`` for a view that is not a ListView.
+
+    Uses keyset pagination when the request carries ``cursor_param`` and
+    page numbers otherwise. Invalid pages and cursors fall back to a valid
+    page instead of raising. In cursor mode ``count`` overrides the
+    ``?count=`` parameter. Returns the page object.
+    """
+    if wants_cursor(request, cursor_param):
+        if count is None:
+            count = wants_exact_count(request)
+        paginator = CursorPaginator(queryset, per_page, ordering, count=count)
+        try:
+            page = paginator.page(request.GET.get(cursor_param))
+        except InvalidCursor:
+            page = paginator.page()
+        return page.set_urls(request, cursor_param=cursor_param, page_param=page_param)
+
+    paginator = Paginator(queryset, per_page)
+    try:
+        return paginator.page(request.GET.get(page_param))
+    except PageNotAnInteger:
+        return paginator.page(1)
+    except EmptyPage:
+        return paginator.page(paginator.num_pages)
+
+
+class CursorPaginationMixin:
+    """
+    ListView mixin adding a keyset pagination mode.
+
+    Requests with a ``cursor`` parameter (or every request, if
+    ``pagination_mode = "cursor"``) are paginated by seeking on
+    ``cursor_ordering`` (or ``get_cursor_ordering()``); ``?count=0`` or
+    ``exact_count = False`` skips the total count. Everything else uses the
+    normal page numbers. An invalid cursor shows the first page, as in
+    ``paginate()``.
+    """
+
+    pagination_mode = 'offset'
+    cursor_kwarg = 'cursor'
+    cursor_ordering = None
+    exact_count = True
+
+    def get_cursor_ordering(self):
+        """Return the field names to seek on; the last one must be unique."""
+        if self.cursor_ordering is None:
+            raise ImproperlyConfigured(
+                "%(cls)s is missing a cursor ordering. Define "
+                "%(cls)s.cursor_ordering or override "
+                "%(cls)s.get_cursor_ordering()." % {'cls': self.__class__.__name__}
+            )
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        use_cursor = wants_cursor(self.request, self.cursor_kwarg, default=self.pagination_mode == 'cursor')
+        if not use_cursor or isinstance(queryset, list):
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(
+            queryset,
+            page_size,
+            self.get_cursor_ordering(),
+            count=wants_exact_count(self.request, default=self.exact_count),
+        )
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            page = paginator.page()
+        page.set_urls(self.request, cursor_param=self.cursor_kwarg, page_param=self.page_kwarg)
+        return (paginator, page, page.object_list, page.has_other_pages())
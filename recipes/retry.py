@@ -0,0 +1,55 @@
+"""
+Retry SQLite writes that fail because another connection holds the lock.
+
+The busy timeout already makes SQLite wait for the write lock, but under a
+burst of writers a transaction can still give up with "database is locked".
+``retry_on_locked`` re-runs the whole unit of work with exponential backoff
+and jitter. It must wrap a complete transaction: inside an outer atomic
+block a retry could not undo the work already done, so the error is
+re-raised straight away there.
+"""
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+logger = logging.getLogger(__name__)
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and any(msg in str(error).lower() for msg in LOCKED_MESSAGES)
+
+
+def retry_on_locked(func=None, *, attempts=None, base_delay=None, max_delay=1.0):
+    """
+    Decorator re-running ``func`` when SQLite reports the database as locked.
+
+    ``attempts`` and ``base_delay`` default to the ``DB_WRITE_RETRY_ATTEMPTS``
+    and ``DB_WRITE_RETRY_BASE_DELAY`` settings. Can be used bare
+    (``@retry_on_locked``) or with arguments.
+    """
+    if func is None:
+        return functools.partial(retry_on_locked, attempts=attempts, base_delay=base_delay, max_delay=max_delay)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tries = attempts or getattr(settings, 'DB_WRITE_RETRY_ATTEMPTS', 5)
+        delay = base_delay if base_delay is not None else getattr(settings, 'DB_WRITE_RETRY_BASE_DELAY', 0.05)
+
+        for attempt in range(1, tries + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as error:
+                if not is_lock_error(error) or connection.in_atomic_block or attempt == tries:
+                    raise
+                sleep = min(max_delay, delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                logger.warning('%s: database locked, retrying in %.3fs (attempt %d/%d)',
+                               func.__qualname__, sleep, attempt, tries)
+                time.sleep(sleep)
+
+    return wrapper
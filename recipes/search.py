@@ -0,0 +1,182 @@
+"""
+Full-text recipe search backed by an SQLite FTS5 index.
+
+The ``recipes_recipe_fts`` virtual table mirrors the searchable recipe
+columns (title, description, ingredients, meal_type) as an external-content
+FTS5 index. Triggers on ``recipes_recipe`` keep it in sync on insert, update
+and delete, so no Python code has to remember to reindex.
+
+On databases without FTS5 the search falls back to the old ``icontains``
+predicates.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'recipes_recipe_fts'
+FTS_COLUMNS = ('title', 'description', 'ingredients', 'meal_type')
+
+# bm25 column weights, in FTS_COLUMNS order: a title hit matters most
+BM25_WEIGHTS = (10.0, 2.0, 1.0, 1.0)
+
+_columns = ', '.join(FTS_COLUMNS)
+_new_values = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+_old_values = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+
+CREATE_TABLE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_columns}, content='recipes_recipe', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+TRIGGERS_SQL = {
+    f'{FTS_TABLE}_ai': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON recipes_recipe BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); "
+        f"END"
+    ),
+    f'{FTS_TABLE}_ad': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON recipes_recipe BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+        f"END"
+    ),
+    f'{FTS_TABLE}_au': (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_columns} ON recipes_recipe BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); "
+        f"END"
+    ),
+}
+
+
+def create_fts_schema(conn):
+    """
+    Create the FTS table and its sync triggers, then (re)build the index.
+
+    The table was added by migration 0016, which keeps its own copy of this
+    SQL; this is only used to repair the schema after migrate.
+    """
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        for sql in TRIGGERS_SQL.values():
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def ensure_fts_schema(conn):
+    """
+    Restore the sync triggers if they went missing.
+
+    SQLite schema changes that rebuild ``recipes_recipe`` (most AddField and
+    AlterField migrations) silently drop its triggers, so this runs after
+    every migrate and rebuilds the index whenever it had to repair anything.
+    """
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f'{FTS_TABLE}%'],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+    if FTS_TABLE not in existing:
+        # migrations have not created the index yet
+        return
+    if not set(TRIGGERS_SQL) <= existing:
+        create_fts_schema(conn)
+
+
+_fts_checked = {}
+
+
+def fts_available():
+    """True when the current database has the recipe FTS index (checked once per database)."""
+    if connection.vendor != 'sqlite':
+        return False
+    name = str(connection.settings_dict['NAME'])
+    if not _fts_checked.get(name):
+        _fts_checked[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_checked[name]
+
+
+def build_match_query(term):
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix query and the words are implicitly
+    ANDed, so "chick curr" matches recipes containing both "chicken" and
+    "curry". Returns an empty string if the term has no searchable words.
+    """
+    words = re.findall(r'\w+', term.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class BM25Rank(Func):
+    """
+    bm25 rank of the recipe ``expression`` (its pk) among the FTS matches for ``match``.
+
+    A correlated subquery on rowid, which FTS5 seeks to directly within the
+    match. The pk is compiled like any other column, so the rank follows the
+    recipe under whatever alias the query gives ``recipes_recipe``.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, match, expression='pk', **extra):
+        super().__init__(Value(match), expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        match, rowid = self.get_source_expressions()
+        match_sql, match_params = compiler.compile(match)
+        rowid_sql, rowid_params = compiler.compile(rowid)
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        sql = (
+            f"(SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH {match_sql} AND rowid = {rowid_sql})"
+        )
+        return sql, (*match_params, *rowid_params)
+
+
+def search_recipes(queryset, term):
+    """
+    Restrict ``queryset`` to recipes matching ``term``.
+
+    The result is annotated with ``search_rank`` (bm25, lower is better) so
+    callers can order by relevance. Without FTS5 this falls back to the
+    ``icontains`` predicates and a constant rank.
+    """
+    match = build_match_query(term)
+
+    if not match or not fts_available():
+        return queryset.filter(
+            Q(description__icontains=term) |
+            Q(ingredients__icontains=term) |
+            Q(title__icontains=term) |
+            Q(meal_type__icontains=term)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    ).annotate(search_rank=BM25Rank(match))
+
+
+def search_recipe_titles(queryset, term):
+    """
+    Restrict ``queryset`` to recipes whose title matches ``term``.
+
+    Like search_recipes, every word is a prefix query, but the match is
+    limited to the title column (the recipe picker only shows titles).
+    """
+    words = re.findall(r'\w+', term.lower())
+
+    if not words or not fts_available():
+        return queryset.filter(title__icontains=term)
+
+    match = ' '.join(f'title : "{word}"*' for word in words)
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    )
@@ -0,0 +1,195 @@
+"""Signal handlers that keep denormalised data in sync with the source tables."""
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from recipes import feed
+from recipes.fragments import bump_fragment_version
+from recipes.models import (
+    Comment, Follow, FollowSuggestion, FollowSuggestionRefresh, Notification, PlannedDay, PlannedMeal, Rating,
+    Recipe, RecipeStats, SyncTombstone, User,
+)
+from recipes.search import ensure_fts_schema
+from recipes.sync import NOTIFICATIONS, PLANNER, bump_sync_version
+from recipes.visibility import invalidate_followed, invalidate_private_authors
+from recipes.write_queue import enqueue_unbatched
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_stats(sender, instance, created, raw=False, **kwargs):
+    """Every recipe gets an (empty) stats row when it is first saved."""
+    if created and not raw:
+        RecipeStats.objects.get_or_create(recipe_id=instance.pk)
+
+
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, created, raw=False, **kwargs):
+    """Fold a new or changed rating into the recipe stats."""
+    if raw:
+        return
+    if not created and not hasattr(instance, '_loaded_stars'):
+        # previous value unknown (instance was never loaded), recount instead
+        RecipeStats.rebuild(recipe_ids=[instance.recipe_id])
+    else:
+        old_stars = None if created else instance._loaded_stars
+        RecipeStats.apply_rating_change(instance.recipe_id, old_stars=old_stars, new_stars=instance.stars)
+    instance._loaded_stars = instance.stars
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    """Remove a deleted rating from the recipe stats."""
+    if not RecipeStats.objects.filter(recipe_id=instance.recipe_id).exists():
+        # the recipe itself is being deleted along with its stats
+        return
+    stars = getattr(instance, '_loaded_stars', instance.stars)
+    RecipeStats.apply_rating_change(instance.recipe_id, old_stars=stars)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, raw=False, **kwargs):
+    """Edits and moderation (hiding) make the recipe's cached fragments stale."""
+    if not raw:
+        bump_fragment_version(instance.pk)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def recipe_feedback_changed(sender, instance, raw=False, **kwargs):
+    """Ratings change the card's stars; comments (and hiding them) the detail page."""
+    if not raw:
+        bump_fragment_version(instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved_for_planners(sender, instance, created, raw=False, **kwargs):
+    """Calendar events show the recipe title, so resend the meals planned with it."""
+    if created or raw:
+        return
+    owners = set(PlannedDay.objects.filter(meals__recipe=instance).values_list('user_id', flat=True))
+    if owners:
+        PlannedMeal.objects.filter(recipe=instance).update(updated_at=timezone.now())
+        for user_id in owners:
+            bump_sync_version(PLANNER, user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved_for_feeds(sender, instance, created, raw=False, **kwargs):
+    """Push new and unhidden recipes to the followers' feeds (recipes.feed); hiding takes them out."""
+    if raw:
+        return
+    # None when the instance was not loaded from the database with is_hidden
+    was_hidden = getattr(instance, '_loaded_is_hidden', None)
+    if instance.is_hidden:
+        if not created and was_hidden is not True:
+            feed.remove_recipe(instance.pk)
+    elif created or was_hidden:
+        # the fan-out is one insert per follower: run it off the request
+        # thread, once the recipe row is committed
+        args = (instance.pk, instance.author_id, instance.created_at)
+        transaction.on_commit(lambda: enqueue_unbatched(feed.push_recipe, *args))
+
+
+def _planner_owner(meal):
+    if PlannedMeal.planned_day.is_cached(meal):
+        return meal.planned_day.user_id
+    return PlannedDay.objects.filter(pk=meal.planned_day_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=PlannedMeal)
+def planned_meal_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_sync_version(PLANNER, _planner_owner(instance))
+
+
+@receiver(post_delete, sender=PlannedMeal)
+def planned_meal_deleted(sender, instance, **kwargs):
+    """Leave a tombstone so calendar clients drop the meal on their next sync."""
+    user_id = _planner_owner(instance)
+    if user_id is not None:
+        SyncTombstone.objects.create(user_id=user_id, kind=SyncTombstone.PLANNED_MEAL, object_id=instance.pk)
+        bump_sync_version(PLANNER, user_id)
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, raw=False, **kwargs):
+    # bulk writes bump the version through recipes.notification_cache instead
+    if not raw:
+        bump_sync_version(NOTIFICATIONS, instance.recipient_id)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    SyncTombstone.objects.create(
+        user_id=instance.recipient_id, kind=SyncTombstone.NOTIFICATION, object_id=instance.pk
+    )
+    bump_sync_version(NOTIFICATIONS, instance.recipient_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    """Count a new follow on both users, in the same transaction as the insert."""
+    if created and not raw:
+        User.adjust_follow_counts(instance.follower_id, instance.following_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    User.adjust_follow_counts(instance.follower_id, instance.following_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_graph_changed(sender, instance, raw=False, **kwargs):
+    """Queue the follower for the next suggestion run; a followed suggestion is gone at once."""
+    if raw:
+        return
+    FollowSuggestionRefresh.mark([instance.follower_id])
+    if kwargs.get('created'):
+        FollowSuggestion.objects.filter(user_id=instance.follower_id, suggested_id=instance.following_id).delete()
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved_for_feeds(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.backfill([instance.follower_id], instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted_for_feeds(sender, instance, **kwargs):
+    feed.remove_author(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    """Following, unfollowing and accepted requests change whose recipes the follower sees."""
+    invalidate_followed(instance.follower_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """A privacy change hides or reveals the account's recipes to non-followers."""
+    if created:
+        # ids can be reused (e.g. after a rollback), so start from empty sets
+        invalidate_followed(instance.pk)
+    elif update_fields is not None and 'is_private' not in update_fields:
+        return
+    invalidate_private_authors()
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_private_authors()
+    invalidate_followed(instance.pk)
+
+
+@receiver(post_migrate)
+def repair_recipe_search_index(sender, using='default', **kwargs):
+    """Table rebuilds during migrations drop the FTS triggers, so put them back."""
+    if sender.name == 'recipes':
+        ensure_fts_schema(connections[using])
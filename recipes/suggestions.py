@@ -0,0 +1,230 @@
+"""
+"Who to follow" suggestions, computed in batches.
+
+Suggesting the accounts followed by the accounts a user follows takes two
+hops through the follow graph, far too slow to do per request. The
+``refresh_follow_suggestions`` command does it offline:
+
+1. The relevant ``Follow`` rows are loaded into a ``FollowGraph``: compact
+   adjacency arrays (CSR) over dense user indexes.
+2. For each user, every second-degree account gets a mutual count: how many
+   of the accounts the user follows follow it. The user and accounts they
+   already follow are skipped.
+3. The best CANDIDATE_LIMIT by mutual count are re-ranked by
+   ``mutual count + SHARED_RECIPE_WEIGHT * recipes both rated highly`` and
+   the top TOP_N are stored as FollowSuggestion rows, replacing the user's
+   previous ones.
+
+Incremental runs recompute only the users marked in FollowSuggestionRefresh
+by the Follow signals plus their followers (whose second hop goes through
+them), loading just the edges those users reach in two hops. Rating changes
+are picked up by periodic ``--full`` runs. Following a suggested account
+deletes that suggestion straight away.
+"""
+import heapq
+from array import array
+from itertools import accumulate, islice
+
+from django.db import transaction
+from django.utils import timezone
+
+TOP_N = 10
+CANDIDATE_LIMIT = 50
+# stars at which a rating counts as liking the recipe
+HIGH_RATING = 4
+SHARED_RECIPE_WEIGHT = 0.5
+CHUNK_SIZE = 500
+
+
+def _chunks(values, size=CHUNK_SIZE):
+    values = iter(values)
+    while chunk := list(islice(values, size)):
+        yield chunk
+
+
+class FollowGraph:
+    """
+    Follow edges as adjacency arrays.
+
+    Users are numbered densely; the accounts user ``i`` follows are
+    ``targets[offsets[i]:offsets[i + 1]]``. Two ``array('q')`` columns per
+    edge instead of a Python set per user keep a large graph in memory.
+    """
+
+    def __init__(self, edges):
+        sources, sinks = array('q'), array('q')
+        for follower_id, following_id in edges:
+            sources.append(follower_id)
+            sinks.append(following_id)
+
+        self.ids = array('q', sorted(set(sources) | set(sinks)))
+        self.index = {user_id: i for i, user_id in enumerate(self.ids)}
+
+        degrees = [0] * len(self.ids)
+        for follower_id in sources:
+            degrees[self.index[follower_id]] += 1
+        self.offsets = array('q', accumulate(degrees, initial=0))
+
+        self.targets = array('q', [0]) * len(sinks)
+        position = array('q', self.offsets[:-1])
+        for follower_id, following_id in zip(sources, sinks):
+            i = self.index[follower_id]
+            self.targets[position[i]] = self.index[following_id]
+            position[i] += 1
+
+    @classmethod
+    def load(cls, follower_ids=None):
+        """The follows of ``follower_ids`` (every follow if None)."""
+        return cls(_follow_edges(follower_ids))
+
+    @classmethod
+    def load_two_hops(cls, user_ids):
+        """The follows of ``user_ids`` and of every account they follow."""
+        first = list(_follow_edges(user_ids))
+        second_hop = {following_id for _, following_id in first} - set(user_ids)
+        return cls(first + list(_follow_edges(second_hop)))
+
+    def followers_with_follows(self):
+        """Ids of every user that follows someone."""
+        return [self.ids[i] for i in range(len(self.ids)) if self.offsets[i + 1] > self.offsets[i]]
+
+    def following(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def mutual_counts(self, user_id):
+        """``{account id: mutual count}`` for the second-degree accounts of ``user_id``."""
+        i = self.index.get(user_id)
+        if i is None:
+            return {}
+        direct = self.following(i)
+        skip = set(direct)
+        skip.add(i)
+        counts = {}
+        for followed in direct:
+            for candidate in self.following(followed):
+                if candidate not in skip:
+                    counts[candidate] = counts.get(candidate, 0) + 1
+        return {self.ids[candidate]: count for candidate, count in counts.items()}
+
+
+def _follow_edges(follower_ids=None):
+    from recipes.models import Follow
+
+    rows = Follow.objects.order_by().values_list('follower_id', 'following_id')
+    if follower_ids is None:
+        yield from rows.iterator(chunk_size=5000)
+        return
+    for chunk in _chunks(follower_ids):
+        yield from rows.filter(follower_id__in=chunk)
+
+
+def _liked_recipes(user_ids):
+    """``{user id: set of recipe ids}`` the users rated HIGH_RATING or more."""
+    from recipes.models import Rating
+
+    liked = {}
+    for chunk in _chunks(user_ids):
+        rows = Rating.objects.filter(user_id__in=chunk, stars__gte=HIGH_RATING).values_list('user_id', 'recipe_id')
+        for user_id, recipe_id in rows:
+            liked.setdefault(user_id, set()).add(recipe_id)
+    return liked
+
+
+def rank(graph, user_ids, top_n=TOP_N):
+    """Unsaved FollowSuggestion rows for ``user_ids``, best first per user."""
+    from recipes.models import FollowSuggestion
+
+    candidates = {}
+    for user_id in user_ids:
+        mutual = graph.mutual_counts(user_id)
+        # ties go to the older account, so reruns are stable
+        candidates[user_id] = heapq.nlargest(CANDIDATE_LIMIT, mutual.items(), key=lambda item: (item[1], -item[0]))
+
+    involved = set(user_ids)
+    for best in candidates.values():
+        involved.update(candidate_id for candidate_id, _ in best)
+    liked = _liked_recipes(involved)
+
+    suggestions = []
+    for user_id, best in candidates.items():
+        mine = liked.get(user_id, set())
+        scored = []
+        for candidate_id, mutual in best:
+            shared = len(mine & liked.get(candidate_id, set()))
+            scored.append(FollowSuggestion(
+                user_id=user_id,
+                suggested_id=candidate_id,
+                mutual_count=mutual,
+                shared_recipes=shared,
+                score=mutual + SHARED_RECIPE_WEIGHT * shared,
+            ))
+        scored.sort(key=lambda suggestion: (-suggestion.score, suggestion.suggested_id))
+        suggestions.extend(scored[:top_n])
+    return suggestions
+
+
+def _store(user_ids, suggestions):
+    from recipes.models import FollowSuggestion
+
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(suggestions, batch_size=CHUNK_SIZE)
+
+
+def refresh(user_ids, graph=None, top_n=TOP_N):
+    """Recompute and store the suggestions of ``user_ids``. Returns the number of rows written."""
+    user_ids = list(user_ids)
+    if graph is None:
+        graph = FollowGraph.load_two_hops(user_ids)
+    written = 0
+    # one short write transaction per chunk of users
+    for chunk in _chunks(user_ids):
+        suggestions = rank(graph, chunk, top_n=top_n)
+        _store(chunk, suggestions)
+        written += len(suggestions)
+    return written
+
+
+def refresh_all(top_n=TOP_N):
+    """Recompute everyone's suggestions from the whole graph. Returns ``(users, rows)``."""
+    from recipes.models import Follow, FollowSuggestion, FollowSuggestionRefresh
+
+    started = timezone.now()
+    graph = FollowGraph.load()
+    user_ids = graph.followers_with_follows()
+    written = refresh(user_ids, graph=graph, top_n=top_n)
+    # users who no longer follow anyone have nothing to suggest
+    FollowSuggestion.objects.exclude(user_id__in=Follow.objects.values('follower_id')).delete()
+    FollowSuggestionRefresh.objects.filter(marked_at__lte=started).delete()
+    return len(user_ids), written
+
+
+def refresh_marked(top_n=TOP_N):
+    """Recompute the users whose follow graph changed since the last run. Returns ``(users, rows)``."""
+    from recipes.models import Follow, FollowSuggestionRefresh
+
+    started = timezone.now()
+    marked = list(FollowSuggestionRefresh.objects.filter(marked_at__lte=started).values_list('user_id', flat=True))
+    if not marked:
+        return 0, 0
+
+    affected = set(marked)
+    for chunk in _chunks(marked):
+        affected.update(Follow.objects.filter(following_id__in=chunk).values_list('follower_id', flat=True))
+    written = refresh(sorted(affected), top_n=top_n)
+
+    # marks made during the run stay for the next one
+    for chunk in _chunks(marked):
+        FollowSuggestionRefresh.objects.filter(user_id__in=chunk, marked_at__lte=started).delete()
+    return len(affected), written
+
+
+def suggestions_for(user, limit=5):
+    """The best stored suggestions for ``user``, with the suggested accounts, in one query."""
+    from recipes.models import FollowSuggestion
+
+    return list(
+        FollowSuggestion.objects.filter(user=user)
+        .select_related('suggested')
+        .order_by('-score', 'suggested_id')[:limit]
+    )
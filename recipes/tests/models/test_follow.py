@@ -84,6 +84,24 @@ class FollowModelTest(TestCase):
         self.user2.delete()
         self.assertFalse(Follow.objects.filter(id=follow_id).exists())
 
+    def test_deleting_a_user_decrements_the_other_counter(self):
+        Follow.objects.create(follower=self.user1, following=self.user2)
+        Follow.objects.create(follower=self.user3, following=self.user2)
+        self.user3.delete()
+
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user2.followers_count, 1)
+
+    def test_counters_do_not_go_negative(self):
+        follow = Follow.objects.create(follower=self.user1, following=self.user2)
+        User.objects.filter(pk=self.user2.pk).update(followers_count=0)
+        follow.delete()
+
+        self.user2.refresh_from_db()
+        self.user1.refresh_from_db()
+        self.assertEqual(self.user2.followers_count, 0)
+        self.assertEqual(self.user1.following_count, 0)
+
     def test_get_followers_raises_attribute_error(self):
         """
         get_followers() raises AttributeError due to known bug.
@@ -1,8 +1,16 @@
 """Tests for notification model and views."""
-from django.test import TestCase, Client
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.admin.sites import site
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory
 from django.urls import reverse
+from django.utils import timezone
 
-from recipes.models import User, Recipe, Notification
+from recipes.models import User, Recipe, Notification, Report
+from recipes.retry import retry_on_locked
 
 
 class NotificationModelTestCase(TestCase):
@@ -232,3 +240,188 @@ class NotificationViewTestCase(TestCase):
         )
 
         self.assertEqual(response.status_code, 404)
+
+
+class NotificationCoalescingTestCase(TestCase):
+    """Rating and comment notifications on one recipe are merged."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.author = User.objects.get(username='@johndoe')
+        self.recipe = Recipe.objects.create(
+            author=self.author,
+            title='Pancakes',
+            description='Test',
+            ingredients='flour',
+            time=30,
+            meal_type='breakfast'
+        )
+        self.raters = [
+            User.objects.get(username=username)
+            for username in ('@janedoe', '@petrapickles', '@peterpickles')
+        ]
+
+    def _rate(self, rater, stars=5):
+        return Notification.create_rating_notification(rater, self.recipe, stars)
+
+    def test_ratings_on_one_recipe_are_merged(self):
+        first = self._rate(self.raters[0])
+        second = self._rate(self.raters[1])
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Notification.objects.filter(recipient=self.author).count(), 1)
+        second.refresh_from_db()
+        self.assertEqual(second.actor_count, 2)
+        self.assertEqual(second.message, '@petrapickles and @janedoe rated your recipe "Pancakes".')
+
+    def test_many_actors_are_summarised(self):
+        for rater in self.raters:
+            notification = self._rate(rater)
+        for i in range(12):
+            extra = User.objects.create_user(username=f'@rater{i}', email=f'rater{i}@test.com', password='Password123')
+            notification = self._rate(extra)
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.message, '@rater11, @rater10 and 13 others rated your recipe "Pancakes".')
+
+    def test_repeat_actor_is_counted_once(self):
+        self._rate(self.raters[0])
+        notification = self._rate(self.raters[0], stars=3)
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.actor_count, 1)
+        self.assertIn('3 stars', notification.message)
+
+    def test_read_notifications_are_not_reopened(self):
+        first = self._rate(self.raters[0])
+        Notification.objects.filter(pk=first.pk).update(is_read=True)
+
+        second = self._rate(self.raters[1])
+        self.assertNotEqual(first.pk, second.pk)
+
+    def test_events_outside_the_window_start_a_new_notification(self):
+        first = self._rate(self.raters[0])
+        Notification.objects.filter(pk=first.pk).update(
+            created_at=timezone.now() - Notification.COALESCE_WINDOW - timedelta(minutes=1)
+        )
+
+        second = self._rate(self.raters[1])
+        self.assertNotEqual(first.pk, second.pk)
+
+    def test_ratings_and_comments_are_kept_apart(self):
+        self._rate(self.raters[0])
+        Notification.create_comment_notification(self.raters[1], self.recipe)
+        self.assertEqual(Notification.objects.filter(recipient=self.author).count(), 2)
+
+    def test_batch_is_written_with_bulk_queries(self):
+        self._rate(self.raters[0])
+        other_recipe = Recipe.objects.create(
+            author=self.author, title='Waffles', description='Test', ingredients='flour', time=30, meal_type='breakfast'
+        )
+        events = [
+            Notification._recipe_event(rater, recipe, notification_type='recipe_rated', title='New Recipe Rating',
+                                       message=f'{rater.username} rated your recipe.')
+            for recipe in (self.recipe, other_recipe)
+            for rater in self.raters
+        ]
+
+        # one SELECT, one INSERT and one UPDATE (plus the savepoint)
+        with self.assertNumQueries(5):
+            saved = Notification.coalesce(events)
+
+        self.assertEqual(len({n.pk for n in saved}), 2)
+        merged = Notification.objects.get(coalesce_key=f'recipe_rated:recipe:{other_recipe.pk}')
+        self.assertEqual(merged.actor_count, 3)
+
+
+class ConcurrentCoalescingTestCase(TransactionTestCase):
+    """Merges from two connections do not overwrite each other."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def test_interleaved_merges_keep_every_actor(self):
+        author = User.objects.get(username='@johndoe')
+        recipe = Recipe.objects.create(
+            author=author, title='Pancakes', description='Test', ingredients='flour', time=30, meal_type='breakfast'
+        )
+        jane, petra, peter = (
+            User.objects.get(username=username) for username in ('@janedoe', '@petrapickles', '@peterpickles')
+        )
+        Notification.create_rating_notification(jane, recipe, 5)
+
+        merged, other_done = threading.Event(), threading.Event()
+        merge = Notification._merge
+
+        def slow_merge(notification, event):
+            merge(notification, event)
+            if threading.current_thread() is threading.main_thread():
+                # the first merge has read the open notification; let the other one run
+                merged.set()
+                other_done.wait(0.5)
+
+        def rate_from_another_connection():
+            merged.wait()
+            try:
+                retry_on_locked(Notification.create_rating_notification)(peter, recipe, 4)
+            finally:
+                other_done.set()
+                connections.close_all()
+
+        other = threading.Thread(target=rate_from_another_connection)
+        other.start()
+        with patch.object(Notification, '_merge', slow_merge):
+            Notification.create_rating_notification(petra, recipe, 5)
+        other.join()
+
+        notification = Notification.objects.get(recipient=author)
+        self.assertEqual(sorted(notification.actor_ids), sorted([jane.pk, petra.pk, peter.pk]))
+
+
+class NotificationAdminBulkActionTestCase(TestCase):
+    """Admin bulk actions insert their notifications with one query."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.author = User.objects.get(username='@johndoe')
+        self.admin = User.objects.create_superuser(username='@admin', email='admin@test.com', password='Password123')
+        self.reports = []
+        for username in ('@janedoe', '@petrapickles', '@peterpickles'):
+            recipe = Recipe.objects.create(
+                author=self.author, title=f'Recipe by {username}', description='Test',
+                ingredients='flour', time=30, meal_type='lunch'
+            )
+            self.reports.append(Report.objects.create(
+                reported_by=User.objects.get(username=username),
+                content_object=recipe,
+                reason='spam',
+                description='Spam'
+            ))
+
+    def _request(self):
+        request = RequestFactory().post('/admin/')
+        request.user = self.admin
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        return request
+
+    def test_bulk_hide_content_uses_bulk_create(self):
+        model_admin = site._registry[Report]
+
+        with patch.object(Notification.objects, 'bulk_create', wraps=Notification.objects.bulk_create) as bulk_create:
+            model_admin.bulk_hide_content(self._request(), Report.objects.all())
+
+        bulk_create.assert_called_once()
+        self.assertEqual(Notification.objects.filter(notification_type='report_resolved').count(), 3)
+        self.assertEqual(Notification.objects.filter(recipient=self.author, notification_type='content_removed').count(), 3)
+        self.assertEqual(self.author.unread_notifications_count(), 3)
@@ -0,0 +1,100 @@
+"""Unit tests for the denormalised RecipeStats model."""
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from recipes.models import User, Recipe, Rating, RecipeStats
+
+
+class RecipeStatsTestCase(TestCase):
+    """Tests that rating stats are maintained incrementally."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.author = User.objects.get(username='@johndoe')
+        self.rater = User.objects.get(username='@janedoe')
+        self.other_rater = User.objects.get(username='@petrapickles')
+        self.recipe = Recipe.objects.create(
+            author=self.author,
+            title="Stats Recipe",
+            description="Test",
+            ingredients="flour",
+            time=10,
+            meal_type="lunch"
+        )
+
+    def _stats(self):
+        return RecipeStats.objects.get(recipe=self.recipe)
+
+    def test_stats_row_created_with_recipe(self):
+        stats = self._stats()
+        self.assertEqual(stats.rating_count, 0)
+        self.assertEqual(stats.rating_avg, 0)
+
+    def test_new_rating_updates_stats(self):
+        Rating.objects.create(recipe=self.recipe, user=self.rater, stars=4)
+        Rating.objects.create(recipe=self.recipe, user=self.other_rater, stars=2)
+        stats = self._stats()
+        self.assertEqual(stats.rating_count, 2)
+        self.assertEqual(stats.rating_sum, 6)
+        self.assertEqual(stats.rating_avg, 3.0)
+        self.assertEqual(stats.histogram(), {1: 0, 2: 1, 3: 0, 4: 1, 5: 0})
+
+    def test_updated_rating_moves_histogram_bucket(self):
+        Rating.objects.create(recipe=self.recipe, user=self.rater, stars=4)
+        Rating.objects.update_or_create(recipe=self.recipe, user=self.rater, defaults={'stars': 1})
+        stats = self._stats()
+        self.assertEqual(stats.rating_count, 1)
+        self.assertEqual(stats.rating_sum, 1)
+        self.assertEqual(stats.stars_4, 0)
+        self.assertEqual(stats.stars_1, 1)
+
+    def test_deleted_rating_is_removed_from_stats(self):
+        rating = Rating.objects.create(recipe=self.recipe, user=self.rater, stars=5)
+        Rating.objects.create(recipe=self.recipe, user=self.other_rater, stars=3)
+        rating.delete()
+        stats = self._stats()
+        self.assertEqual(stats.rating_count, 1)
+        self.assertEqual(stats.rating_avg, 3.0)
+        self.assertEqual(stats.stars_5, 0)
+
+    def test_queryset_delete_is_removed_from_stats(self):
+        Rating.objects.create(recipe=self.recipe, user=self.rater, stars=5)
+        Rating.objects.all().delete()
+        self.assertEqual(self._stats().rating_count, 0)
+
+    def test_model_methods_read_stats(self):
+        Rating.objects.create(recipe=self.recipe, user=self.rater, stars=5)
+        recipe = Recipe.objects.select_related('stats').get(pk=self.recipe.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(recipe.average_rating(), 5)
+            self.assertEqual(recipe.rating_count(), 1)
+
+    def test_rebuild_reports_and_fixes_drift(self):
+        Rating.objects.create(recipe=self.recipe, user=self.rater, stars=4)
+        RecipeStats.objects.filter(recipe=self.recipe).update(rating_count=7, rating_sum=30)
+
+        drift = RecipeStats.rebuild(commit=False)
+        self.assertEqual([recipe_id for recipe_id, _, _ in drift], [self.recipe.pk])
+        self.assertEqual(self._stats().rating_count, 7)
+
+        RecipeStats.rebuild()
+        stats = self._stats()
+        self.assertEqual(stats.rating_count, 1)
+        self.assertEqual(stats.rating_sum, 4)
+
+    def test_rebuild_command_check_raises_on_drift(self):
+        RecipeStats.objects.filter(recipe=self.recipe).delete()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_recipe_stats', '--check', stdout=StringIO())
+
+    def test_rebuild_command_restores_missing_rows(self):
+        RecipeStats.objects.filter(recipe=self.recipe).delete()
+        out = StringIO()
+        call_command('rebuild_recipe_stats', stdout=out)
+        self.assertIn('missing stats row', out.getvalue())
+        self.assertTrue(RecipeStats.objects.filter(recipe=self.recipe).exists())
@@ -0,0 +1,70 @@
+"""Unit tests for the RecipeViewBucket model (trending index)."""
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from recipes.models import User, Recipe, RecipeStats, RecipeViewBucket
+
+
+class RecipeViewBucketTest(TestCase):
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.recipe = Recipe.objects.create(
+            author=self.user,
+            title="Pancakes",
+            description="Fluffy",
+            ingredients="flour\nmilk",
+            time=15,
+            meal_type="breakfast"
+        )
+        self.now = timezone.now()
+
+    def _stats(self):
+        return RecipeStats.objects.get(recipe=self.recipe)
+
+    def test_bucket_for_rounds_down_to_bucket_size(self):
+        moment = self.now.replace(minute=27, second=45)
+        self.assertEqual(RecipeViewBucket.bucket_for(moment), moment.replace(minute=20, second=0, microsecond=0))
+
+    def test_record_views_accumulates_in_one_bucket(self):
+        RecipeViewBucket.record_views(self.recipe.pk, at=self.now)
+        RecipeViewBucket.record_views(self.recipe.pk, count=2, at=self.now)
+
+        bucket = RecipeViewBucket.objects.get(recipe=self.recipe)
+        self.assertEqual(bucket.views, 3)
+        self.assertEqual(self._stats().trending_score, 3)
+
+    def test_older_buckets_weigh_less(self):
+        earlier = self.now - timedelta(minutes=RecipeViewBucket.BUCKET_MINUTES * 3)
+        RecipeViewBucket.record_views(self.recipe.pk, count=6, at=earlier)
+        RecipeViewBucket.update_trending_scores(now=self.now)
+
+        self.assertEqual(self._stats().trending_score, 3)
+
+    def test_refresh_decays_recipes_without_recent_views(self):
+        long_ago = self.now - timedelta(hours=3)
+        RecipeViewBucket.record_views(self.recipe.pk, count=5, at=long_ago)
+        self.assertEqual(self._stats().trending_score, 5)
+
+        out = StringIO()
+        call_command('refresh_trending', stdout=out)
+
+        self.assertEqual(self._stats().trending_score, 0)
+        self.assertFalse(RecipeViewBucket.objects.exists())
+        self.assertIn('pruned 1', out.getvalue())
+
+    def test_stale_scores_do_not_count_in_queries(self):
+        RecipeViewBucket.record_views(self.recipe.pk, count=5, at=self.now - timedelta(hours=3))
+        recipe = Recipe.objects.annotate(
+            trending_score=RecipeViewBucket.trending_score_expression(now=self.now)
+        ).get(pk=self.recipe.pk)
+        self.assertEqual(recipe.trending_score, 0)
+
+    def test_new_viewer_is_recorded(self):
+        self.recipe.add_viewer(user_id=self.user.pk)
+        self.recipe.add_viewer(user_id=self.user.pk)
+        self.assertEqual(RecipeViewBucket.objects.get(recipe=self.recipe).views, 1)
@@ -1,6 +1,8 @@
 """Unit tests for Recipe model with instructions and image fields."""
+import shutil
+import tempfile
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import AnonymousUser
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
@@ -148,14 +150,18 @@ class RecipeModelCoverageTestCase(TestCase):
         self.assertEqual(self.recipe.get_diet_type_display(), "Vegetarian")
 
     def test_get_image_url_with_uploaded_image(self):
+        # keep the upload out of the project's media directory
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
         image = SimpleUploadedFile(
             "test.jpg",
             b"imagecontent",
             content_type="image/jpeg"
         )
-        self.recipe.image = image
-        self.recipe.save()
-        self.assertIsNotNone(self.recipe.get_image_url())
+        with override_settings(MEDIA_ROOT=media_root):
+            self.recipe.image = image
+            self.recipe.save()
+            self.assertIsNotNone(self.recipe.get_image_url())
 
     def test_get_ingredients_list_with_ingredients(self):
         """Test get_ingredients_list returns proper list."""
@@ -271,6 +277,34 @@ class RecipeModelCoverageTestCase(TestCase):
         meal_types = recipe.get_meal_types_list()
         self.assertEqual(meal_types, [])
 
+    def test_meal_type_mask_is_stored_on_save(self):
+        """Test that the meal type bitmask follows meal_type, also with update_fields."""
+        recipe = Recipe.objects.create(
+            author=self.user,
+            title="Brunch",
+            description="Test",
+            ingredients="flour",
+            time=20,
+            meal_type="Breakfast, lunch"
+        )
+        bits = Recipe.MEAL_TYPE_BITS
+        self.assertEqual(recipe.meal_type_mask, bits['breakfast'] | bits['lunch'])
+        self.assertEqual(recipe.get_meal_types_list(), ['breakfast', 'lunch'])
+
+        recipe.meal_type = "dessert"
+        recipe.save(update_fields=['meal_type'])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.meal_type_mask, bits['dessert'])
+
+    def test_meal_type_masks_matching(self):
+        """Test that every mask sharing a bit with the selection is matched."""
+        masks = Recipe.meal_type_masks_matching(['lunch', 'dinner'])
+        bits = Recipe.MEAL_TYPE_BITS
+        self.assertIn(bits['lunch'], masks)
+        self.assertIn(bits['breakfast'] | bits['dinner'], masks)
+        self.assertNotIn(bits['breakfast'] | bits['snack'], masks)
+        self.assertEqual(Recipe.meal_type_masks_matching(['brunch']), [])
+
     def test_get_meal_types_display_single_type(self):
         """Test get_meal_types_display with single type."""
         recipe = Recipe.objects.create(
@@ -435,4 +469,31 @@ class RecipeViewTrackingTestCase(TestCase):
             meal_type='snack'
         )
         # Empty ingredients should return vegan (line 101)
-        self.assertEqual(recipe.get_diet_type(), Recipe.DIET_VEGAN)
\ No newline at end of file
+        self.assertEqual(recipe.get_diet_type(), Recipe.DIET_VEGAN)
+
+    def test_diet_type_is_stored_on_save(self):
+        """Test that the diet class is persisted with the recipe."""
+        recipe = Recipe.objects.create(
+            author=self.user,
+            title='Bacon Sandwich',
+            description='Test',
+            ingredients='bread\nbacon',
+            time=10,
+            meal_type='breakfast'
+        )
+        self.assertEqual(
+            Recipe.objects.filter(pk=recipe.pk).values_list('diet_type', flat=True).get(),
+            Recipe.DIET_NON_VEG
+        )
+
+    def test_diet_type_follows_ingredient_changes(self):
+        """Test that editing ingredients reclassifies the recipe, also with update_fields."""
+        self.recipe.ingredients = 'flour\nhoney'
+        self.recipe.save(update_fields=['ingredients'])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.diet_type, Recipe.DIET_VEG)
+
+        self.recipe.ingredients = 'flour\nwater'
+        self.recipe.save()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.diet_type, Recipe.DIET_VEGAN)
@@ -153,6 +153,16 @@ class UserModelTestCase(TestCase):
             self._gravatar_url(size=60)
         )
 
+    def test_gravatar_hash_is_stored_on_save(self):
+        self.user.save()
+        self.assertEqual(self.user.gravatar_hash, self.GRAVATAR_URL.rsplit('/', 1)[1])
+
+        self.user.email = 'renamed@example.org'
+        self.user.save(update_fields=['email'])
+        self.user.refresh_from_db()
+        self.assertNotIn(self.user.gravatar_hash, self.GRAVATAR_URL)
+        self.assertEqual(self.user.mini_gravatar(), f"https://www.gravatar.com/avatar/{self.user.gravatar_hash}?size=60&default=mp")
+
     # ---------- Following logic ----------
 
     def test_follow_user(self):
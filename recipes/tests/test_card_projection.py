@@ -0,0 +1,70 @@
+"""Tests for the card-only recipe projection used by list pages."""
+from contextlib import contextmanager
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import models
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe, Rating
+
+
+@contextmanager
+def forbid_deferred_loads():
+    """Fail the test if any deferred field is fetched from the database."""
+    def refresh_from_db(instance, using=None, fields=None, **kwargs):
+        raise AssertionError(f"deferred field(s) {fields} loaded on {instance!r}")
+
+    with patch.object(models.Model, 'refresh_from_db', refresh_from_db):
+        yield
+
+
+class CardProjectionTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other = User.objects.get(username='@janedoe')
+        self.recipe = self._create_recipe(self.other, "Pancakes")
+        self._create_recipe(self.user, "Omelette")
+        Rating.objects.create(recipe=self.recipe, user=self.user, stars=4)
+        self.client.login(username='@johndoe', password='Password123')
+
+    def _create_recipe(self, author, title):
+        return Recipe.objects.create(
+            author=author,
+            title=title,
+            description="Fluffy and light " * 40,
+            ingredients="flour\nmilk\neggs",
+            instructions="Mix\nFry",
+            time=10,
+            meal_type="breakfast"
+        )
+
+    def test_card_queryset_leaves_text_columns_deferred(self):
+        recipe = Recipe.objects.for_cards().get(pk=self.recipe.pk)
+        deferred = recipe.get_deferred_fields()
+        self.assertTrue({'description', 'ingredients', 'instructions'} <= deferred)
+        self.assertEqual(len(recipe.get_excerpt()), Recipe.EXCERPT_LENGTH)
+        self.assertTrue(self.recipe.description.startswith(recipe.get_excerpt()))
+
+    def test_card_queryset_carries_author_and_rating(self):
+        with forbid_deferred_loads(), self.assertNumQueries(1):
+            recipe = Recipe.objects.for_cards().get(pk=self.recipe.pk)
+            self.assertEqual(recipe.author.username, '@janedoe')
+            self.assertEqual(recipe.average_rating(), 4)
+
+    def test_dashboard_renders_cards_without_deferred_loads(self):
+        with forbid_deferred_loads():
+            response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, "Pancakes")
+        self.assertContains(response, "Fluffy and light")
+
+    def test_own_profile_renders_cards_without_deferred_loads(self):
+        with forbid_deferred_loads():
+            response = self.client.get(reverse('user_profile', kwargs={'user_id': self.user.pk}))
+        self.assertContains(response, "Omelette")
@@ -0,0 +1,156 @@
+"""Tests for the materialised following feeds."""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from recipes import feed
+from recipes.feed import backfill, feed_q, push_recipe
+from recipes.follow_acceptance import accept_all
+from recipes.models import FeedEntry, Follow, FollowRequest, Recipe, User
+
+
+class FollowingFeedTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.john = User.objects.get(username='@johndoe')
+        self.jane = User.objects.get(username='@janedoe')
+        self.petra = User.objects.get(username='@petrapickles')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _recipe(self, author, title='Pie', **kwargs):
+        # the fan-out runs once the recipe is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=author, title=title, description=title, ingredients='Flour', time=30, **kwargs
+            )
+
+    def _feed(self, user):
+        return list(FeedEntry.objects.filter(user=user).order_by('-created_at', '-recipe').values_list('recipe_id', flat=True))
+
+    def test_new_recipe_is_pushed_to_followers(self):
+        Follow.objects.create(follower=self.john, following=self.jane)
+        Follow.objects.create(follower=self.petra, following=self.jane)
+
+        recipe = self._recipe(self.jane)
+
+        self.assertEqual(self._feed(self.john), [recipe.pk])
+        self.assertEqual(self._feed(self.petra), [recipe.pk])
+        self.assertEqual(FeedEntry.objects.get(user=self.john).author, self.jane)
+
+    def test_following_backfills_recent_recipes(self):
+        older = self._recipe(self.jane, title='Old')
+        newer = self._recipe(self.jane, title='New')
+        self._recipe(self.jane, title='Hidden', is_hidden=True)
+
+        Follow.objects.create(follower=self.john, following=self.jane)
+
+        self.assertEqual(self._feed(self.john), [newer.pk, older.pk])
+
+    def test_backfill_is_limited(self):
+        for i in range(3):
+            self._recipe(self.jane, title=f'Pie {i}')
+        with patch.object(feed, 'BACKFILL_RECIPES', 2):
+            backfill([self.john.pk], self.jane.pk)
+        self.assertEqual(len(self._feed(self.john)), 2)
+
+    def test_unfollowing_removes_the_authors_entries(self):
+        self._recipe(self.petra)
+        Follow.objects.create(follower=self.john, following=self.jane)
+        Follow.objects.create(follower=self.john, following=self.petra)
+        self._recipe(self.jane)
+
+        Follow.objects.filter(follower=self.john, following=self.jane).delete()
+
+        self.assertEqual(set(FeedEntry.objects.filter(user=self.john).values_list('author_id', flat=True)), {self.petra.pk})
+
+    def test_hiding_removes_and_unhiding_restores(self):
+        Follow.objects.create(follower=self.john, following=self.jane)
+        recipe = self._recipe(self.jane)
+
+        recipe.is_hidden = True
+        recipe.save()
+        self.assertEqual(self._feed(self.john), [])
+
+        recipe.is_hidden = False
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+        self.assertEqual(self._feed(self.john), [recipe.pk])
+
+    def test_fan_out_waits_for_the_commit(self):
+        Follow.objects.create(follower=self.john, following=self.jane)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(author=self.jane, title='Pie', description='Pie', ingredients='Flour', time=30)
+            self.assertEqual(self._feed(self.john), [])
+        self.assertEqual(self._feed(self.john), [recipe.pk])
+
+    def test_edits_are_not_fanned_out_again(self):
+        Follow.objects.create(follower=self.john, following=self.jane)
+        recipe = self._recipe(self.jane)
+        # an entry the edits would put back if they were pushed
+        FeedEntry.objects.filter(recipe=recipe).delete()
+
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        recipe.title = 'Better pie'
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+            Recipe.objects.get(pk=recipe.pk).save()
+
+        self.assertEqual(self._feed(self.john), [])
+
+    def test_unhiding_a_loaded_recipe_pushes_it(self):
+        Follow.objects.create(follower=self.john, following=self.jane)
+        recipe = self._recipe(self.jane, is_hidden=True)
+
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        recipe.is_hidden = False
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+
+        self.assertEqual(self._feed(self.john), [recipe.pk])
+
+    def test_push_is_idempotent(self):
+        Follow.objects.create(follower=self.john, following=self.jane)
+        recipe = self._recipe(self.jane)
+        push_recipe(recipe.pk, self.jane.pk, recipe.created_at)
+        self.assertEqual(FeedEntry.objects.filter(user=self.john).count(), 1)
+
+    def test_bulk_accepted_requests_backfill(self):
+        recipe = self._recipe(self.jane)
+        FollowRequest.objects.create(from_user=self.john, to_user=self.jane)
+
+        accept_all(self.jane.pk)
+
+        self.assertEqual(self._feed(self.john), [recipe.pk])
+
+    def test_celebrities_are_pulled_not_pushed(self):
+        Follow.objects.create(follower=self.john, following=self.jane)
+        User.objects.filter(pk=self.jane.pk).update(followers_count=feed.CELEBRITY_FOLLOWERS)
+
+        recipe = self._recipe(self.jane)
+
+        self.assertEqual(self._feed(self.john), [])
+        self.assertEqual(list(Recipe.objects.filter(feed_q(self.john))), [recipe])
+        # not followed, not pulled
+        self.assertFalse(Recipe.objects.filter(feed_q(self.petra)).exists())
+
+    def test_following_dashboard_reads_the_feed(self):
+        Follow.objects.create(follower=self.john, following=self.jane)
+        recipe = self._recipe(self.jane, title='Followed pie')
+        # a recipe the feed does not hold is not shown, however it is authored
+        FeedEntry.objects.filter(recipe=recipe).delete()
+        shown = self._recipe(self.jane, title='Fresh pie')
+        self.client.login(username=self.john.username, password='Password123')
+
+        response = self.client.get(reverse('following_dashboard'))
+
+        self.assertEqual(list(response.context['recipes']), [shown])
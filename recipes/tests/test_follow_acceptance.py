@@ -0,0 +1,164 @@
+"""Tests for accepting all pending follow requests in bulk."""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from recipes import follow_acceptance
+from recipes.follow_acceptance import accept_all, accept_backlogs, accept_pending, progress
+from recipes.models import Follow, FollowRequest, User
+from recipes.visibility import followed_author_ids
+
+
+class FollowAcceptanceTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.user.is_private = True
+        self.user.save()
+        self.others = list(User.objects.exclude(pk=self.user.pk).order_by('pk'))
+
+    def tearDown(self):
+        cache.clear()
+
+    def _request_from(self, users):
+        FollowRequest.objects.bulk_create(
+            [FollowRequest(from_user=user, to_user=self.user) for user in users]
+        )
+
+    def _make_users(self, count):
+        return User.objects.bulk_create([
+            User(username=f'@bulk{i}', email=f'bulk{i}@example.org', first_name='Bulk', last_name='User')
+            for i in range(count)
+        ])
+
+    def test_accepts_every_request_in_chunks(self):
+        self._request_from(self.others)
+
+        accepted = accept_all(self.user.pk, chunk_size=2)
+
+        self.assertEqual(accepted, len(self.others))
+        self.assertFalse(FollowRequest.objects.exists())
+        self.assertEqual(
+            set(Follow.objects.filter(following=self.user).values_list('follower_id', flat=True)),
+            {user.pk for user in self.others},
+        )
+
+    def test_updates_counters(self):
+        self._request_from(self.others)
+        # an existing follow is neither duplicated nor counted twice
+        Follow.objects.create(follower=self.others[0], following=self.user)
+
+        accept_all(self.user.pk, chunk_size=2)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.followers_count, len(self.others))
+        for user in self.others:
+            user.refresh_from_db()
+            self.assertEqual(user.following_count, 1)
+
+    def test_self_request_is_dropped(self):
+        self._request_from([self.user, self.others[0]])
+
+        accept_all(self.user.pk)
+
+        self.assertFalse(Follow.objects.filter(follower=self.user, following=self.user).exists())
+        self.assertFalse(FollowRequest.objects.exists())
+
+    def test_queries_do_not_grow_with_the_backlog(self):
+        def queries_for(count):
+            FollowRequest.objects.all().delete()
+            self._request_from(self._make_users(count) if count > len(self.others) else self.others[:count])
+            with CaptureQueriesContext(connection) as queries:
+                accept_all(self.user.pk)
+            return len(queries)
+
+        self.assertEqual(queries_for(2), queries_for(40))
+
+    @override_settings(VISIBILITY_CACHE_TIMEOUT=3600)
+    def test_invalidates_the_followers_visibility(self):
+        follower = self.others[0]
+        self._request_from([follower])
+        self.assertEqual(followed_author_ids(follower), frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            accept_all(self.user.pk)
+
+        self.assertIn(self.user.pk, followed_author_ids(follower))
+
+    def test_small_backlog_is_accepted_inline(self):
+        self._request_from(self.others)
+
+        self.assertEqual(accept_pending(self.user), (len(self.others), False))
+        self.assertFalse(FollowRequest.objects.exists())
+        self.assertIsNone(progress(self.user.pk))
+
+    @patch.object(follow_acceptance, 'BACKGROUND_THRESHOLD', 1)
+    def test_large_backlog_is_left_to_the_command(self):
+        self._request_from(self.others)
+        self.user.is_private = False
+        self.user.save()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(accept_pending(self.user), (len(self.others), True))
+        self.assertEqual(callbacks, [])
+        self.assertEqual(progress(self.user.pk), {'done': 0, 'total': len(self.others)})
+        self.assertEqual(FollowRequest.objects.count(), len(self.others))
+
+        out = StringIO()
+        call_command('accept_follow_requests', stdout=out)
+
+        self.assertIn(f'Accepted follow requests of 1 account(s), {len(self.others)} new follower(s).', out.getvalue())
+        self.assertFalse(FollowRequest.objects.exists())
+        self.assertIsNone(progress(self.user.pk))
+
+    def test_interrupted_run_is_continued_by_the_next(self):
+        self._request_from(self.others)
+        self.user.is_private = False
+        self.user.save()
+        follow_acceptance._set_progress(self.user.pk, 0, len(self.others))
+        accept_chunk = follow_acceptance._accept_chunk
+        calls = []
+
+        def crash_after_one_chunk(user_id, chunk_size):
+            calls.append(user_id)
+            if len(calls) > 1:
+                raise RuntimeError('worker restarted')
+            return accept_chunk(user_id, 1)
+
+        with patch.object(follow_acceptance, '_accept_chunk', crash_after_one_chunk):
+            with self.assertRaises(RuntimeError):
+                accept_backlogs()
+        self.assertEqual(FollowRequest.objects.count(), len(self.others) - 1)
+
+        progress_seen = []
+        with patch.object(follow_acceptance, '_set_progress', lambda *args: progress_seen.append(args[1:])):
+            self.assertEqual(accept_backlogs(), (1, len(self.others) - 1))
+        self.assertFalse(FollowRequest.objects.exists())
+        # counted on from the request accepted before
+        self.assertEqual(progress_seen[-1], (len(self.others), len(self.others)))
+
+    def test_private_accounts_are_left_alone(self):
+        self._request_from(self.others)
+        self.assertEqual(accept_backlogs(), (0, 0))
+        self.assertEqual(FollowRequest.objects.count(), len(self.others))
+
+    def test_profile_shows_progress(self):
+        self.client.login(username=self.user.username, password='Password123')
+        follow_acceptance._set_progress(self.user.pk, 500, 2000)
+
+        response = self.client.get(reverse('user_profile', kwargs={'user_id': self.user.pk}))
+
+        self.assertContains(response, 'Accepting follow requests: 500 of 2000 done.')
+        self.assertContains(response, 'width: 25%')
@@ -0,0 +1,136 @@
+"""Tests for versioned fragment caching of recipe cards and detail sections."""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from recipes.fragments import fragment_version, fragment_versions, prefetch_fragment_versions
+from recipes.models import User, Recipe, Rating, Comment
+
+
+class FragmentVersionTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(
+            author=self.other,
+            title="Pancakes",
+            description="Fluffy pancakes",
+            ingredients="flour\nmilk",
+            instructions="Mix\nFry",
+            time=10,
+            meal_type="breakfast"
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def _assert_bumps(self, change):
+        before = fragment_version(self.recipe.pk)
+        change()
+        self.assertNotEqual(fragment_version(self.recipe.pk), before)
+
+    def test_version_is_stable_until_something_changes(self):
+        self.assertEqual(fragment_version(self.recipe.pk), fragment_version(self.recipe.pk))
+
+    def test_version_bumps_on_edit_and_hide(self):
+        def edit():
+            self.recipe.title = "Crepes"
+            self.recipe.save()
+
+        def hide():
+            self.recipe.is_hidden = True
+            self.recipe.save()
+
+        self._assert_bumps(edit)
+        self._assert_bumps(hide)
+
+    def test_version_bumps_on_rating_and_comment(self):
+        self._assert_bumps(lambda: Rating.objects.create(recipe=self.recipe, user=self.user, stars=5))
+        comment = Comment.objects.create(recipe=self.recipe, user=self.user, text="Yum")
+        self._assert_bumps(comment.delete)
+
+    def test_version_bumps_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(recipe=self.recipe, user=self.user, stars=5)
+            # what a concurrent request could cache the old stars under
+            during = fragment_version(self.recipe.pk)
+        self.assertNotEqual(fragment_version(self.recipe.pk), during)
+
+    def test_missing_version_is_recreated(self):
+        before = fragment_version(self.recipe.pk)
+        cache.clear()
+        self.assertNotEqual(fragment_version(self.recipe.pk), before)
+
+    def test_prefetch_loads_versions_for_a_page(self):
+        recipes = prefetch_fragment_versions(list(Recipe.objects.all()))
+        self.assertEqual(
+            {recipe.pk: recipe.get_fragment_version() for recipe in recipes},
+            fragment_versions([self.recipe.pk]),
+        )
+
+
+class FragmentCachingTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(
+            author=self.other,
+            title="Pancakes",
+            description="Fluffy pancakes",
+            ingredients="flour\nmilk",
+            instructions="Mix\nFry",
+            time=10,
+            meal_type="breakfast"
+        )
+        self.client.login(username='@johndoe', password='Password123')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cards_render_from_cache_until_the_recipe_changes(self):
+        self.assertContains(self.client.get(reverse('dashboard')), "Fluffy pancakes")
+
+        # a write that skips the model signals is not picked up...
+        Recipe.objects.filter(pk=self.recipe.pk).update(description="Crispy waffles")
+        self.assertContains(self.client.get(reverse('dashboard')), "Fluffy pancakes")
+
+        # ...but a save bumps the version
+        self.recipe.refresh_from_db()
+        self.recipe.save()
+        self.assertContains(self.client.get(reverse('dashboard')), "Crispy waffles")
+
+    def test_cached_card_fragments_are_balanced(self):
+        from django.core.cache.utils import make_template_fragment_key
+        self.client.get(reverse('dashboard'))
+
+        version = fragment_version(self.recipe.pk)
+        for name in ('recipe_card_image', 'recipe_card_body', 'recipe_card_rating'):
+            html = cache.get(make_template_fragment_key(name, [self.recipe.pk, version]))
+            self.assertIsNotNone(html, name)
+            self.assertEqual(html.count('<div'), html.count('</div>'), name)
+
+    def test_detail_sections_follow_edits_and_ratings(self):
+        url = reverse('recipe_detail', kwargs={'pk': self.recipe.pk})
+        self.assertContains(self.client.get(url), "0.0</strong> out of 5")
+
+        self.client.post(reverse('rate_recipe', kwargs={'recipe_pk': self.recipe.pk}), {'stars': 4})
+        self.assertContains(self.client.get(url), "4.0</strong> out of 5")
+
+        self.recipe.ingredients = "oats\nwater"
+        self.recipe.save()
+        response = self.client.get(url)
+        self.assertContains(response, "oats")
+        self.assertNotContains(response, "milk")
@@ -0,0 +1,191 @@
+"""Tests for the live event stream and its in-process pub/sub."""
+import asyncio
+import json
+import threading
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from recipes import live
+from recipes.live import Broker
+from recipes.models import User, Recipe, Notification
+from recipes.viewers import add_viewer
+
+
+async def disconnect(chunks):
+    """Cancel a pending read, as the ASGI handler does when the client goes away."""
+    pending = asyncio.ensure_future(anext(chunks))
+    await asyncio.sleep(0)
+    pending.cancel()
+    try:
+        await pending
+    except asyncio.CancelledError:
+        pass
+
+
+def parse_event(chunk):
+    """The JSON payload of one SSE message."""
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    data = [line[len('data: '):] for line in chunk.splitlines() if line.startswith('data: ')]
+    return json.loads(data[0])
+
+
+class BrokerTest(SimpleTestCase):
+
+    async def test_publish_from_another_thread_reaches_subscribers(self):
+        broker = Broker()
+        subscription = broker.subscribe(['user:1'])
+        try:
+            thread = threading.Thread(target=broker.publish, args=('user:1', {'event': 'notifications', 'unread_count': 2}))
+            thread.start()
+            thread.join()
+            event = await asyncio.wait_for(subscription.get(), timeout=1)
+        finally:
+            broker.unsubscribe(subscription)
+        self.assertEqual(event['unread_count'], 2)
+
+    async def test_other_topics_are_not_delivered(self):
+        broker = Broker()
+        subscription = broker.subscribe(['user:1'])
+        broker.publish('user:2', {'event': 'notifications', 'unread_count': 1})
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.queue.empty())
+        broker.unsubscribe(subscription)
+
+    async def test_slow_subscribers_keep_the_newest_events(self):
+        broker = Broker()
+        with self.settings(LIVE_EVENTS={'QUEUE_SIZE': 2}):
+            subscription = broker.subscribe(['user:1'])
+        for count in range(5):
+            broker.publish('user:1', {'event': 'notifications', 'unread_count': count})
+        await asyncio.sleep(0)
+        self.assertEqual([(await subscription.get())['unread_count'] for _ in range(2)], [3, 4])
+        broker.unsubscribe(subscription)
+
+    async def test_poller_publishes_changes_from_other_processes(self):
+        broker = Broker()
+        with self.settings(LIVE_EVENTS={'POLL_INTERVAL': 0.01}):
+            subscription = broker.subscribe(['user:1'])
+            # what another worker's writes leave behind in the shared cache
+            cache.set('notifications:unread:1', 4)
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=1)
+            finally:
+                cache.delete('notifications:unread:1')
+                broker.unsubscribe(subscription)
+        self.assertEqual(event, {'event': 'notifications', 'unread_count': 4})
+
+    async def test_unsubscribe_forgets_the_topic(self):
+        broker = Broker()
+        subscription = broker.subscribe(['user:1', 'recipe:3'])
+        self.assertTrue(broker.has_subscribers('recipe:3'))
+        broker.unsubscribe(subscription)
+        self.assertEqual(broker.topics(), [])
+
+
+@override_settings(NOTIFICATION_CACHE_TIMEOUT=600, LIVE_EVENTS={'ENABLED': True})
+class LiveEventsTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(
+            author=self.user,
+            title="Pancakes",
+            description="desc",
+            ingredients="flour",
+            time=10,
+            meal_type="breakfast"
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_requires_login(self):
+        response = self.client.get(reverse('live_events'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_wsgi_requests_get_no_content(self):
+        # the test client is a WSGI request, which cannot hold the stream open
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('live_events'))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_disabled_stream_gets_no_content(self):
+        await self.async_client.aforce_login(self.user)
+        with self.settings(LIVE_EVENTS={'ENABLED': False}):
+            response = await self.async_client.get(reverse('live_events'))
+        self.assertEqual(response.status_code, 204)
+
+    def test_navbar_loads_the_script_only_when_enabled(self):
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse('dashboard')), 'src="/static/live_events.js"')
+        with self.settings(LIVE_EVENTS={'ENABLED': False}):
+            self.assertNotContains(self.client.get(reverse('dashboard')), 'src="/static/live_events.js"')
+
+    def test_snapshot_reads_only_the_cache(self):
+        from recipes.notification_cache import unread_count
+        unread_count(self.user.pk)
+        add_viewer(self.recipe.pk, self.other_user.pk)
+
+        with self.assertNumQueries(0):
+            events = live.snapshot([live.user_topic(self.user.pk), live.recipe_topic(self.recipe.pk)])
+
+        self.assertEqual(events[live.user_topic(self.user.pk)]['unread_count'], 0)
+        self.assertEqual(events[live.recipe_topic(self.recipe.pk)]['active_viewers'], 1)
+
+    async def test_stream_sends_state_then_pushes_notifications(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('live_events'), {'recipes': str(self.recipe.pk)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        self.assertEqual(parse_event(await anext(chunks))['unread_count'], 0)
+        self.assertEqual(parse_event(await anext(chunks))['recipe'], self.recipe.pk)
+
+        def notify():
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification.create_follow_request_notification(self.other_user, self.user)
+        await sync_to_async(notify)()
+
+        event = parse_event(await asyncio.wait_for(anext(chunks), timeout=1))
+        self.assertEqual(event['unread_count'], 1)
+        self.assertEqual(event['latest']['title'], 'New Follow Request')
+        await disconnect(chunks)
+        self.assertFalse(live.has_subscribers(live.user_topic(self.user.pk)))
+
+    async def test_new_viewers_are_pushed(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('live_events'), {'recipes': str(self.recipe.pk)})
+        chunks = response.streaming_content
+        for _ in range(3):
+            await anext(chunks)
+
+        await sync_to_async(self.recipe.add_viewer)(self.other_user.pk)
+
+        event = parse_event(await asyncio.wait_for(anext(chunks), timeout=1))
+        self.assertEqual(event, {'event': 'viewers', 'recipe': self.recipe.pk, 'active_viewers': 1})
+        await disconnect(chunks)
+
+    async def test_invisible_recipes_are_not_watched(self):
+        self.other_user.is_private = True
+        await sync_to_async(self.other_user.save)()
+        secret = await Recipe.objects.acreate(
+            author=self.other_user, title="Secret", description="desc", ingredients="flour", time=10, meal_type="lunch"
+        )
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('live_events'), {'recipes': f'{secret.pk},x'})
+        chunks = response.streaming_content
+        await anext(chunks)
+        await anext(chunks)
+
+        self.assertFalse(live.has_subscribers(live.recipe_topic(secret.pk)))
+        await disconnect(chunks)
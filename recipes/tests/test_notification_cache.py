@@ -0,0 +1,108 @@
+"""Tests for the cached navbar notification state."""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from unittest.mock import patch
+from recipes.models import User, Notification
+from recipes.notification_cache import recent_notifications, unread_count
+
+
+@override_settings(NOTIFICATION_CACHE_TIMEOUT=600)
+class NotificationCacheTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.client.login(username='@johndoe', password='Password123')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _notify(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [
+                Notification.create_follow_request_notification(self.other_user, self.user)
+                for _ in range(count)
+            ]
+
+    def test_count_is_cached(self):
+        self._notify(2)
+        self.assertEqual(unread_count(self.user.pk), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 2)
+            self.assertEqual(self.user.unread_notifications_count(), 2)
+
+    def test_factories_increment_a_cached_count(self):
+        unread_count(self.user.pk)
+        self._notify(3)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 3)
+
+    def test_uncommitted_notifications_are_not_counted(self):
+        unread_count(self.user.pk)
+        # on_commit callbacks are discarded, as on a rollback
+        with self.captureOnCommitCallbacks(execute=False):
+            Notification.create_follow_request_notification(self.other_user, self.user)
+        self.assertEqual(cache.get(f'notifications:unread:{self.user.pk}'), 0)
+
+    def test_notification_committed_during_a_recount_is_not_lost(self):
+        add = cache.add
+
+        def commit_then_add(*args, **kwargs):
+            # the count has been taken, the notification commits before it is cached
+            patched.side_effect = add
+            self._notify()
+            return add(*args, **kwargs)
+
+        with patch.object(cache, 'add', side_effect=commit_then_add) as patched:
+            self.assertEqual(unread_count(self.user.pk), 0)
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_marking_read_decrements_once(self):
+        notification, _ = self._notify(2)
+        unread_count(self.user.pk)
+        url = reverse('mark_notification_read', kwargs={'notification_id': notification.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(url)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 1)
+        self.assertEqual(Notification.objects.filter(recipient=self.user, is_read=False).count(), 1)
+
+    def test_marking_all_read_resets_the_count(self):
+        self._notify(3)
+        unread_count(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('mark_all_notifications_read'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 0)
+
+    def test_recent_notifications_are_refreshed_on_change(self):
+        first, = self._notify()
+        self.assertEqual([n['id'] for n in recent_notifications(self.user.pk)], [first.pk])
+
+        second, = self._notify()
+        self.assertEqual([n['id'] for n in recent_notifications(self.user.pk)], [second.pk, first.pk])
+
+    def test_navbar_does_not_query_notifications_when_cached(self):
+        self._notify()
+        self.client.get(reverse('notifications_list'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('search_users'))
+
+        self.assertContains(response, 'id="notification-badge"')
+        self.assertFalse([q for q in queries if 'recipes_notification' in q['sql']])
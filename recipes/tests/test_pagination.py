@@ -0,0 +1,186 @@
+"""Tests for keyset (cursor) pagination."""
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe, Rating, Notification, Comment
+from recipes.pagination import (
+    CursorPaginationMixin, CursorPaginator, InvalidCursor, decode_cursor, encode_cursor
+)
+from recipes.views.user_recipes_view import UserRecipesView
+
+
+class CursorPaginatorTest(TestCase):
+    """Tests for CursorPaginator on its own"""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        # duplicate prep times so the pk tie-breaker matters
+        self.recipes = [
+            Recipe.objects.create(
+                author=self.user,
+                title=f"Recipe {i}",
+                description="desc",
+                ingredients="water",
+                time=10 * (i % 3),
+                meal_type="lunch"
+            )
+            for i in range(7)
+        ]
+        self.ordering = ('time', '-pk')
+        self.expected = list(Recipe.objects.order_by(*self.ordering))
+
+    def _walk_forward(self, paginator):
+        seen, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            seen.extend(page.object_list)
+            if not page.has_next():
+                return seen, page
+            cursor = page.next_cursor
+
+    def test_forward_walk_visits_every_row_once_in_order(self):
+        seen, _ = self._walk_forward(CursorPaginator(Recipe.objects.all(), 3, self.ordering))
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_the_page_before(self):
+        paginator = CursorPaginator(Recipe.objects.all(), 3, self.ordering)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        self.assertTrue(second.has_previous())
+
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(back.object_list, first.object_list)
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_last_page_has_no_next(self):
+        _, last = self._walk_forward(CursorPaginator(Recipe.objects.all(), 3, self.ordering))
+        self.assertEqual(len(last), 1)
+        self.assertIsNone(last.next_cursor)
+
+    def test_count_can_be_skipped(self):
+        paginator = CursorPaginator(Recipe.objects.all(), 3, self.ordering, count=False)
+        with self.assertNumQueries(1):
+            paginator.page()
+            self.assertIsNone(paginator.count)
+
+    def test_deep_page_is_a_single_query(self):
+        paginator = CursorPaginator(Recipe.objects.all(), 3, self.ordering, count=False)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            paginator.page(cursor)
+
+    def test_cursor_round_trips_datetimes(self):
+        created = self.recipes[0].created_at
+        values, reverse = decode_cursor(encode_cursor([created, 5], reverse=True))
+        self.assertEqual(values, [created, 5])
+        self.assertTrue(reverse)
+
+    def test_garbage_and_mismatched_cursors_are_rejected(self):
+        paginator = CursorPaginator(Recipe.objects.all(), 3, self.ordering)
+        with self.assertRaises(InvalidCursor):
+            paginator.page('not-a-cursor')
+        with self.assertRaises(InvalidCursor):
+            paginator.page(encode_cursor([1]))
+
+
+class ViewCursorPaginationTest(TestCase):
+    """Tests for cursor mode in the views that paginate large lists"""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json', 'recipes/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other = User.objects.get(username='@janedoe')
+        self.client.login(username='@johndoe', password='Password123')
+        self.recipes = []
+        for i in range(11):
+            recipe = Recipe.objects.create(
+                author=self.other,
+                title=f"Recipe {i}",
+                description="desc",
+                ingredients="water",
+                time=5 + i % 4,
+                meal_type="dinner",
+                total_views=i % 3
+            )
+            self.recipes.append(recipe)
+        Rating.objects.create(recipe=self.recipes[3], user=self.user, stars=5)
+        Rating.objects.create(recipe=self.recipes[8], user=self.user, stars=2)
+
+    def _walk_dashboard(self, **params):
+        seen = []
+        response = self.client.get(reverse('dashboard'), {**params, 'cursor': ''})
+        while True:
+            page = response.context['page_obj']
+            self.assertTrue(page.is_cursor)
+            seen.extend(response.context['recipes'])
+            if not page.next_url:
+                return seen
+            response = self.client.get(reverse('dashboard') + page.next_url)
+
+    def test_dashboard_cursor_matches_offset_order_for_each_sort(self):
+        for sort in ('time', 'newest', 'most_viewed', 'popular'):
+            with self.subTest(sort=sort):
+                offset = []
+                for page in (1, 2):
+                    response = self.client.get(reverse('dashboard'), {'sort': sort, 'page': page})
+                    offset.extend(response.context['recipes'])
+                self.assertEqual(self._walk_dashboard(sort=sort), offset)
+
+    def test_dashboard_cursor_links_keep_filters(self):
+        response = self.client.get(reverse('dashboard'), {'sort': 'newest', 'meal_type': 'dinner', 'cursor': ''})
+        next_url = response.context['page_obj'].next_url
+        self.assertIn('sort=newest', next_url)
+        self.assertIn('meal_type=dinner', next_url)
+        self.assertContains(response, 'aria-label="Next"')
+
+    def test_dashboard_count_can_be_skipped(self):
+        response = self.client.get(reverse('dashboard'), {'cursor': '', 'count': '0'})
+        self.assertIsNone(response.context['paginator'].count)
+        self.assertNotContains(response, 'Showing')
+
+    def test_dashboard_invalid_cursor_shows_the_first_page(self):
+        first = self.client.get(reverse('dashboard'), {'cursor': ''})
+        response = self.client.get(reverse('dashboard'), {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['recipes']), list(first.context['recipes']))
+
+    def test_cursor_ordering_is_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CursorPaginationMixin().get_cursor_ordering()
+
+    def test_user_recipes_seek_on_cursor_ordering(self):
+        view = UserRecipesView()
+        view.setup(RequestFactory().get('/', {'cursor': ''}))
+        view.request.user = self.other
+        _, page, recipes, _ = view.paginate_queryset(view.get_queryset(), view.paginate_by)
+        self.assertTrue(page.is_cursor)
+        self.assertEqual(recipes, list(Recipe.objects.filter(author=self.other).order_by('time', 'pk')[:10]))
+
+    def test_notifications_list_cursor_mode(self):
+        for i in range(25):
+            Notification.objects.create(recipient=self.user, notification_type='general', title=f"N{i}", message="m")
+        response = self.client.get(reverse('notifications_list'), {'cursor': ''})
+        first = response.context['page_obj']
+        self.assertEqual(len(first), 20)
+
+        response = self.client.get(reverse('notifications_list') + first.next_url)
+        self.assertEqual(len(response.context['page_obj']), 5)
+        self.assertEqual(response.context['page_obj'][0].title, "N4")
+
+    def test_recipe_comments_cursor_mode(self):
+        recipe = self.recipes[0]
+        for i in range(12):
+            Comment.objects.create(recipe=recipe, user=self.user, text=f"C{i}")
+        url = reverse('recipe_detail', kwargs={'pk': recipe.pk})
+        response = self.client.get(url, {'comments_cursor': ''})
+        page = response.context['comments_page_obj']
+        self.assertEqual([c.text for c in page][:2], ["C11", "C10"])
+        self.assertIn('comments_cursor=', page.next_url)
+
+        response = self.client.get(url + page.next_url)
+        self.assertEqual([c.text for c in response.context['comments']], ["C1", "C0"])
+        self.assertEqual(response.context['comment_count'], 12)
@@ -0,0 +1,105 @@
+"""Tests for the FTS5-backed recipe search."""
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe
+from recipes.search import FTS_TABLE, build_match_query, ensure_fts_schema, search_recipes
+
+
+class RecipeSearchTest(TestCase):
+    """Tests for search_recipes and the FTS index triggers"""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.curry = self._create_recipe("Chicken Curry", "A spicy dinner", "chicken\ncurry paste\nrice")
+        self.soup = self._create_recipe("Tomato Soup", "Warming soup with a hint of curry", "tomato\nwater")
+
+    def _create_recipe(self, title, description, ingredients, meal_type="dinner"):
+        return Recipe.objects.create(
+            author=self.user,
+            title=title,
+            description=description,
+            ingredients=ingredients,
+            time=20,
+            meal_type=meal_type
+        )
+
+    def _search(self, term):
+        return list(search_recipes(Recipe.objects.all(), term).order_by('search_rank'))
+
+    def test_build_match_query_quotes_words_as_prefixes(self):
+        self.assertEqual(build_match_query('Chick "curr"!'), '"chick"* "curr"*')
+        self.assertEqual(build_match_query('  -- '), '')
+
+    def test_prefix_matching(self):
+        self.assertEqual(self._search('chick'), [self.curry])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self._search('curry tomato'), [self.soup])
+        self.assertEqual(self._search('curry beef'), [])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self._search('curry'), [self.curry, self.soup])
+
+    def test_rank_follows_the_recipe_in_a_subquery(self):
+        # the subquery aliases recipes_recipe, so the rank must not name the table
+        best = search_recipes(Recipe.objects.all(), 'curry').order_by('search_rank').values('pk')[:1]
+        self.assertEqual(list(Recipe.objects.filter(pk__in=best)), [self.curry])
+
+    def test_meal_type_is_searchable(self):
+        breakfast = self._create_recipe("Porridge", "Oats", "oats", meal_type="breakfast")
+        self.assertEqual(self._search('breakfast'), [breakfast])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.curry.title = "Lamb Stew"
+        self.curry.ingredients = "lamb"
+        self.curry.save()
+        self.assertEqual(self._search('chicken'), [])
+        self.assertEqual(self._search('stew'), [self.curry])
+
+        self.curry.delete()
+        self.assertEqual(self._search('lamb'), [])
+
+    def test_search_falls_back_for_punctuation_only_terms(self):
+        self.assertEqual(self._search('!!'), [])
+
+    def test_ensure_fts_schema_restores_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {FTS_TABLE}_ai")
+        ensure_fts_schema(connection)
+
+        pasta = self._create_recipe("Pesto Pasta", "Green", "basil")
+        self.assertEqual(self._search('pesto'), [pasta])
+
+
+class DashboardSearchRankingTest(TestCase):
+    """Tests that the dashboard orders searches by relevance"""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.chef = User.objects.create_user(
+            username='@chef',
+            email='chef@example.org',
+            password='Password123'
+        )
+        self.description_hit = Recipe.objects.create(
+            author=self.chef, title="Quick Soup", description="noodle soup with curry",
+            ingredients="noodles", time=5, meal_type="lunch"
+        )
+        self.title_hit = Recipe.objects.create(
+            author=self.chef, title="Curry Noodles", description="Slow cooked",
+            ingredients="noodles", time=50, meal_type="dinner"
+        )
+        self.client.login(username='@johndoe', password='Password123')
+
+    def test_search_without_sort_orders_by_relevance(self):
+        response = self.client.get(reverse('dashboard'), {'search': 'curry'})
+        self.assertEqual(list(response.context['recipes']), [self.title_hit, self.description_hit])
+
+    def test_explicit_sort_overrides_relevance(self):
+        response = self.client.get(reverse('dashboard'), {'search': 'curry', 'sort': 'time'})
+        self.assertEqual(list(response.context['recipes']), [self.description_hit, self.title_hit])
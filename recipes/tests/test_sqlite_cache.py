@@ -0,0 +1,95 @@
+"""Tests for the shared SQLite cache backend."""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+from django.test import SimpleTestCase
+from recipify.sqlite_cache import SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.sqlite3')
+        self.cache = self._backend()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _backend(self, **options):
+        return SQLiteCache(self.path, {'TIMEOUT': 300, 'OPTIONS': options})
+
+    def test_set_get_and_delete(self):
+        self.cache.set('recipe', {'title': 'Pancakes'})
+        self.cache.set('views', 3)
+
+        self.assertEqual(self.cache.get('recipe'), {'title': 'Pancakes'})
+        self.assertEqual(self.cache.get('views'), 3)
+        self.assertTrue(self.cache.delete('recipe'))
+        self.assertIsNone(self.cache.get('recipe'))
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+
+    def test_entries_expire(self):
+        self.cache.set('short', 1, timeout=10)
+        self.cache.set('forever', 1, timeout=None)
+
+        with patch('recipify.sqlite_cache.time.time', return_value=time.time() + 11):
+            self.assertIsNone(self.cache.get('short'))
+            self.assertFalse(self.cache.has_key('short'))
+            self.assertEqual(self.cache.get('forever'), 1)
+            # add may reuse an expired key
+            self.assertTrue(self.cache.add('short', 2))
+
+    def test_add_only_sets_missing_keys(self):
+        self.assertTrue(self.cache.add('key', 'first'))
+        self.assertFalse(self.cache.add('key', 'second'))
+        self.assertEqual(self.cache.get('key'), 'first')
+
+    def test_incr_and_decr(self):
+        self.cache.set('count', 1)
+        self.assertEqual(self.cache.incr('count', 4), 5)
+        self.assertEqual(self.cache.decr('count'), 4)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_bulk_operations(self):
+        self.cache.set_many({'a': 1, 'b': [2], 'c': 'three'})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'missing']), {'a': 1, 'b': [2]})
+
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'c': 'three'})
+
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('c'))
+
+    def test_state_is_shared_between_instances(self):
+        """Two backends on one file behave like two worker processes."""
+        other = self._backend()
+        self.cache.set('shared', 'value')
+        self.assertEqual(other.get('shared'), 'value')
+
+    def test_concurrent_incr_loses_nothing(self):
+        self.cache.set('hits', 0)
+
+        def hammer():
+            backend = self._backend()
+            for _ in range(50):
+                backend.incr('hits')
+
+        threads = [threading.Thread(target=hammer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.cache.get('hits'), 200)
+
+    def test_cull_keeps_the_cache_bounded(self):
+        cache = self._backend(MAX_ENTRIES=10, CULL_EVERY=5)
+        for i in range(30):
+            cache.set(f'key{i}', i)
+        count = cache._connection().execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        self.assertLessEqual(count, 15)
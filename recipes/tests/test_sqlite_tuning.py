@@ -0,0 +1,101 @@
+"""Tests for the SQLite connection tuning and write retries."""
+import os
+import tempfile
+from unittest.mock import Mock, patch
+from django.db import OperationalError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase
+from recipes.retry import retry_on_locked
+
+
+class SQLiteConnectionTuningTest(TestCase):
+
+    def test_init_command_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA temp_store')
+            # 2 = MEMORY
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+
+class SQLiteWriteLockTest(SimpleTestCase):
+    """Two connections to one database file, configured like the default database"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = os.path.join(directory.name, 'locks.sqlite3')
+
+    def _connect(self, alias, **options):
+        settings = {
+            **connection.settings_dict,
+            'NAME': self.name,
+            # fail fast instead of waiting out the busy timeout
+            'OPTIONS': {**connection.settings_dict['OPTIONS'], 'timeout': 0.1, **options},
+        }
+        wrapper = DatabaseWrapper(settings, alias)
+        connections[alias] = wrapper
+        self.addCleanup(wrapper.close)
+        self.addCleanup(connections.__delitem__, alias)
+        return wrapper
+
+    def _other_write(self, **options):
+        self._connect('first', **options)
+        second = self._connect('second', **options)
+        with second.cursor() as cursor:
+            cursor.execute('CREATE TABLE IF NOT EXISTS counter (value integer)')
+        with transaction.atomic(using='first'):
+            # no statement yet, only the transaction is open
+            with second.cursor() as cursor:
+                cursor.execute('INSERT INTO counter VALUES (1)')
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            self._other_write()
+
+    def test_deferred_transactions_leave_the_lock_free(self):
+        # what the IMMEDIATE mode changes: a deferred BEGIN locks nothing
+        self._other_write(transaction_mode=None)
+
+
+@patch('recipes.retry.time.sleep')
+@patch('recipes.retry.connection', Mock(in_atomic_block=False))
+class RetryOnLockedTest(SimpleTestCase):
+
+    def _write(self, side_effect):
+        mock = Mock(side_effect=side_effect)
+
+        def write():
+            return mock()
+        write.mock = mock
+        return write
+
+    def test_retries_until_the_write_succeeds(self, sleep):
+        write = self._write([OperationalError('database is locked'), OperationalError('database is locked'), 'ok'])
+
+        with patch('recipes.retry.random.uniform', return_value=1):
+            self.assertEqual(retry_on_locked(base_delay=0.05)(write)(), 'ok')
+        self.assertEqual(write.mock.call_count, 3)
+        # exponential backoff
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.05, 0.1])
+
+    def test_gives_up_after_the_last_attempt(self, sleep):
+        write = self._write(OperationalError('database is locked'))
+
+        with self.assertRaises(OperationalError):
+            retry_on_locked(attempts=3)(write)()
+        self.assertEqual(write.mock.call_count, 3)
+
+    def test_other_errors_are_not_retried(self, sleep):
+        write = self._write(OperationalError('no such table: recipes_recipe'))
+
+        with self.assertRaises(OperationalError):
+            retry_on_locked(write)()
+        self.assertEqual(write.mock.call_count, 1)
+
+    def test_no_retry_inside_an_outer_transaction(self, sleep):
+        write = self._write(OperationalError('database is locked'))
+
+        with patch('recipes.retry.connection', Mock(in_atomic_block=True)):
+            with self.assertRaises(OperationalError):
+                retry_on_locked(write)()
+        self.assertEqual(write.mock.call_count, 1)
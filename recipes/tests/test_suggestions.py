@@ -0,0 +1,121 @@
+"""Tests for the precomputed "who to follow" suggestions."""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from recipes.models import Follow, FollowSuggestion, FollowSuggestionRefresh, Rating, Recipe, User
+from recipes.suggestions import FollowGraph, refresh_all, refresh_marked, suggestions_for
+
+
+class FollowSuggestionsTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        self.john = User.objects.get(username='@johndoe')
+        self.jane = User.objects.get(username='@janedoe')
+        self.petra = User.objects.get(username='@petrapickles')
+        self.peter = User.objects.get(username='@peterpickles')
+        self.extra = User.objects.create_user(
+            username='@extra', email='extra@example.org', password='Password123',
+            first_name='Extra', last_name='User',
+        )
+
+        # john follows jane and petra; both follow peter, only jane follows extra
+        for follower, following in [
+            (self.john, self.jane), (self.john, self.petra),
+            (self.jane, self.peter), (self.petra, self.peter),
+            (self.jane, self.extra), (self.jane, self.john),
+        ]:
+            Follow.objects.create(follower=follower, following=following)
+
+    def _suggested(self, user):
+        return [
+            (suggestion.suggested, suggestion.mutual_count, suggestion.shared_recipes)
+            for suggestion in suggestions_for(user, limit=10)
+        ]
+
+    def test_graph_adjacency_arrays(self):
+        graph = FollowGraph.load()
+        following = {graph.ids[i] for i in graph.following(graph.index[self.john.pk])}
+        self.assertEqual(following, {self.jane.pk, self.petra.pk})
+        self.assertEqual(graph.mutual_counts(self.john.pk), {self.peter.pk: 2, self.extra.pk: 1})
+
+    def test_ranks_by_mutual_count(self):
+        refresh_all()
+        self.assertEqual(self._suggested(self.john), [(self.peter, 2, 0), (self.extra, 1, 0)])
+
+    def test_never_suggests_self_or_followed_accounts(self):
+        refresh_all()
+        # jane follows john, and john follows petra: petra is not suggested to jane via john
+        suggested = [suggestion.suggested for suggestion in suggestions_for(self.jane, limit=10)]
+        self.assertNotIn(self.jane, suggested)
+        self.assertNotIn(self.john, suggested)
+        self.assertNotIn(self.peter, suggested)
+        self.assertIn(self.petra, suggested)
+
+    def test_shared_highly_rated_recipes_break_ties(self):
+        recipe = Recipe.objects.create(author=self.jane, title='Pie', description='Pie', ingredients='Flour', time=30)
+        Rating.objects.create(user=self.john, recipe=recipe, stars=5)
+        Rating.objects.create(user=self.extra, recipe=recipe, stars=4)
+        Follow.objects.create(follower=self.petra, following=self.extra)
+
+        refresh_all()
+
+        self.assertEqual(self._suggested(self.john), [(self.extra, 2, 1), (self.peter, 2, 0)])
+
+    def test_following_a_suggestion_removes_it(self):
+        refresh_all()
+        Follow.objects.create(follower=self.john, following=self.peter)
+        self.assertEqual([s[0] for s in self._suggested(self.john)], [self.extra])
+
+    def test_incremental_run_refreshes_marked_users_and_their_followers(self):
+        refresh_all()
+        self.assertFalse(FollowSuggestionRefresh.objects.exists())
+
+        # petra now follows extra: petra is marked, and john (who follows petra) is affected
+        Follow.objects.create(follower=self.petra, following=self.extra)
+        self.assertEqual(list(FollowSuggestionRefresh.objects.values_list('user_id', flat=True)), [self.petra.pk])
+
+        users, _ = refresh_marked()
+
+        self.assertEqual(users, 2)
+        self.assertEqual(self._suggested(self.john), [(self.peter, 2, 0), (self.extra, 2, 0)])
+        self.assertFalse(FollowSuggestionRefresh.objects.exists())
+
+    def test_incremental_run_with_nothing_marked(self):
+        self.assertEqual(refresh_all()[0], 3)
+        self.assertEqual(refresh_marked(), (0, 0))
+
+    def test_unfollowing_everyone_clears_suggestions(self):
+        refresh_all()
+        Follow.objects.filter(follower=self.john).delete()
+        refresh_marked()
+        self.assertFalse(FollowSuggestion.objects.filter(user=self.john).exists())
+
+    def test_widget_reads_suggestions_in_one_query(self):
+        refresh_all()
+        with self.assertNumQueries(1):
+            suggestions = suggestions_for(self.john)
+            [suggestion.suggested.username for suggestion in suggestions]
+
+    def test_own_profile_shows_suggestions(self):
+        refresh_all()
+        self.client.login(username=self.john.username, password='Password123')
+
+        response = self.client.get(reverse('user_profile', kwargs={'user_id': self.john.pk}))
+
+        self.assertContains(response, 'Who to follow')
+        self.assertContains(response, 'Followed by 2 accounts you follow')
+        self.assertContains(response, reverse('follow_user', args=[self.peter.pk]))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('refresh_follow_suggestions', '--full', stdout=out)
+        self.assertIn('Refreshed follow suggestions of 3 user(s)', out.getvalue())
+        self.assertTrue(FollowSuggestion.objects.filter(user=self.john).exists())
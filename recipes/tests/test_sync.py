@@ -0,0 +1,186 @@
+"""Tests for incremental sync of the planner calendar and the notification dropdown."""
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from recipes import sync
+from recipes.models import Notification, PlannedDay, PlannedMeal, Recipe, SyncTombstone, User
+
+
+class SyncTestCase(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.client.login(username='@johndoe', password='Password123')
+        self.recipe = Recipe.objects.create(
+            author=self.user, title='Omelette', description='Eggs', ingredients='Eggs', time=10,
+        )
+        self.day = PlannedDay.objects.create(user=self.user, date=date.today())
+
+    def tearDown(self):
+        cache.clear()
+
+    def _plan(self, meal_type='lunch'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return PlannedMeal.objects.create(planned_day=self.day, meal_type=meal_type, recipe=self.recipe)
+
+    def _events(self, **params):
+        return self.client.get(reverse('planner_events'), params)
+
+
+class CursorTest(SyncTestCase):
+
+    def test_cursor_round_trip(self):
+        moment = timezone.now()
+        self.assertEqual(sync.decode_cursor(sync.encode_cursor(moment)), moment)
+
+    def test_invalid_or_expired_cursor_resets(self):
+        self.assertEqual(sync.changes_since('junk'), (None, True))
+        expired = timezone.now() - SyncTombstone.RETENTION - timedelta(days=1)
+        self.assertEqual(sync.changes_since(sync.encode_cursor(expired)), (None, True))
+
+    def test_since_overlaps_the_cursor(self):
+        moment = timezone.now()
+        since, reset = sync.changes_since(sync.encode_cursor(moment))
+        self.assertFalse(reset)
+        self.assertEqual(since, moment - sync.OVERLAP)
+
+
+class PlannerEventsSyncTest(SyncTestCase):
+
+    def test_full_read_keeps_the_fullcalendar_list(self):
+        meal = self._plan()
+        response = self._events()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Sync-Cursor', response)
+        event, = response.json()
+        self.assertEqual(event['id'], meal.pk)
+        self.assertEqual(event['url'], reverse('planner_day', args=[date.today().isoformat()]))
+
+    def test_unchanged_planner_is_not_modified(self):
+        self._plan()
+        etag = self._events()['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('planner_events'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in queries if 'planned' in q['sql'].lower()])
+
+    def test_changes_give_a_new_etag(self):
+        etag = self._events()['ETag']
+        self._plan()
+        response = self.client.get(reverse('planner_events'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_since_returns_only_changes_and_deletions(self):
+        old = self._plan('lunch')
+        removed = self._plan('dinner')
+        cursor = self._events()['X-Sync-Cursor']
+        PlannedMeal.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+
+        added = self._plan('snack')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('remove_from_planner', args=[removed.pk]))
+
+        data = self._events(since=cursor).json()
+        self.assertEqual([event['id'] for event in data['events']], [added.pk])
+        self.assertEqual(data['deleted'], [removed.pk])
+        self.assertFalse(data['reset'])
+        self.assertTrue(data['cursor'])
+
+    def test_renamed_recipe_resends_its_meals(self):
+        meal = self._plan()
+        PlannedMeal.objects.filter(pk=meal.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        cursor = self._events()['X-Sync-Cursor']
+        self.recipe.title = 'Frittata'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.save()
+        event, = self._events(since=cursor).json()['events']
+        self.assertEqual(event['title'], 'Lunch: Frittata')
+
+    def test_deleted_day_leaves_tombstones(self):
+        meal = self._plan()
+        self.day.delete()
+        self.assertTrue(
+            SyncTombstone.objects.filter(user_id=self.user.pk, kind=SyncTombstone.PLANNED_MEAL, object_id=meal.pk).exists()
+        )
+
+    def test_expired_cursor_returns_everything(self):
+        self._plan()
+        expired = sync.encode_cursor(timezone.now() - SyncTombstone.RETENTION - timedelta(days=1))
+        data = self._events(since=expired).json()
+        self.assertTrue(data['reset'])
+        self.assertEqual(len(data['events']), 1)
+
+
+class NotificationsDropdownSyncTest(SyncTestCase):
+
+    def _notify(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.create_follow_request_notification(self.other_user, self.user)
+
+    def _dropdown(self, **extra):
+        return self.client.get(reverse('notifications_dropdown'), **extra)
+
+    def test_unchanged_dropdown_is_not_modified(self):
+        self._notify()
+        etag = self._dropdown()['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self._dropdown(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in queries if 'notification' in q['sql'].lower()])
+
+    def test_marking_read_changes_the_etag_and_the_delta(self):
+        notification = self._notify()
+        response = self._dropdown()
+        etag, cursor = response['ETag'], response.json()['cursor']
+        Notification.objects.filter(pk=notification.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('mark_all_notifications_read'))
+
+        response = self._dropdown(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        data = self.client.get(reverse('notifications_dropdown'), {'since': cursor}).json()
+        self.assertEqual([(n['id'], n['is_read']) for n in data['notifications']], [(notification.pk, True)])
+        self.assertEqual(data['deleted'], [])
+
+    def test_bulk_created_notifications_change_the_etag(self):
+        etag = self._dropdown()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.create_many([Notification.create_warning_notification(self.user, 'spam', commit=False)])
+        self.assertEqual(self._dropdown(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleted_notifications_are_reported(self):
+        notification = self._notify()
+        notification_id = notification.pk
+        cursor = self._dropdown().json()['cursor']
+        notification.delete()
+        data = self.client.get(reverse('notifications_dropdown'), {'since': cursor}).json()
+        self.assertEqual(data['deleted'], [notification_id])
+
+
+class PruneSyncTombstonesTest(SyncTestCase):
+
+    def test_prunes_expired_tombstones(self):
+        SyncTombstone.objects.create(
+            user_id=self.user.pk, kind=SyncTombstone.NOTIFICATION, object_id=1,
+            deleted_at=timezone.now() - SyncTombstone.RETENTION - timedelta(days=1),
+        )
+        kept = SyncTombstone.objects.create(user_id=self.user.pk, kind=SyncTombstone.NOTIFICATION, object_id=2)
+        call_command('prune_sync_tombstones', stdout=StringIO())
+        self.assertEqual(list(SyncTombstone.objects.values_list('pk', flat=True)), [kept.pk])
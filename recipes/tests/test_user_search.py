@@ -0,0 +1,79 @@
+"""Tests for the typeahead user search."""
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from recipes import user_search
+from recipes.models import User
+from recipes.user_search import matching_users, normalize, search
+
+
+class UserSearchTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.john = User.objects.get(username='@johndoe')
+        self.jane = User.objects.get(username='@janedoe')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _usernames(self, rows):
+        return [row['username'] for row in rows]
+
+    def test_normalize(self):
+        self.assertEqual(normalize('  @JaNe '), 'jane')
+
+    def test_matches_name_prefixes_only(self):
+        self.assertIn(self.jane, matching_users(User.objects.all(), '@Jan'))
+        self.assertIn(self.jane, matching_users(User.objects.all(), 'do'))
+        # a substring that starts none of the names
+        self.assertNotIn(self.jane, matching_users(User.objects.all(), 'nedoe'))
+
+    def test_full_result_page_needs_no_count_query(self):
+        with self.assertNumQueries(1):
+            rows, count, capped = search('jane', self.john)
+        self.assertEqual((self._usernames(rows), count, capped), (['@janedoe'], 1, False))
+
+    def test_count_is_capped(self):
+        with patch.object(user_search, 'RESULT_LIMIT', 1), patch.object(user_search, 'COUNT_CAP', 2):
+            rows, count, capped = search('', self.john)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((count, capped), (2, True))
+
+    @override_settings(USER_SEARCH_CACHE_TIMEOUT=30)
+    def test_popular_prefixes_are_cached_for_everyone(self):
+        rows, count, _ = search('p', self.john)
+        self.assertEqual(count, 2)
+
+        with self.assertNumQueries(0):
+            rows, count, _ = search('P', self.jane)
+        self.assertEqual(count, 2)
+
+        # the searching user is left out of the shared results
+        petra = User.objects.get(username='@petrapickles')
+        with self.assertNumQueries(0):
+            rows, count, _ = search('p', petra)
+        self.assertNotIn('@petrapickles', self._usernames(rows))
+        self.assertEqual(count, 1)
+
+    @override_settings(USER_SEARCH_CACHE_TIMEOUT=30)
+    def test_longer_queries_are_not_cached(self):
+        search('janed', self.john)
+        with self.assertNumQueries(1):
+            search('janed', self.john)
+
+    def test_ajax_reports_capped_count(self):
+        self.client.login(username=self.john.username, password='Password123')
+        with patch.object(user_search, 'COUNT_CAP', 1):
+            data = json.loads(self.client.get(reverse('search_users_ajax'), {'q': 'p'}).content)
+        self.assertEqual((data['count'], data['count_capped']), (1, True))
+        self.assertEqual(len(data['users']), 2)
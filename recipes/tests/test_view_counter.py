@@ -0,0 +1,127 @@
+"""Tests for the write-behind recipe view counter."""
+from io import StringIO
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from recipes import view_counter
+from recipes.models import User, Recipe, RecipeViewBucket
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=60)
+@patch('recipes.view_counter._ensure_flusher')
+class ViewCounterTest(TestCase):
+    """Views are buffered in the cache until flushed"""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.recipe = self._create_recipe("Pancakes")
+
+    def tearDown(self):
+        cache.clear()
+
+    def _create_recipe(self, title):
+        return Recipe.objects.create(
+            author=self.user,
+            title=title,
+            description="desc",
+            ingredients="flour",
+            time=10,
+            meal_type="breakfast"
+        )
+
+    def _views(self, recipe):
+        recipe.refresh_from_db()
+        return recipe.total_views
+
+    def test_views_are_buffered_until_flush(self, ensure_flusher):
+        self.recipe.add_viewer(user_id=1)
+        self.recipe.add_viewer(user_id=2)
+
+        self.assertEqual(self.recipe.total_views, 2)
+        self.assertEqual(self._views(self.recipe), 0)
+        self.assertEqual(view_counter.pending_views(self.recipe.pk), 2)
+        ensure_flusher.assert_called()
+
+        self.assertEqual(view_counter.flush(), 2)
+        self.assertEqual(self._views(self.recipe), 2)
+        self.assertIsNotNone(self.recipe.last_viewed_at)
+        self.assertEqual(view_counter.pending_views(self.recipe.pk), 0)
+        self.assertEqual(RecipeViewBucket.objects.get(recipe=self.recipe).views, 2)
+
+    def test_flush_batches_several_recipes(self, ensure_flusher):
+        other = self._create_recipe("Waffles")
+        for _ in range(3):
+            view_counter.record_view(self.recipe.pk)
+        view_counter.record_view(other.pk)
+
+        self.assertEqual(view_counter.flush(), 4)
+        self.assertEqual(self._views(self.recipe), 3)
+        self.assertEqual(self._views(other), 1)
+        self.assertEqual(view_counter.flush(), 0)
+
+    def test_views_after_a_flush_are_picked_up_by_the_next(self, ensure_flusher):
+        view_counter.record_view(self.recipe.pk)
+        view_counter.flush()
+        view_counter.record_view(self.recipe.pk)
+        view_counter.record_view(self.recipe.pk)
+
+        self.assertEqual(view_counter.flush(), 2)
+        self.assertEqual(self._views(self.recipe), 3)
+
+    def test_views_of_deleted_recipes_do_not_block_the_batch(self, ensure_flusher):
+        doomed = self._create_recipe("Doomed")
+        view_counter.record_view(doomed.pk)
+        view_counter.record_view(self.recipe.pk)
+        doomed.delete()
+
+        self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(self._views(self.recipe), 1)
+
+    def test_shutdown_flushes_pending_views(self, ensure_flusher):
+        view_counter.record_view(self.recipe.pk)
+        view_counter._shutdown()
+        self.assertEqual(self._views(self.recipe), 1)
+
+    def test_management_command_flushes(self, ensure_flusher):
+        view_counter.record_view(self.recipe.pk)
+        out = StringIO()
+        call_command('flush_view_counts', stdout=out)
+
+        self.assertIn('Flushed 1 buffered view(s).', out.getvalue())
+        self.assertEqual(self._views(self.recipe), 1)
+
+    def test_log_entry_written_after_a_flush_is_read_by_the_next(self, ensure_flusher):
+        other = self._create_recipe("Waffles")
+        # a view of self.recipe has taken log entry 1 but not written it yet
+        cache.set(view_counter.COUNT_KEY.format(self.recipe.pk), 1)
+        seq = view_counter.incr(view_counter.LOG_HEAD_KEY)
+        view_counter.record_view(other.pk)
+
+        self.assertEqual(view_counter.flush(), 0)
+
+        cache.set(view_counter.LOG_KEY.format(seq), self.recipe.pk)
+        self.assertEqual(view_counter.flush(), 2)
+        self.assertEqual(self._views(self.recipe), 1)
+        self.assertEqual(self._views(other), 1)
+
+    def test_log_entry_missing_for_too_long_is_skipped(self, ensure_flusher):
+        view_counter.incr(view_counter.LOG_HEAD_KEY)
+        view_counter.record_view(self.recipe.pk)
+
+        self.assertEqual(view_counter.flush(), 0)
+        with patch.object(view_counter, 'LOG_GAP_TIMEOUT', -1):
+            self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(self._views(self.recipe), 1)
+
+    def test_log_restarts_when_the_head_is_behind_the_tail(self, ensure_flusher):
+        cache.set(view_counter.LOG_TAIL_KEY, 100, None)
+        view_counter.record_view(self.recipe.pk)
+
+        self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(self._views(self.recipe), 1)
+        view_counter.record_view(self.recipe.pk)
+        self.assertEqual(view_counter.flush(), 1)
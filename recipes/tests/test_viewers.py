@@ -0,0 +1,86 @@
+"""Tests for the sliding-window active viewer tracker."""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from recipes import viewers
+from recipes.models import User, Recipe
+
+
+class ActiveViewerTrackerTest(TestCase):
+    """Tests for add_viewer / active_viewer_counts"""
+
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000 * viewers.SLICE_SECONDS
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_new_viewers_are_counted_once(self):
+        self.assertTrue(viewers.add_viewer(1, 'a', now=self.now))
+        self.assertFalse(viewers.add_viewer(1, 'a', now=self.now + 1))
+        self.assertTrue(viewers.add_viewer(1, 'b', now=self.now + 2))
+
+        self.assertEqual(viewers.active_viewers(1, now=self.now + 3), 2)
+
+    def test_returning_viewer_moves_slices_without_double_counting(self):
+        viewers.add_viewer(1, 'a', now=self.now)
+        later = self.now + 2 * viewers.SLICE_SECONDS
+
+        self.assertFalse(viewers.add_viewer(1, 'a', now=later))
+        self.assertEqual(viewers.active_viewers(1, now=later), 1)
+
+    def test_viewers_expire_individually(self):
+        viewers.add_viewer(1, 'stale', now=self.now)
+        steady = self.now
+        # 'steady' keeps coming back, 'stale' never does
+        for _ in range(viewers.WINDOW_SLICES + 1):
+            viewers.add_viewer(1, 'steady', now=steady)
+            steady += viewers.SLICE_SECONDS
+
+        self.assertEqual(viewers.active_viewers(1, now=steady - viewers.SLICE_SECONDS), 1)
+
+    def test_viewer_returning_after_the_window_counts_as_new(self):
+        viewers.add_viewer(1, 'a', now=self.now)
+        self.assertTrue(viewers.add_viewer(1, 'a', now=self.now + viewers.WINDOW_SECONDS))
+
+    def test_bulk_counts(self):
+        viewers.add_viewer(1, 'a', now=self.now)
+        viewers.add_viewer(1, 'b', now=self.now)
+        viewers.add_viewer(2, 'a', now=self.now)
+
+        self.assertEqual(viewers.active_viewer_counts([1, 2, 3], now=self.now), {1: 2, 2: 1, 3: 0})
+
+
+class TrendingBadgeTest(TestCase):
+    """List pages show the badge from one bulk lookup"""
+
+    fixtures = ['recipes/tests/fixtures/default_user.json', 'recipes/tests/fixtures/other_users.json']
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.other = User.objects.get(username='@janedoe')
+        self.hot = Recipe.objects.create(
+            author=self.other, title="Hot", description="d", ingredients="water", time=5, meal_type="lunch"
+        )
+        self.cold = Recipe.objects.create(
+            author=self.other, title="Cold", description="d", ingredients="water", time=6, meal_type="lunch"
+        )
+        for viewer in ('a', 'b', 'c'):
+            self.hot.add_viewer(viewer)
+        self.client.login(username='@johndoe', password='Password123')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_dashboard_prefetches_viewer_counts(self):
+        response = self.client.get(reverse('dashboard'))
+        counts = {r.pk: r._active_viewers for r in response.context['recipes']}
+        self.assertEqual(counts[self.hot.pk], 3)
+        self.assertEqual(counts[self.cold.pk], 0)
+        self.assertContains(response, 'Trending - 3 viewing now')
+
+    def test_profile_prefetches_viewer_counts(self):
+        response = self.client.get(reverse('user_profile', kwargs={'user_id': self.other.pk}))
+        self.assertContains(response, 'Trending - 3 viewing now', count=1)
@@ -0,0 +1,103 @@
+"""Tests for the cached recipe visibility predicate."""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from unittest.mock import patch
+from recipes import visibility
+from recipes.models import User, Recipe, Follow, FollowRequest
+from recipes.visibility import hidden_author_ids, visible_recipes_for
+
+
+@override_settings(VISIBILITY_CACHE_TIMEOUT=3600)
+class VisibilityTest(TestCase):
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.private = User.objects.get(username='@janedoe')
+        self.private.is_private = True
+        self.private.save()
+        self.public = User.objects.get(username='@petrapickles')
+
+        self.own_recipe = self._create_recipe(self.user, "Own")
+        self.private_recipe = self._create_recipe(self.private, "Private")
+        self.public_recipe = self._create_recipe(self.public, "Public")
+
+    def tearDown(self):
+        cache.clear()
+
+    def _create_recipe(self, author, title):
+        return Recipe.objects.create(
+            author=author,
+            title=title,
+            description="desc",
+            ingredients="flour",
+            time=10,
+            meal_type="lunch"
+        )
+
+    def _visible(self, user):
+        return set(visible_recipes_for(user).values_list('title', flat=True))
+
+    def test_own_and_public_recipes_are_visible(self):
+        self.assertEqual(self._visible(self.user), {"Own", "Public"})
+
+    def test_anonymous_users_only_see_public_authors(self):
+        from django.contrib.auth.models import AnonymousUser
+        self.assertEqual(self._visible(AnonymousUser()), {"Own", "Public"})
+
+    def test_predicate_is_join_free_without_distinct(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(visible_recipes_for(self.user))
+        sql = queries[-1]['sql'].upper()
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('DISTINCT', sql)
+
+    def test_many_hidden_authors_become_a_subquery(self):
+        from django.contrib.auth.models import AnonymousUser
+        other_private = User.objects.get(username='@peterpickles')
+        other_private.is_private = True
+        other_private.save()
+        self._create_recipe(other_private, "Other private")
+        Follow.objects.create(follower=self.user, following=self.private)
+
+        with patch.object(visibility, 'INLINE_IDS_LIMIT', 0):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self._visible(self.user), {"Own", "Private", "Public"})
+            self.assertEqual(self._visible(AnonymousUser()), {"Own", "Public"})
+        sql = queries[-1]['sql'].upper()
+        self.assertIn('FROM "RECIPES_FOLLOW"', sql)
+        self.assertNotIn('JOIN', sql)
+
+    def test_author_sets_are_cached(self):
+        hidden_author_ids(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(hidden_author_ids(self.user), {self.private.pk})
+
+    def test_follow_and_unfollow_invalidate(self):
+        self._visible(self.user)
+        follow = Follow.objects.create(follower=self.user, following=self.private)
+        self.assertIn("Private", self._visible(self.user))
+
+        follow.delete()
+        self.assertNotIn("Private", self._visible(self.user))
+
+    def test_accepting_a_follow_request_invalidates(self):
+        self._visible(self.user)
+        follow_request = FollowRequest.objects.create(from_user=self.user, to_user=self.private)
+        self.client.login(username='@janedoe', password='Password123')
+        self.client.post(reverse('accept_follow_request', kwargs={'request_id': follow_request.pk}))
+        self.assertIn("Private", self._visible(self.user))
+
+    def test_privacy_change_invalidates(self):
+        self._visible(self.user)
+        self.public.is_private = True
+        self.public.save()
+        self.assertEqual(self._visible(self.user), {"Own"})
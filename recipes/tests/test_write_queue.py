@@ -0,0 +1,140 @@
+"""Tests for the single-writer database write queue."""
+import threading
+from unittest.mock import patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from recipes import write_queue
+from recipes.models import User, Recipe, Notification
+from recipes.write_queue import WriteQueue, _Job
+
+
+class WriteQueueBatchTest(TestCase):
+    """The writer commits queued writes in one transaction"""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other = User.objects.get(username='@janedoe')
+        self.recipe = Recipe.objects.create(
+            author=self.user,
+            title="Pancakes",
+            description="desc",
+            ingredients="flour",
+            time=10,
+            meal_type="breakfast"
+        )
+        self.queue = WriteQueue()
+
+    def _job(self, func, *args):
+        return _Job(func, args, {}, batched=True)
+
+    def test_batch_is_written_in_one_transaction(self):
+        # report notifications, comment notifications on one recipe would be merged
+        jobs = [self._job(Notification.create_report_received_notification, self.user) for _ in range(3)]
+
+        with patch('recipes.write_queue.transaction.atomic', wraps=write_queue.transaction.atomic) as atomic:
+            self.queue._process(jobs)
+
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 3)
+        # one outer transaction plus a savepoint per write
+        self.assertEqual(atomic.call_count, 4)
+        self.assertEqual(self.queue.batches, 1)
+        self.assertEqual(self.queue.processed, 3)
+
+    def test_failing_write_does_not_undo_the_batch(self):
+        def broken():
+            raise ValueError("boom")
+
+        jobs = [
+            self._job(Notification.create_comment_notification, self.other, self.recipe),
+            self._job(broken),
+            self._job(Notification.create_report_received_notification, self.other),
+        ]
+        with self.assertLogs('recipes.write_queue', 'ERROR'):
+            self.queue._process(jobs)
+
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(self.queue.processed, 2)
+        self.assertEqual(self.queue.failed, 1)
+
+    def test_notifications_are_written_inline_when_disabled(self):
+        self.client.login(username='@janedoe', password='Password123')
+        self.client.post(reverse('add_comment', kwargs={'recipe_pk': self.recipe.pk}), {'text': 'Lovely'})
+        self.assertTrue(Notification.objects.filter(recipient=self.user).exists())
+
+
+class WriteQueueThreadTest(SimpleTestCase):
+    """Writes that need no database exercise the writer thread itself"""
+
+    def test_writer_drains_queue_and_reports_metrics(self):
+        done = []
+        queue = WriteQueue(max_batch_delay=0.01)
+        for i in range(5):
+            queue.put(_Job(done.append, (i,), {}, batched=False))
+        queue.drain(timeout=5)
+
+        self.assertEqual(done, [0, 1, 2, 3, 4])
+        metrics = queue.metrics()
+        self.assertEqual(metrics['depth'], 0)
+        self.assertEqual(metrics['processed'], 5)
+        self.assertTrue(metrics['writer_alive'])
+        self.assertGreaterEqual(metrics['max_lag'], 0)
+
+        queue.shutdown(timeout=5)
+        self.assertFalse(queue.metrics()['writer_alive'])
+        # after shutdown writes still happen, inline
+        queue.put(_Job(done.append, (5,), {}, batched=False))
+        self.assertEqual(done[-1], 5)
+
+    def test_full_queue_runs_write_inline(self):
+        done = []
+        queue = WriteQueue(max_size=1)
+        with patch.object(queue, '_ensure_writer'):
+            queue.put(_Job(done.append, ('queued',), {}, batched=False))
+            with self.assertLogs('recipes.write_queue', 'WARNING'):
+                queue.put(_Job(done.append, ('inline',), {}, batched=False))
+        self.assertEqual(done, ['inline'])
+
+        queue.drain()
+        self.assertEqual(done, ['inline', 'queued'])
+
+    @override_settings(WRITE_QUEUE={'ENABLED': True})
+    def test_enqueue_hands_write_to_writer_thread(self):
+        thread_names = []
+        queue = WriteQueue(max_batch_delay=0.01)
+
+        def record():
+            thread_names.append(threading.current_thread().name)
+
+        with patch('recipes.write_queue.get_queue', return_value=queue):
+            write_queue.enqueue_unbatched(record)
+            queue.drain(timeout=5)
+        queue.shutdown(timeout=5)
+        self.assertEqual(thread_names, ['recipes-db-writer'])
+
+
+class WriteQueueMetricsViewTest(TestCase):
+
+    fixtures = ['recipes/tests/fixtures/default_user.json']
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.url = reverse('write_queue_metrics')
+
+    def test_staff_get_metrics(self):
+        self.user.is_staff = True
+        self.user.save()
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('depth', response.json())
+        self.assertIn('max_lag', response.json())
+
+    def test_non_staff_are_redirected(self):
+        self.client.login(username='@johndoe', password='Password123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
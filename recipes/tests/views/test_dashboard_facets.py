@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from recipes.models import User, Recipe, Rating
+from recipes.views import DashboardView
+from recipes.visibility import hidden_author_ids
+
+
+class DashboardFacetCountsTestCase(TestCase):
+    """Tests for the sidebar facet counts on the dashboard."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.get(username='@johndoe')
+        self.chef = User.objects.create_user(
+            username='@chef',
+            email='chef@example.com',
+            password='Password123'
+        )
+        self.brunch = self._create_recipe("Brunch", "eggs", 15, "breakfast,lunch")
+        self.salad = self._create_recipe("Salad", "lettuce", 10, "lunch")
+        self.stew = self._create_recipe("Stew", "beef", 120, "dinner")
+        Rating.objects.create(recipe=self.salad, user=self.user, stars=5)
+        self.client.login(username='@johndoe', password='Password123')
+
+    def tearDown(self):
+        cache.clear()
+
+    def _create_recipe(self, title, ingredients, time, meal_type):
+        return Recipe.objects.create(
+            author=self.chef,
+            title=title,
+            description="desc",
+            ingredients=ingredients,
+            time=time,
+            meal_type=meal_type
+        )
+
+    def _facets(self, params=None):
+        return self.client.get(reverse("dashboard"), params or {}).context["facet_counts"]
+
+    def test_counts_every_option_without_filters(self):
+        facets = self._facets()
+        self.assertEqual(facets["meal_type"]["lunch"], 2)
+        self.assertEqual(facets["meal_type"]["breakfast"], 1)
+        self.assertEqual(facets["meal_type"]["snack"], 0)
+        self.assertEqual(facets["time"]["under_20"], 2)
+        self.assertEqual(facets["time"]["over_90"], 1)
+        self.assertEqual(facets["diet"]["non_veg"], 2)
+        self.assertEqual(facets["rating"]["4_plus"], 1)
+
+    def test_other_facets_filters_apply_but_not_the_own_facet(self):
+        facets = self._facets({"meal_types": ["lunch"], "diet": "vegan"})
+        # meal type options are counted among vegan recipes only
+        self.assertEqual(facets["meal_type"]["lunch"], 1)
+        self.assertEqual(facets["meal_type"]["breakfast"], 0)
+        # diet options are counted among lunch recipes, whatever diet is picked
+        self.assertEqual(facets["diet"]["non_veg"], 1)
+        self.assertEqual(facets["diet"]["vegan"], 1)
+
+    @override_settings(VISIBILITY_CACHE_TIMEOUT=3600)
+    def test_counts_come_from_one_query_and_are_cached(self):
+        view = DashboardView()
+        view.request = RequestFactory().get(reverse("dashboard"), {"diet": "vegan"})
+        view.request.user = self.user
+        # the cached visibility sets are loaded once, outside the count
+        hidden_author_ids(self.user)
+
+        with self.assertNumQueries(1):
+            facets = view.get_facet_counts()
+        with self.assertNumQueries(0):
+            self.assertEqual(view.get_facet_counts(), facets)
+
+    def test_counts_are_cached_per_filter_state(self):
+        self._facets({"meal_types": ["lunch"]})
+        self._create_recipe("Soup", "water", 10, "lunch")
+
+        # same state, even with a different sort or page: cached
+        self.assertEqual(self._facets({"meal_types": ["lunch"], "sort": "newest"})["meal_type"]["lunch"], 2)
+        # different state: counted afresh
+        self.assertEqual(self._facets({"meal_types": ["dinner"]})["meal_type"]["lunch"], 3)
+
+    def test_sidebar_shows_counts(self):
+        response = self.client.get(reverse("dashboard"))
+        self.assertContains(response, 'Lunch <span class="text-muted small">(2)</span>', html=False)
@@ -1,7 +1,9 @@
-from django.test import TestCase
+from django.test import TestCase, RequestFactory
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
 from recipes.models import Recipe, Rating
+from recipes.views import DashboardView
 
 User = get_user_model()
 
@@ -58,6 +60,24 @@ class DashboardFilterTests(TestCase):
         self.assertIn("breakfast", selected)
         self.assertIn("lunch", selected)
 
+    def test_filter_matches_recipes_with_several_meal_types(self):
+        """Test that a recipe stored as breakfast,lunch matches either type."""
+        self._create_recipe("Brunch Dish", "Eggs", meal_type="breakfast,lunch")
+        self._create_recipe("Dinner Dish", "Rice", meal_type="dinner")
+
+        response = self.client.get(reverse("dashboard"), {"meal_types": ["lunch", "snack"]})
+
+        self.assertContains(response, "Brunch Dish")
+        self.assertNotContains(response, "Dinner Dish")
+
+    def test_filter_by_meal_type_uses_mask_index(self):
+        """Test that the meal type filter is an IN on the indexed mask, not string matching."""
+        view = DashboardView()
+        view.request = RequestFactory().get(reverse("dashboard"), {"meal_types": ["breakfast", "dinner"]})
+        sql = str(view.filter_by_meal_types(Recipe.objects.all()).query)
+        self.assertIn('"meal_type_mask" IN', sql)
+        self.assertNotIn('LIKE', sql)
+
     # Search Filter Tests
     def test_filter_by_search(self):
         """Test search functionality."""
@@ -99,6 +119,14 @@ class DashboardFilterTests(TestCase):
         self.assertContains(response, "Beef Steak")
         self.assertNotContains(response, "Garden Salad")
 
+    def test_filter_by_diet_keeps_queryset_lazy(self):
+        """Test that the diet filter is applied in SQL rather than on a list."""
+        self._create_recipe("Beef Steak", "beef, salt", time=30, meal_type="dinner")
+
+        response = self.client.get(reverse("dashboard"), {"diet": "non_veg"})
+
+        self.assertIsInstance(response.context["paginator"].object_list, QuerySet)
+
     # Rating Filter Tests
     def test_filter_by_rating_4_plus(self):
         """Test filtering by 4+ star rating."""
@@ -24,21 +24,23 @@ class DashboardFollowingViewTests(TestCase):
             following=self.followed_user
         )
 
-        Recipe.objects.create(
-            title='Apple Pie',
-            description='test description',
-            ingredients='test ingredients',
-            time=50,
-            meal_type='dessert',
-            author=self.followed_user)
-
-        Recipe.objects.create(
-            title='Spaghetti Bolognese',
-            description='test description',
-            ingredients='test ingredients',
-            time=20,
-            meal_type='dinner',
-            author=self.not_followed_user)
+        # followers' feeds are filled once the recipe is committed (recipes.feed)
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.create(
+                title='Apple Pie',
+                description='test description',
+                ingredients='test ingredients',
+                time=50,
+                meal_type='dessert',
+                author=self.followed_user)
+
+            Recipe.objects.create(
+                title='Spaghetti Bolognese',
+                description='test description',
+                ingredients='test ingredients',
+                time=20,
+                meal_type='dinner',
+                author=self.not_followed_user)
 
     def test_following_dashboard_url(self):
         self.assertEqual(self.url,'/dashboard/following/')
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from recipes.models import User, Recipe
@@ -74,3 +75,17 @@ class DashboardSortingTestCase(TestCase):
         recipes = list(response.context['recipes'])
         self.assertIn(self.quick_recipe, recipes)
         self.assertIn(self.most_viewed_recipe, recipes)
+
+    def test_sort_by_trending_uses_recent_view_buckets(self):
+        cache.clear()
+        self.quick_recipe.add_viewer(user_id=1)
+        self.quick_recipe.add_viewer(user_id=2)
+        self.most_viewed_recipe.add_viewer(user_id=1)
+        self.client.login(username='@johndoe', password='Password123')
+
+        response = self.client.get(reverse('dashboard'), {'sort': 'trending', 'meal_type': 'lunch'})
+        self.assertEqual(list(response.context['recipes']), [self.quick_recipe])
+
+        response = self.client.get(reverse('dashboard'), {'sort': 'trending'})
+        self.assertEqual(list(response.context['recipes'])[:2], [self.quick_recipe, self.most_viewed_recipe])
+        cache.clear()
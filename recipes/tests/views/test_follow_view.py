@@ -5,6 +5,7 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from recipes.models import Follow, FollowRequest
+from recipes.views.follow_view import FOLLOW_LIST_PAGE_SIZE
 
 User = get_user_model()
 
@@ -42,6 +43,16 @@ class FollowUserViewTestCase(TestCase):
             ).exists()
         )
 
+    def test_follow_updates_both_counters(self):
+        self.client.force_login(self.user1)
+        self.client.post(self.url)
+        self.client.post(self.url)
+
+        self.user1.refresh_from_db()
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user1.following_count, 1)
+        self.assertEqual(self.user2.followers_count, 1)
+
     def test_follow_does_not_duplicate(self):
         Follow.objects.create(follower=self.user1, following=self.user2)
 
@@ -99,6 +110,16 @@ class UnfollowUserViewTestCase(TestCase):
             ).exists()
         )
 
+    def test_unfollow_updates_both_counters(self):
+        self.client.force_login(self.user1)
+        self.client.post(self.url)
+        self.client.post(self.url)
+
+        self.user1.refresh_from_db()
+        self.user2.refresh_from_db()
+        self.assertEqual(self.user1.following_count, 0)
+        self.assertEqual(self.user2.followers_count, 0)
+
 
 class FollowRequestCreationTestCase(TestCase):
     """Tests for private accounts and follow request creation."""
@@ -165,6 +186,16 @@ class FollowRequestActionTestCase(TestCase):
         )
         self.assertFalse(FollowRequest.objects.exists())
 
+    def test_accept_follow_request_updates_counters(self):
+        self.client.force_login(self.to_user)
+        url = reverse('accept_follow_request', kwargs={'request_id': self.request.id})
+        self.client.post(url)
+
+        self.from_user.refresh_from_db()
+        self.to_user.refresh_from_db()
+        self.assertEqual(self.from_user.following_count, 1)
+        self.assertEqual(self.to_user.followers_count, 1)
+
     def test_reject_follow_request_deletes_request_only(self):
         self.client.force_login(self.to_user)
         url = reverse('reject_follow_request', kwargs={'request_id': self.request.id})
@@ -210,4 +241,31 @@ class FollowersFollowingPageTestCase(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 200)
-        self.assertContains(response, '@user2')
\ No newline at end of file
+        self.assertContains(response, '@user2')
+
+    def test_followers_page_is_cursor_paginated(self):
+        for i in range(3, 3 + FOLLOW_LIST_PAGE_SIZE):
+            follower = User.objects.create_user(
+                username=f'@follower{i}',
+                email=f'follower{i}@example.com',
+                password='testpass123',
+            )
+            Follow.objects.create(follower=follower, following=self.user2)
+        url = reverse('user_followers', kwargs={'user_id': self.user2.id})
+
+        response = self.client.get(url)
+        page = response.context['page_obj']
+        self.assertEqual(len(response.context['followers']), FOLLOW_LIST_PAGE_SIZE)
+        self.assertContains(response, f'{FOLLOW_LIST_PAGE_SIZE + 1} followers')
+        self.assertNotContains(response, '@user1<')
+
+        response = self.client.get(url + page.next_url)
+        self.assertEqual([u.username for u in response.context['followers']], ['@user1'])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_profile_reads_the_counters(self):
+        url = reverse('user_profile', kwargs={'user_id': self.user2.id})
+        response = self.client.get(url)
+
+        self.assertEqual(response.context['followers_count'], 1)
+        self.assertEqual(response.context['following_count'], 0)
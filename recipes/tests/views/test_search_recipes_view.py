@@ -0,0 +1,91 @@
+"""Tests for the recipe picker's JSON search endpoint."""
+from datetime import date
+from django.test import TestCase
+from django.urls import reverse
+from recipes.models import User, Recipe
+from recipes.views.search_recipes_view import RECIPE_SEARCH_PAGE_SIZE
+
+
+class SearchRecipesAjaxTestCase(TestCase):
+    """Tests for search_recipes_ajax and the recipe picker it feeds."""
+
+    fixtures = [
+        'recipes/tests/fixtures/default_user.json',
+        'recipes/tests/fixtures/other_users.json'
+    ]
+
+    def setUp(self):
+        self.user = User.objects.get(username='@johndoe')
+        self.other_user = User.objects.get(username='@janedoe')
+        self.url = reverse('search_recipes_ajax')
+        self.client.login(username='@johndoe', password='Password123')
+
+    def _create_recipe(self, title, author=None):
+        return Recipe.objects.create(
+            author=author or self.user,
+            title=title,
+            description="desc",
+            ingredients="flour",
+            time=10,
+            meal_type="lunch"
+        )
+
+    def _titles(self, response):
+        return [result['title'] for result in response.json()['results']]
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_matches_title_word_prefixes(self):
+        self._create_recipe("Chicken Curry")
+        self._create_recipe("Curried Eggs")
+        self._create_recipe("Pancakes")
+
+        self.assertEqual(self._titles(self.client.get(self.url, {'q': 'curr'})), ["Chicken Curry", "Curried Eggs"])
+        self.assertEqual(self._titles(self.client.get(self.url, {'q': 'chick curr'})), ["Chicken Curry"])
+
+    def test_only_title_is_searched(self):
+        self._create_recipe("Pancakes")
+        self.assertEqual(self._titles(self.client.get(self.url, {'q': 'flour'})), [])
+
+    def test_hides_recipes_the_user_cannot_see(self):
+        self.other_user.is_private = True
+        self.other_user.save()
+        self._create_recipe("Secret Soup", author=self.other_user)
+        self._create_recipe("Open Soup")
+
+        self.assertEqual(self._titles(self.client.get(self.url, {'q': 'soup'})), ["Open Soup"])
+
+    def test_results_are_paginated_by_cursor(self):
+        for i in range(RECIPE_SEARCH_PAGE_SIZE + 5):
+            self._create_recipe(f"Soup {i:02d}")
+
+        first = self.client.get(self.url, {'q': 'soup'}).json()
+        self.assertEqual(len(first['results']), RECIPE_SEARCH_PAGE_SIZE)
+        self.assertIsNotNone(first['next'])
+
+        second = self.client.get(self.url, {'q': 'soup', 'cursor': first['next']}).json()
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+        self.assertEqual(second['results'][0]['title'], f"Soup {RECIPE_SEARCH_PAGE_SIZE:02d}")
+
+    def test_planner_pages_do_not_render_every_recipe(self):
+        self._create_recipe("Listed Nowhere")
+
+        day = self.client.get(reverse('planner_day', args=[date.today().isoformat()]))
+        week = self.client.get(reverse('planner_range'))
+
+        self.assertNotContains(day, "Listed Nowhere")
+        self.assertNotContains(week, "Listed Nowhere")
+        self.assertContains(day, 'data-recipe-picker')
+        self.assertNotIn('user_recipes', week.context)
+
+    def test_recipe_detail_only_renders_the_selected_recipe(self):
+        recipe = self._create_recipe("Shown Here")
+        self._create_recipe("Listed Nowhere")
+
+        response = self.client.get(reverse('recipe_detail', args=[recipe.pk]))
+        self.assertContains(response, f'<option value="{recipe.pk}">Shown Here</option>', html=True)
+        self.assertNotContains(response, "Listed Nowhere")
@@ -90,6 +90,14 @@ class SurpriseMeTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, reverse("recipe_detail", kwargs={"pk": self.salad.pk}))
 
+    def test_surprise_uses_every_selected_meal_type(self):
+        response = self.client.get(
+            reverse("surprise-result"),
+            {"meal_type": ["snack", "dinner"]},
+        )
+
+        self.assertEqual(response.status_code, 302)
+
     def test_surprise_no_results_renders_quiz(self):
         response = self.client.get(
             reverse("surprise-result"),
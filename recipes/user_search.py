@@ -0,0 +1,121 @@
+"""
+Typeahead user search by username, first name or last name prefix.
+
+Users are matched when one of the three names starts with the query,
+ignoring case and a leading ``@``. Each name has an index on its
+lowercased value (see ``User.Meta.indexes``) and the lookup is written as
+a ``>= prefix AND < prefix + U+10FFFF`` range on it, which the indexes can
+answer, unlike ``LIKE '%...%'``.
+
+Short queries match many users and are typed by everyone, so the results
+for queries of up to POPULAR_PREFIX_LENGTH characters (including the empty
+one) are cached for USER_SEARCH_CACHE_TIMEOUT seconds for all users; the
+searching user is dropped from the cached list afterwards. New accounts
+and renames show up in those results once the entry expires. Counts stop
+at COUNT_CAP, so a count never reads more than that many index entries.
+``USER_SEARCH_CACHE_TIMEOUT = 0`` turns the caching off.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+RESULT_LIMIT = 50
+COUNT_CAP = 1000
+
+# queries up to this many characters share cached results
+POPULAR_PREFIX_LENGTH = 3
+
+RESULTS_KEY = 'user_search:{}'
+
+# sorts after every other character, so prefix + MAX_CHAR bounds the prefix
+MAX_CHAR = '\U0010ffff'
+
+NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def cache_timeout():
+    return getattr(settings, 'USER_SEARCH_CACHE_TIMEOUT', 30)
+
+
+def _lower(value):
+    # SQLite's lower() only folds ASCII letters, fold the query the same way
+    return ''.join(char.lower() if char.isascii() else char for char in value)
+
+
+def normalize(query):
+    """The search key for ``query``: trimmed, without a leading ``@``, lowercased."""
+    return _lower(query.strip().lstrip('@'))
+
+
+def _prefixes(key):
+    return {'username': '@' + key, 'first_name': key, 'last_name': key}
+
+
+def matching_users(queryset, query):
+    """Users in ``queryset`` with a name starting with ``query``."""
+    key = normalize(query)
+    if not key:
+        return queryset
+    condition = Q()
+    for field, prefix in _prefixes(key).items():
+        condition |= Q(**{f'{field}_key__gte': prefix, f'{field}_key__lt': prefix + MAX_CHAR})
+    return queryset.alias(**{f'{field}_key': Lower(field) for field in NAME_FIELDS}).filter(condition)
+
+
+def _user_matches(user, key):
+    return any(_lower(getattr(user, field)).startswith(prefix) for field, prefix in _prefixes(key).items())
+
+
+def _as_dict(user):
+    return {
+        'id': user.pk,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'full_name': user.full_name(),
+        'gravatar_url': user.mini_gravatar(),
+    }
+
+
+def _lookup(key, limit, count_limit, exclude_id=None):
+    from recipes.models import User
+
+    users = matching_users(User.objects.all(), key).order_by('username')
+    if exclude_id is not None:
+        users = users.exclude(pk=exclude_id)
+    rows = [
+        _as_dict(user)
+        for user in users.only('pk', 'username', 'first_name', 'last_name', 'email', 'gravatar_hash')[:limit]
+    ]
+    # a short page is the whole result, no count query needed
+    count = len(rows) if len(rows) < limit else users[:count_limit].count()
+    return rows, count
+
+
+def search(query, user):
+    """
+    Search for ``query`` on behalf of ``user``, who is left out of the results.
+
+    Returns ``(rows, count, capped)``: up to RESULT_LIMIT users as dicts for
+    the JSON response, the number of matches and whether that number
+    stopped at COUNT_CAP.
+    """
+    key = normalize(query)
+    timeout = cache_timeout()
+    if timeout and len(key) <= POPULAR_PREFIX_LENGTH:
+        cache_key = RESULTS_KEY.format(hashlib.md5(key.encode()).hexdigest())
+        entry = cache.get(cache_key)
+        if entry is None:
+            # one spare row and count for the searching user, who may be among them
+            entry = _lookup(key, RESULT_LIMIT + 1, COUNT_CAP + 2)
+            cache.set(cache_key, entry, timeout)
+        rows, count = entry
+        rows = [row for row in rows if row['id'] != user.pk][:RESULT_LIMIT]
+        if _user_matches(user, key):
+            count -= 1
+    else:
+        rows, count = _lookup(key, RESULT_LIMIT, COUNT_CAP + 1, exclude_id=user.pk)
+    return rows, min(count, COUNT_CAP), count > COUNT_CAP
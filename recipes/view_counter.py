@@ -0,0 +1,247 @@
+"""
+Write-behind buffer for recipe view counts.
+
+Recording a view used to be an UPDATE of ``recipes_recipe`` per page hit,
+which under SQLite is a write transaction serialised with every other
+writer. Instead, views are counted with atomic ``cache.incr`` calls and
+flushed to the database in one batch transaction using
+``F('total_views') + n``.
+
+How pending counts are tracked:
+
+* ``recipe_views:count:<id>`` holds the number of unflushed views.
+* Whenever a counter goes from 0 to 1 its recipe id is appended to a log
+  (``recipe_views:log:<seq>``) so the flusher knows which counters to read.
+* The flusher subtracts exactly what it read with ``cache.decr``, so views
+  arriving during a flush stay in the counter; if some remain, the recipe
+  is logged again.
+* The log's head and tail never expire. A flush only moves the tail over
+  the entries it found, so an entry whose sequence number was taken but
+  not yet written is read by a later flush; a gap still missing after
+  LOG_GAP_TIMEOUT (an entry evicted or never written) is skipped. A head
+  behind the tail (the cache was cleared) restarts the log.
+
+A background timer queues a flush on the single database writer (see
+recipes/write_queue.py) every ``VIEW_COUNT_FLUSH_INTERVAL`` seconds and an
+``atexit`` hook flushes on shutdown; the ``flush_view_counts`` command
+does the same from cron. With an interval of 0 every view is flushed
+immediately (used by the test settings).
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from recipes.cache_utils import incr
+from recipes.retry import retry_on_locked
+from recipes.write_queue import enqueue_unbatched
+
+logger = logging.getLogger(__name__)
+
+COUNT_KEY = 'recipe_views:count:{}'
+SEEN_KEY = 'recipe_views:seen:{}'
+LOG_KEY = 'recipe_views:log:{}'
+LOG_HEAD_KEY = 'recipe_views:log_head'
+LOG_TAIL_KEY = 'recipe_views:log_tail'
+LOG_GAP_KEY = 'recipe_views:log_gap'
+FLUSH_LOCK_KEY = 'recipe_views:flushing'
+
+# Unflushed counters must outlive any realistic gap between flushes
+PENDING_TIMEOUT = 60 * 60 * 24 * 7
+
+# A log entry missing for this long is given up on, see _take_pending_ids
+LOG_GAP_TIMEOUT = 60
+
+# A crashed flusher releases the cross-process flush lock after this long
+FLUSH_LOCK_TIMEOUT = 60
+
+_flush_lock = threading.Lock()
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def flush_interval():
+    return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 5)
+
+
+def _log_pending(recipe_id):
+    seq = incr(LOG_HEAD_KEY)
+    cache.set(LOG_KEY.format(seq), recipe_id, PENDING_TIMEOUT)
+
+
+def record_view(recipe_id, at=None):
+    """Buffer one view of ``recipe_id``; it reaches the database on the next flush."""
+    at = at or timezone.now()
+    if incr(COUNT_KEY.format(recipe_id), timeout=PENDING_TIMEOUT) == 1:
+        _log_pending(recipe_id)
+    cache.set(SEEN_KEY.format(recipe_id), at.timestamp(), PENDING_TIMEOUT)
+
+    if flush_interval() <= 0:
+        flush()
+    else:
+        _ensure_flusher()
+
+
+def pending_views(recipe_id):
+    """Views of ``recipe_id`` recorded but not yet written to the database."""
+    return cache.get(COUNT_KEY.format(recipe_id)) or 0
+
+
+def _gap_expired(seq):
+    """Whether log entry ``seq`` has been missing for longer than LOG_GAP_TIMEOUT."""
+    gap = cache.get(LOG_GAP_KEY)
+    if gap is not None and gap[0] == seq:
+        return time.time() - gap[1] > LOG_GAP_TIMEOUT
+    cache.set(LOG_GAP_KEY, (seq, time.time()), None)
+    return False
+
+
+def _take_pending_ids():
+    """Pop the recipe ids logged since the last flush, up to the first entry not written yet."""
+    head = cache.get(LOG_HEAD_KEY) or 0
+    tail = cache.get(LOG_TAIL_KEY) or 0
+    if head < tail:
+        # the head was lost (e.g. the cache was cleared) and restarted
+        tail = 0
+    if head <= tail:
+        return set()
+
+    found = cache.get_many([LOG_KEY.format(seq) for seq in range(tail + 1, head + 1)])
+    recipe_ids = set()
+    new_tail = tail
+    for seq in range(tail + 1, head + 1):
+        key = LOG_KEY.format(seq)
+        if key in found:
+            recipe_ids.add(found[key])
+        elif not _gap_expired(seq):
+            # taken by _log_pending but not set yet
+            break
+        new_tail = seq
+
+    cache.set(LOG_TAIL_KEY, new_tail, None)
+    cache.delete_many([LOG_KEY.format(seq) for seq in range(tail + 1, new_tail + 1)])
+    return recipe_ids
+
+
+def flush():
+    """
+    Write all buffered view counts to the database in one transaction.
+
+    Returns the number of views written.
+    """
+    with _flush_lock:
+        # with a shared cache another process may be flushing the same log
+        if not cache.add(FLUSH_LOCK_KEY, 1, FLUSH_LOCK_TIMEOUT):
+            return 0
+        try:
+            return _flush_pending()
+        finally:
+            cache.delete(FLUSH_LOCK_KEY)
+
+
+def _flush_pending():
+    from recipes.models import Recipe
+
+    recipe_ids = _take_pending_ids()
+    if not recipe_ids:
+        return 0
+
+    counts = cache.get_many([COUNT_KEY.format(pk) for pk in recipe_ids])
+    # views of recipes deleted since are dropped below
+    existing = set(Recipe.objects.filter(pk__in=recipe_ids).values_list('pk', flat=True))
+    seen = cache.get_many([SEEN_KEY.format(pk) for pk in recipe_ids])
+    now = timezone.now()
+    batch = []
+    for recipe_id in recipe_ids:
+        count = counts.get(COUNT_KEY.format(recipe_id)) or 0
+        if count <= 0:
+            continue
+        timestamp = seen.get(SEEN_KEY.format(recipe_id))
+        last_seen = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc) if timestamp else now
+        batch.append((recipe_id, count, last_seen))
+
+    try:
+        _write_batch([row for row in batch if row[0] in existing])
+    except Exception:
+        # leave the counters untouched so the next flush retries them
+        for recipe_id, _, _ in batch:
+            _log_pending(recipe_id)
+        raise
+
+    total = 0
+    for recipe_id, count, _ in batch:
+        if recipe_id in existing:
+            total += count
+        try:
+            remaining = cache.decr(COUNT_KEY.format(recipe_id), count)
+        except ValueError:
+            # counter evicted from the cache meanwhile
+            continue
+        if remaining > 0:
+            # more views arrived while flushing
+            _log_pending(recipe_id)
+    return total
+
+
+@retry_on_locked
+def _write_batch(batch):
+    """Apply ``(recipe_id, count, last_seen)`` rows in a single transaction."""
+    from recipes.models import Recipe, RecipeViewBucket
+
+    with transaction.atomic():
+        for recipe_id, count, last_seen in batch:
+            Recipe.objects.filter(pk=recipe_id).update(
+                total_views=F('total_views') + count,
+                last_viewed_at=last_seen,
+            )
+            RecipeViewBucket.record_views(recipe_id, count=count, at=last_seen, update_score=False)
+        RecipeViewBucket.update_trending_scores(recipe_ids=[recipe_id for recipe_id, _, _ in batch])
+
+
+def _flush_safely():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Flushing buffered recipe views failed')
+
+
+class _Flusher(threading.Thread):
+    """Daemon thread handing a flush to the writer queue every ``interval`` seconds."""
+
+    def __init__(self, interval):
+        super().__init__(name='recipe-view-flusher', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            enqueue_unbatched(_flush_safely)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = _Flusher(flush_interval())
+            _flusher.start()
+
+
+def _shutdown():
+    if _flusher is not None:
+        _flusher.stop()
+    _flush_safely()
+
+
+atexit.register(_shutdown)
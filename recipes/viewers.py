@@ -0,0 +1,100 @@
+"""
+Sliding-window tracking of who is looking at a recipe right now.
+
+Time is cut into SLICE_SECONDS slices and a viewer counts as active while
+their last view falls within the last WINDOW_SLICES slices. Every viewer is
+counted in exactly one slice, the one they were last seen in:
+
+* ``recipe_viewer:<recipe>:<viewer>`` remembers that slice,
+* ``recipe_viewers:<recipe>:<slice>`` counts the viewers last seen in it.
+
+When a viewer is seen in a new slice they are moved there (incr the new
+counter, decr the old one), so the active count is the sum of a handful of
+counters and each viewer drops out on their own once their slice leaves the
+window. All updates are cache ``add``/``incr``/``decr`` calls, which are
+atomic, and nothing grows with the number of viewers.
+"""
+import time
+
+from django.core.cache import cache
+
+from recipes.cache_utils import incr
+
+SLICE_SECONDS = 60
+WINDOW_SLICES = 5
+WINDOW_SECONDS = SLICE_SECONDS * WINDOW_SLICES
+
+VIEWER_KEY = 'recipe_viewer:{}:{}'
+SEEN_IN_SLICE_KEY = 'recipe_viewer:{}:{}:{}'
+SLICE_COUNT_KEY = 'recipe_viewers:{}:{}'
+
+
+def current_slice(now=None):
+    return int((now if now is not None else time.time()) // SLICE_SECONDS)
+
+
+def _window(now=None):
+    last = current_slice(now)
+    return range(last - WINDOW_SLICES + 1, last + 1)
+
+
+def add_viewer(recipe_id, viewer_id, now=None):
+    """
+    Mark ``viewer_id`` as viewing ``recipe_id``.
+
+    Returns True if the viewer was not already active, i.e. this view
+    should count towards the recipe's total views.
+    """
+    slice_ = current_slice(now)
+
+    # only the first view of a viewer per slice does any work
+    if not cache.add(SEEN_IN_SLICE_KEY.format(recipe_id, viewer_id, slice_), 1, SLICE_SECONDS):
+        return False
+
+    viewer_key = VIEWER_KEY.format(recipe_id, viewer_id)
+    previous = cache.get(viewer_key)
+    cache.set(viewer_key, slice_, WINDOW_SECONDS)
+
+    incr(SLICE_COUNT_KEY.format(recipe_id, slice_), timeout=WINDOW_SECONDS + SLICE_SECONDS)
+
+    was_active = previous is not None and previous in _window(now)
+    if was_active:
+        try:
+            cache.decr(SLICE_COUNT_KEY.format(recipe_id, previous))
+        except ValueError:
+            pass
+    return not was_active
+
+
+def active_viewer_counts(recipe_ids, now=None):
+    """Return ``{recipe_id: active viewers}`` for many recipes in one cache round trip."""
+    recipe_ids = list(recipe_ids)
+    slices = _window(now)
+    keys = {
+        SLICE_COUNT_KEY.format(recipe_id, slice_): recipe_id
+        for recipe_id in recipe_ids
+        for slice_ in slices
+    }
+    counts = dict.fromkeys(recipe_ids, 0)
+    for key, value in cache.get_many(list(keys)).items():
+        counts[keys[key]] += max(value, 0)
+    return counts
+
+
+def active_viewers(recipe_id, now=None):
+    """Number of viewers of ``recipe_id`` seen within the window."""
+    return active_viewer_counts([recipe_id], now=now)[recipe_id]
+
+
+def prefetch_active_viewers(recipes):
+    """
+    Load the active viewer counts of a page of recipes at once.
+
+    Each recipe's ``get_active_viewers()`` then returns the prefetched count
+    instead of going to the cache. A queryset is evaluated in place, so the
+    same (now cached) queryset is returned.
+    """
+    counts = active_viewer_counts(recipe.pk for recipe in recipes)
+    for recipe in recipes:
+        recipe._active_viewers = counts[recipe.pk]
+    return recipes
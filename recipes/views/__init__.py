@@ -16,5 +16,8 @@ from .planner_view import *
 from .comment_view import *
 from .surprise_quiz_view import *
 from .search_users_view import *
+from .search_recipes_view import *
 from .report_view import *
 from .notification_view import *
+from .metrics_view import *
+from .live_view import *
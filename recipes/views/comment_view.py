@@ -3,6 +3,7 @@ from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
 from recipes.models import Recipe, Comment, Notification
 from recipes.forms.comment_form import CommentForm
+from recipes.write_queue import enqueue
 
 
 @login_required
@@ -20,7 +21,7 @@ def add_comment(request, recipe_pk):
             
             # notify recipe author unless they're commenting on their own recipe
             if recipe.author != request.user:
-                Notification.create_comment_notification(request.user, recipe)
+                enqueue(Notification.create_comment_notification, request.user, recipe)
             
             messages.success(request, "Comment added successfully!")
         else:
@@ -1,16 +1,33 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView
 from django.urls import reverse
-from django.db.models import Avg, Count, F, Q
-from recipes.models import Recipe, Follow, User
-
-
-class DashboardView(LoginRequiredMixin, ListView):
-    """main recipe browsing view with filtering, search, sorting and pagination"""
+import hashlib
+import json
+from functools import reduce
+from operator import and_
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
+from recipes.models import Recipe, RecipeViewBucket
+from recipes.feed import feed_q
+from recipes.fragments import prefetch_fragment_versions
+from recipes.pagination import CursorPaginationMixin
+from recipes.search import search_recipes
+from recipes.viewers import prefetch_active_viewers
+from recipes.visibility import visible_recipes_q
+
+
+class DashboardView(LoginRequiredMixin, CursorPaginationMixin, ListView):
+    """main recipe browsing view with filtering, search, sorting and pagination
+
+    pass ?cursor= for keyset pagination and ?count=0 to skip the total count
+    """
     model = Recipe
     template_name = "dashboard.html"
     context_object_name = "recipes"
     paginate_by = 9
+    # seconds the sidebar facet counts are cached for
+    facet_cache_timeout = 60
 
     MEAL_TYPE_FILTERS = (
         ("breakfast", "Breakfast"),
@@ -42,6 +59,16 @@ class DashboardView(LoginRequiredMixin, ListView):
         ("newest", "Newest First"),
     )
 
+    # (sort key, pk) orderings - the trailing pk keeps keyset cursors stable
+    SORT_ORDERINGS = {
+        "relevance": ("search_rank", "-pk"),
+        "popular": ("-popularity_score", "-avg_rating", "-pk"),
+        "trending": ("-trending_score", "-pk"),
+        "most_viewed": ("-total_views", "-pk"),
+        "newest": ("-created_at", "-pk"),
+        "time": ("time", "-pk"),
+    }
+
     RATING_FILTERS = (
         {"key": "4_plus", "label": "4+ stars", "min": 4.0},
         {"key": "3_plus", "label": "3+ stars", "min": 3.0},
@@ -53,32 +80,41 @@ class DashboardView(LoginRequiredMixin, ListView):
     # Queryset logic
     # ------------------------
 
-    def get_queryset(self):
+    def get_base_queryset(self):
+        """visible recipes matching the search, before the sidebar filters are applied"""
         # exclude own recipes and hidden/reported ones
         queryset = (
             Recipe.objects
+            .for_cards()
             .exclude(author=self.request.user)
             .exclude(is_hidden=True)
             .annotate(
-                avg_rating=Avg("ratings__stars"),
-                rating_count=Count("ratings"),
+                avg_rating=Coalesce(F("stats__rating_avg"), 0.0),
+                rating_count=Coalesce(F("stats__rating_count"), 0),
             )
         )
+        queryset = self.search_feature(queryset)
+        queryset = self.following_only(queryset)
+        return queryset
 
-        # apply filters in order - diet filter must be last since it returns a list
+    def get_queryset(self):
+        # apply filters in order - sorting must be last
+        queryset = self.get_base_queryset()
         queryset = self.filter_by_meal_types(queryset)
         queryset = self.filter_by_time(queryset)
+        queryset = self.filter_by_diet(queryset)
         queryset = self.filter_by_rating(queryset)
-        queryset = self.search_feature(queryset)
-        queryset = self.following_only(queryset)
         queryset = self.apply_sorting(queryset)
-        queryset = self.filter_by_diet(queryset)  # returns list, must be last
 
         return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
+        # one cache round trip each for the cards' trending badges and fragment versions
+        prefetch_active_viewers(context["object_list"])
+        prefetch_fragment_versions(context["object_list"])
+
         selected_meal_types = self.get_selected_meal_types()
         selected_time_filter = self.request.GET.get("time_filter", "")
         search_term = self.request.GET.get("search", "")
@@ -110,6 +146,21 @@ class DashboardView(LoginRequiredMixin, ListView):
             "add_on": "?" if self.request.path == self.request.get_full_path() else "&",
         })
 
+        # sidebar options with the number of recipes each would show
+        facet_counts = self.get_facet_counts()
+        context.update({
+            "facet_counts": facet_counts,
+            "meal_type_options": [
+                {"value": value, "label": label, "count": facet_counts["meal_type"][value]}
+                for value, label in self.MEAL_TYPE_FILTERS
+            ],
+            "time_options": [dict(tf, count=facet_counts["time"][tf["key"]]) for tf in self.TIME_FILTERS],
+            "diet_options": [
+                {"value": code, "label": label, "count": facet_counts["diet"][code]}
+                for code, label in self.DIET_FILTERS
+            ],
+        })
+
         return context
 
     def get_selected_meal_types(self):
@@ -120,9 +171,12 @@ class DashboardView(LoginRequiredMixin, ListView):
             if m
         ]
 
-        single_meal_type = self.request.GET.get("meal_type")
-        if single_meal_type:
-            meal_types.append(single_meal_type.strip().lower())
+        # the surprise-me form submits its checkboxes as meal_type
+        meal_types += [
+            m.strip().lower()
+            for m in self.request.GET.getlist("meal_type")
+            if m
+        ]
 
         # deduplicate while preserving order
         seen = set()
@@ -156,93 +210,157 @@ class DashboardView(LoginRequiredMixin, ListView):
         except (TypeError, ValueError):
             return default
 
-    def filter_by_meal_types(self, queryset):
+    def get_min_rating(self):
+        rating_filter_key = self.request.GET.get("rating_filter")
+        for rf in self.RATING_FILTERS:
+            if rf["key"] == rating_filter_key:
+                return rf["min"]
+        return None
+
+    # each sidebar filter is a Q so the facet counts can reuse it
+
+    def meal_types_condition(self, meal_types):
+        # recipes with any of the given types, as one indexed IN on the mask
+        return Q(meal_type_mask__in=Recipe.meal_type_masks_matching(meal_types))
+
+    def get_filter_conditions(self):
+        """the active sidebar filters as {facet: Q}"""
+        conditions = {"time": Q(time__range=self.get_time_window())}
+
         meal_types = self.get_selected_meal_types()
         if meal_types:
-            queryset = queryset.filter(meal_type__in=meal_types)
-        return queryset
+            conditions["meal_type"] = self.meal_types_condition(meal_types)
 
-    def filter_by_time(self, queryset):
-        min_time, max_time = self.get_time_window()
-        return queryset.filter(time__range=(min_time, max_time))
-    
-    def filter_by_diet(self, queryset):
-        """filters by diet type - returns list so must be applied last"""
         selected_diet = self.get_selected_diet()
-        if not selected_diet:
-            return queryset
+        if selected_diet:
+            # the diet class is stored on each recipe when it is saved
+            conditions["diet"] = Q(diet_type=selected_diet)
 
-        return [
-            recipe for recipe in queryset
-            if recipe.get_diet_type() == selected_diet
-        ]
+        min_rating = self.get_min_rating()
+        if min_rating is not None:
+            conditions["rating"] = Q(avg_rating__gte=min_rating)
+
+        return conditions
+
+    def _filter_by(self, queryset, facet):
+        condition = self.get_filter_conditions().get(facet)
+        return queryset if condition is None else queryset.filter(condition)
+
+    def filter_by_meal_types(self, queryset):
+        return self._filter_by(queryset, "meal_type")
+
+    def filter_by_time(self, queryset):
+        return self._filter_by(queryset, "time")
 
+    def filter_by_diet(self, queryset):
+        return self._filter_by(queryset, "diet")
 
     def filter_by_rating(self, queryset):
-        rating_filter_key = self.request.GET.get("rating_filter")
-        
-        if not rating_filter_key:
-            return queryset
-        
-        for rf in self.RATING_FILTERS:
-            if rf["key"] == rating_filter_key:
-                min_rating = rf["min"]
-                return queryset.filter(avg_rating__gte=min_rating)
-        
-        return queryset
+        return self._filter_by(queryset, "rating")
+
+    # ------------------------
+    # Facet counts
+    # ------------------------
+
+    def get_facet_options(self):
+        """every sidebar filter option as {facet: [(value, Q), ...]}"""
+        return {
+            "meal_type": [(code, self.meal_types_condition([code])) for code, _ in self.MEAL_TYPE_FILTERS],
+            "time": [(tf["key"], Q(time__range=(tf["min"], tf["max"]))) for tf in self.TIME_FILTERS],
+            "diet": [(code, Q(diet_type=code)) for code, _ in self.DIET_FILTERS],
+            "rating": [(rf["key"], Q(avg_rating__gte=rf["min"])) for rf in self.RATING_FILTERS],
+        }
+
+    def get_facet_cache_key(self):
+        """one key per user and normalised filter state (sorting and paging don't change counts)"""
+        min_time, max_time = self.get_time_window()
+        state = {
+            "user": self.request.user.pk,
+            "following": self.request.path == reverse("following_dashboard"),
+            "search": " ".join(self.request.GET.get("search", "").lower().split()),
+            "meal_types": sorted(self.get_selected_meal_types()),
+            "time": [min_time, max_time],
+            "diet": self.get_selected_diet(),
+            "min_rating": self.get_min_rating(),
+        }
+        digest = hashlib.md5(json.dumps(state, sort_keys=True).encode()).hexdigest()
+        return f"dashboard_facets:{digest}"
+
+    def get_facet_counts(self):
+        """
+        how many recipes each sidebar option would show, as {facet: {value: count}}
+
+        All options are counted in one aggregate query over the base queryset
+        with conditional Counts. Each option is counted with the other facets'
+        active filters but not its own facet's, so the numbers say what
+        picking that option instead would give. Cached briefly per filter state.
+        """
+        key = self.get_facet_cache_key()
+        counts = cache.get(key)
+        if counts is not None:
+            return counts
+
+        conditions = self.get_filter_conditions()
+        facet_options = self.get_facet_options()
+        aggregates = {}
+        for facet, options in facet_options.items():
+            others = [condition for name, condition in conditions.items() if name != facet]
+            for index, (_, condition) in enumerate(options):
+                aggregates[f"{facet}_{index}"] = Count("pk", filter=reduce(and_, others, condition))
+
+        totals = self.get_base_queryset().order_by().aggregate(**aggregates)
+        counts = {
+            facet: {value: totals[f"{facet}_{index}"] for index, (value, _) in enumerate(options)}
+            for facet, options in facet_options.items()
+        }
+        cache.set(key, counts, self.facet_cache_timeout)
+        return counts
 
     def search_feature(self, queryset):
-        search_term = self.request.GET.get("search")
+        """full-text search over title, description, ingredients and meal type (all words, prefix match)"""
+        search_term = self.request.GET.get("search", "").strip()
         if search_term:
-            queryset = queryset.filter(
-                Q(description__icontains=search_term) |
-                Q(ingredients__icontains=search_term) |
-                Q(title__icontains=search_term) |
-                Q(meal_type__icontains=search_term))
+            queryset = search_recipes(queryset, search_term)
 
         return queryset
 
     def following_only(self, queryset):
         """filters recipes based on following relationships and privacy settings"""
-        following_page = self.request.path == reverse('following_dashboard')
-        followed_users = Follow.objects.filter(follower=self.request.user).values_list('following')
-        followed_recipes = queryset.filter(author__in=followed_users)
-
-        if following_page:
-            queryset = followed_recipes
-        else:
-            # show public recipes plus recipes from followed users
-            public_users = User.objects.filter(is_private=False)
-            queryset = queryset.filter(author__in=public_users)
-
-            queryset: QuerySet = (queryset|followed_recipes).distinct()
-
-        return queryset
+        if self.request.path == reverse('following_dashboard'):
+            # the user's materialised feed rows, plus the followed accounts too big to fan out
+            return queryset.filter(feed_q(self.request.user))
+        # public recipes plus recipes from followed users, as one cached author_id predicate
+        return queryset.filter(visible_recipes_q(self.request.user))
     
+    def get_sort_key(self):
+        """normalises the sort param to a SORT_ORDERINGS key"""
+        sort_by = self.request.GET.get("sort")
+        if not sort_by:
+            # searches without an explicit sort are ranked by relevance
+            return "relevance" if self.request.GET.get("search", "").strip() else "time"
+        if sort_by in {"new", "latest", "recent"}:
+            return "newest"
+        if sort_by == "relevance" and not self.request.GET.get("search", "").strip():
+            return "time"
+        if sort_by in self.SORT_ORDERINGS:
+            return sort_by
+        return "time"
+
+    def get_cursor_ordering(self):
+        return self.SORT_ORDERINGS[self.get_sort_key()]
+
     def apply_sorting(self, queryset):
-        """applies sorting - trending returns list so needs special handling"""
-        sort_by = self.request.GET.get("sort", "time")
+        """orders by the selected sort key, annotating computed sort keys first"""
+        sort_by = self.get_sort_key()
 
-        if sort_by == "popular":
+        if sort_by == "trending":
+            # precomputed from the time-bucketed view counts
+            queryset = queryset.annotate(trending_score=RecipeViewBucket.trending_score_expression())
+
+        elif sort_by == "popular":
+            # average * count is simply the star sum kept on the stats row
             queryset = queryset.annotate(
-                popularity_score=F('avg_rating') * F('rating_count')
-            ).order_by('-popularity_score', '-avg_rating', '-pk')
-
-        elif sort_by == "trending":
-            recipes_list = list(queryset)
-            recipes_list.sort(
-                key=lambda r: r.get_active_viewers(),
-                reverse=True
+                popularity_score=Coalesce(F('stats__rating_sum'), 0)
             )
-            return recipes_list
-
-        elif sort_by == "most_viewed":
-            queryset = queryset.order_by('-total_views', '-pk')
 
-        elif sort_by in {"newest", "new", "latest", "recent"}:
-            queryset = queryset.order_by('-created_at', '-pk')
-
-        else:  # default = time
-            queryset = queryset.order_by('time', '-pk')
-
-        return queryset
+        return queryset.order_by(*self.SORT_ORDERINGS[sort_by])
@@ -1,11 +1,16 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
 from recipes.models import Follow, FollowRequest, Notification
+from recipes.pagination import CursorPaginator, InvalidCursor
+from recipes.write_queue import enqueue
 
 User = get_user_model()
 
+FOLLOW_LIST_PAGE_SIZE = 30
+
 
 @login_required
 def follow_user(request, user_id):
@@ -25,8 +30,9 @@ def follow_user(request, user_id):
         )
         # Send notification only if this is a new request
         if created:
-            Notification.create_follow_request_notification(request.user, followed)
+            enqueue(Notification.create_follow_request_notification, request.user, followed)
     else:
+        # the follow counters are updated in the same transaction (recipes/signals.py)
         Follow.objects.get_or_create(
             follower=request.user,
             following=followed
@@ -50,20 +56,35 @@ def unfollow_user(request, user_id):
     return redirect("user_profile", user_id=user_id)
 
 
+def _follow_page(request, relations, user_field):
+    """
+    One page of ``relations`` (Follow rows), newest first, as the users in ``user_field``.
+
+    Always cursor paginated without a COUNT; the totals come from the
+    counters on the profile user.
+    """
+    paginator = CursorPaginator(
+        relations.select_related(user_field), FOLLOW_LIST_PAGE_SIZE, ("-created_at", "-pk"), count=False
+    )
+    try:
+        page = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor:
+        page = paginator.page()
+    page.set_urls(request)
+    return page, [getattr(relation, user_field) for relation in page]
+
+
 def user_followers(request, user_id):
 
     profile_user = get_object_or_404(User, pk=user_id)
 
-    # Query all users who follow the profile user
-    followers = User.objects.filter(
-        id__in=Follow.objects.filter(
-            following=profile_user
-        ).values("follower_id")
-    )
+    # Users who follow the profile user, one page at a time
+    page, followers = _follow_page(request, Follow.objects.filter(following=profile_user), "follower")
 
     return render(request, "user_followers.html", {
         "profile_user": profile_user,
         "followers": followers,
+        "page_obj": page,
     })
 
 
@@ -71,16 +92,13 @@ def user_following(request, user_id):
 
     profile_user = get_object_or_404(User, pk=user_id)
 
-    # Query all users that the profile user is following
-    following = User.objects.filter(
-        id__in=Follow.objects.filter(
-            follower=profile_user
-        ).values("following_id")
-    )
+    # Users the profile user is following, one page at a time
+    page, following = _follow_page(request, Follow.objects.filter(follower=profile_user), "following")
 
     return render(request, "user_following.html", {
         "profile_user": profile_user,
         "following": following,
+        "page_obj": page,
     })
 
 
@@ -111,14 +129,15 @@ def accept_follow_request(request, request_id):
     from_user = follow_request.from_user
     to_user = follow_request.to_user
 
-    # Create the follow relationship
-    Follow.objects.get_or_create(
-        follower=from_user,
-        following=to_user
-    )
+    with transaction.atomic():
+        # Create the follow relationship (and count it on both users)
+        Follow.objects.get_or_create(
+            follower=from_user,
+            following=to_user
+        )
 
-    # Remove the follow request after acceptance
-    follow_request.delete()
+        # Remove the follow request after acceptance
+        follow_request.delete()
 
     return redirect('user_profile', user_id=from_user_id)
 
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+from recipes import live
+from recipes.helpers import visible_recipes_for
+from recipes.notification_cache import unread_count
+from recipes.viewers import active_viewer_counts
+
+__all__ = ['live_events']
+
+
+def format_event(event):
+    """One Server-Sent Events message: the event name and its JSON payload."""
+    data = json.dumps(event, cls=DjangoJSONEncoder)
+    return f"event: {event['event']}\ndata: {data}\n\n"
+
+
+def parse_recipe_ids(request, limit):
+    ids = []
+    for value in request.GET.get('recipes', '').split(','):
+        if value.strip().isdigit():
+            ids.append(int(value))
+    return ids[:limit]
+
+
+def initial_events(user, recipe_ids):
+    """Current state for a new connection, limited to recipes the user may see."""
+    recipe_ids = list(visible_recipes_for(user).filter(pk__in=recipe_ids).values_list('pk', flat=True))
+    events = [live.unread_event(unread_count(user.pk))]
+    for recipe_id, count in active_viewer_counts(recipe_ids).items():
+        events.append(live.viewers_event(recipe_id, count))
+    return recipe_ids, events
+
+
+@login_required
+async def live_events(request):
+    """
+    Server-Sent Events stream of notification and active viewer updates.
+
+    ``?recipes=1,2`` also subscribes to the viewer counts of those recipes.
+    The connection sits idle on an asyncio queue between events, so it has
+    to be served by an ASGI worker (recipify.asgi). When the stream is
+    turned off or the request came through WSGI, which would buffer the
+    endless stream and hold the worker, the response is 204 No Content,
+    which tells EventSource not to reconnect.
+    """
+    config = live.live_settings()
+    if not config['ENABLED'] or not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    recipe_ids, events = await sync_to_async(initial_events)(user, parse_recipe_ids(request, config['MAX_RECIPES']))
+    topics = [live.user_topic(user.pk)] + [live.recipe_topic(recipe_id) for recipe_id in recipe_ids]
+
+    async def stream():
+        subscription = live.broker.subscribe(topics)
+        try:
+            # reconnect after 5 seconds if the connection drops
+            yield 'retry: 5000\n\n'
+            for event in events:
+                yield format_event(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=config['HEARTBEAT'])
+                except asyncio.TimeoutError:
+                    # keeps proxies from closing the idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            live.broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
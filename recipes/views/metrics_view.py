@@ -0,0 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from recipes import write_queue
+
+
+@staff_member_required
+def write_queue_metrics(request):
+    """Depth, lag and throughput of this worker's database write queue (staff only)."""
+    return JsonResponse(write_queue.metrics())
@@ -2,40 +2,52 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from recipes.models import Notification
+from django.utils import timezone
+from django.views.decorators.http import condition
+from recipes import sync
+from recipes.models import Notification, SyncTombstone
+from recipes.notification_cache import notifications_read, unread_count
+from recipes.pagination import paginate
 
 
 @login_required
 def notifications_list(request):
     """Display all notifications for the current user."""
     notifications_qs = request.user.notifications.all()
-    unread_count = request.user.notifications.filter(is_read=False).count()
 
-    paginator = Paginator(notifications_qs, 20)
-    page = request.GET.get('page')
+    # ?cursor= switches to keyset pagination, which stays fast on long histories
+    notifications = paginate(request, notifications_qs, 20, ('-created_at', '-pk'))
 
-    try:
-        notifications = paginator.page(page)
-    except PageNotAnInteger:
-        notifications = paginator.page(1)
-    except EmptyPage:
-        notifications = paginator.page(paginator.num_pages)
-    
     context = {
         'notifications': notifications,
         'page_obj': notifications,
         'is_paginated': notifications.has_other_pages(),
-        'unread_count': unread_count,
+        'unread_count': unread_count(request.user.pk),
     }
     return render(request, 'notifications.html', context)
 
 
+def notifications_etag(request):
+    return sync.etag(sync.NOTIFICATIONS, request.user.pk)
+
+
 @login_required
+@condition(etag_func=notifications_etag)
 def notifications_dropdown(request):
-    """AJAX view for notification dropdown."""
-    notifications = request.user.notifications.all()[:10]  # Last 10
-    unread_count = request.user.notifications.filter(is_read=False).count()
+    """
+    AJAX view for notification dropdown.
+
+    Answered with a 304 while the ETag (the user's notification sync
+    version) is unchanged. ``?since=<cursor>`` returns only notifications
+    created, merged or read since then, plus ``deleted`` ids.
+    """
+    cursor = sync.encode_cursor(timezone.now())
+    since, reset = sync.changes_since(request.GET.get('since'))
+
+    notifications = request.user.notifications.all()
+    if since:
+        notifications = notifications.filter(updated_at__gt=since)
+    notifications = notifications[:10]  # Last 10
     
     notifications_data = [{
         'id': n.id,
@@ -46,18 +58,26 @@ def notifications_dropdown(request):
         'action_url': n.action_url or '#'
     } for n in notifications]
     
-    return JsonResponse({
+    data = {
         'notifications': notifications_data,
-        'unread_count': unread_count
-    })
+        'unread_count': unread_count(request.user.pk),
+        'cursor': cursor,
+        'reset': reset,
+    }
+    if since:
+        data['deleted'] = SyncTombstone.deleted_since(request.user.pk, SyncTombstone.NOTIFICATION, since)
+    return JsonResponse(data)
 
 
 @login_required
 def mark_notification_read(request, notification_id):
     """Mark a notification as read."""
     notification = get_object_or_404(Notification, id=notification_id, recipient=request.user)
+
+    # conditional update, so marking the same notification twice only counts once
+    if Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True, updated_at=timezone.now()):
+        notifications_read(request.user.pk)
     notification.is_read = True
-    notification.save()
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True})
@@ -71,7 +91,9 @@ def mark_notification_read(request, notification_id):
 @login_required
 def mark_all_notifications_read(request):
     """Mark all notifications as read."""
-    request.user.notifications.filter(is_read=False).update(is_read=True)
+    marked = request.user.notifications.filter(is_read=False).update(is_read=True, updated_at=timezone.now())
+    if marked:
+        notifications_read(request.user.pk, marked)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True})
@@ -7,10 +7,12 @@ from django.utils.dateparse import parse_date
 from django.urls import reverse
 from django.contrib import messages
 from django.utils import timezone
+from django.views.decorators.http import condition
+from recipes import sync
 from recipes.helpers import visible_recipes_for
 from recipes.models.planned_day import PlannedDay
 from recipes.models.planned_meal import PlannedMeal
-from recipes.models import Recipe
+from recipes.models import Recipe, SyncTombstone
 from recipes.forms.planned_meal_form import PlannedMealForm
 
 # Export all planner view functions from this module
@@ -34,13 +36,27 @@ def planner_calendar(request):
     return render(request, "planner_range.html")
 
 
+def planner_etag(request):
+    return sync.etag(sync.PLANNER, request.user.pk)
+
+
 @login_required
+@condition(etag_func=planner_etag)
 def planner_events(request):
     """
     Returns planned meals as FullCalendar events (JSON).
     FullCalendar sends "start" and "end" as query parameters.
     This endpoint returns a list of event objects expected by FullCalendar.
+
+    The response's ETag is the user's planner sync version, so refetching
+    an unchanged range is answered with a 304 before any meal is read.
+    With ?since=<cursor> (from the X-Sync-Cursor header) only meals changed
+    since then are returned, as {"events", "deleted", "cursor", "reset"}.
     """
+    # read the time first, anything written from now on is in the next delta
+    cursor = sync.encode_cursor(timezone.now())
+    since, reset = sync.changes_since(request.GET.get("since"))
+
     # FullCalendar range filters
     start_str = request.GET.get("start")
     end_str = request.GET.get("end")
@@ -49,11 +65,13 @@ def planner_events(request):
     start = parse_date(start_str) if start_str else None
     end = parse_date(end_str) if end_str else None
 
-    # Fetch all planned meals for the current user (include related day/recipe to reduce queries)
+    # Fetch all planned meals for the current user, with only the columns the events need
     query_set = PlannedMeal.objects.filter(
         planned_day__user=request.user
     ).select_related(
         "planned_day", "recipe"
+    ).only(
+        "meal_type", "planned_day__date", "recipe__title"
     )
 
     # Apply optional date range filtering (start inclusive, end exclusive)
@@ -61,6 +79,11 @@ def planner_events(request):
         query_set = query_set.filter(planned_day__date__gte=start)
     if end:
         query_set = query_set.filter(planned_day__date__lt=end)
+    if since:
+        query_set = query_set.filter(updated_at__gt=since)
+
+    # Clicking an event takes the user to the planner day view; reverse once, not per meal
+    day_url = reverse("planner_day", args=["0000-00-00"]).replace("0000-00-00", "{}")
 
     # Convert planned meals into FullCalendar event dictionaries
     events = []
@@ -68,14 +91,22 @@ def planner_events(request):
         day = planned_meal.planned_day.date.isoformat()
 
         events.append({
+            "id": planned_meal.pk,
             "title": f"{planned_meal.meal_type.title()}: {planned_meal.recipe.title}",
-            "start": planned_meal.planned_day.date.isoformat(),
+            "start": day,
             "allDay": True,
-            # Clicking the event should take the user to the planner day view
-            "url": reverse("planner_day", args=[day])
+            "url": day_url.format(day),
         })
 
-    return JsonResponse(events, safe=False)
+    if since is None and not reset:
+        response = JsonResponse(events, safe=False)
+    else:
+        deleted = []
+        if since:
+            deleted = SyncTombstone.deleted_since(request.user.pk, SyncTombstone.PLANNED_MEAL, since)
+        response = JsonResponse({"events": events, "deleted": deleted, "cursor": cursor, "reset": reset})
+    response["X-Sync-Cursor"] = cursor
+    return response
 
 
 @login_required
@@ -88,18 +119,10 @@ def planner_day(request, date):
     if not day_date:
         raise Http404("Invalid date format. Use YYYY-MM-DD")
 
-    # Search term for filtering visible recipes in the form dropdown
-    search_term = request.GET.get("search", "").strip()
-
-    # Build the visible recipes queryset (filtered if search term provided)
-    recipes_qs = visible_recipes_for(request.user)
-    if search_term:
-        recipes_qs = recipes_qs.filter(title__icontains=search_term)
-
     if request.method == "POST":
         form = PlannedMealForm(request.POST, user=request.user)
 
-        # Ensure the recipe dropdown only contains (filtered) visible recipes
+        # Validate against all recipes so a hidden one is a 404, not a form error
         form.fields["recipe"].queryset = Recipe.objects.all()
 
         if form.is_valid():
@@ -127,11 +150,9 @@ def planner_day(request, date):
             return redirect("planner_day", date=day_date.isoformat())
 
     else:
+        # The recipe picker searches visible recipes on demand (search_recipes_ajax)
         form = PlannedMealForm(user=request.user)
 
-        # Ensure the recipe dropdown only contains (filtered) visible recipes
-        form.fields["recipe"].queryset = recipes_qs
-
     planned_day = PlannedDay.objects.filter(user=request.user, date=day_date).first()
 
     meals = []
@@ -143,7 +164,6 @@ def planner_day(request, date):
         "day_date": day_date,
         "meals": meals,
         "form": form,
-        "search_term": search_term,
     }
     return render(request, "day.html", context)
 
@@ -280,7 +300,7 @@ def planner_range(request):
         date_str = request.POST.get("date")
         meal_type = request.POST.get("meal_type")
 
-        # Recipe selected via datalist input (ID expected)
+        # Recipe selected via the recipe picker (ID expected)
         recipe_id = request.POST.get("recipe_search")
 
         # Only proceed if all required fields are present
@@ -394,9 +414,6 @@ def planner_range(request):
     next_week = start + week_delta
     next_week_end = end + week_delta
 
-    # Recipes shown in the modal dropdown (visible recipes only)
-    user_recipes = visible_recipes_for(request.user).order_by('title')
-
     context = {
         "start": start,
         "end": end,
@@ -405,7 +422,6 @@ def planner_range(request):
         "prev_week_end": prev_week_end,
         "next_week": next_week,
         "next_week_end": next_week_end,
-        "user_recipes": user_recipes,
     }
 
     return render(request, "planner_range.html", context)
@@ -4,8 +4,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic.edit import UpdateView
 from django.urls import reverse
 from recipes.forms import UserForm
-from django.db import transaction
-from recipes.models import FollowRequest, Follow
+from recipes.follow_acceptance import accept_pending
 from django.contrib.auth import get_user_model
 
 
@@ -78,15 +77,16 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         """
         Convert all incoming FollowRequest objects for this user into Follow
         relationships, then delete the requests.
-        """
-        with transaction.atomic():
-            reqs = FollowRequest.objects.filter(to_user=user).select_related("from_user")
-
-            for req in reqs:
-                if req.from_user_id != user.id:
-                    Follow.objects.get_or_create(
-                        follower=req.from_user,
-                        following=user
-                    )
 
-            reqs.delete()
+        Requests are accepted in bulk chunks (recipes.follow_acceptance);
+        a large backlog is left to the accept_follow_requests command and its
+        progress is shown on the user's profile.
+        """
+        pending, in_background = accept_pending(user)
+
+        if in_background:
+            messages.info(
+                self.request,
+                f"Accepting {pending} follow requests in the background. "
+                "Your profile shows the progress."
+            )
@@ -2,6 +2,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import DetailView, CreateView
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
+from django.db import transaction
 from django.urls import reverse
 from recipes.models import Recipe, Rating, Notification
 from recipes.models.planned_meal import PlannedMeal
@@ -9,7 +10,9 @@ from recipes.forms.comment_form import CommentForm
 from recipes.forms.planned_meal_form import PlannedMealForm
 from recipes.forms.rating_form import RatingForm
 from datetime import date as date_cls
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from recipes.pagination import paginate
+from recipes.retry import retry_on_locked
+from recipes.write_queue import enqueue
 
 
 class RecipeDetailView(DetailView):
@@ -17,6 +20,10 @@ class RecipeDetailView(DetailView):
     model = Recipe
     template_name = 'recipe_detail.html'
     context_object_name = 'recipe'
+
+    def get_queryset(self):
+        # stats feed the rating summary, so load them with the recipe
+        return Recipe.objects.select_related('author', 'stats')
     
     def get_object(self, queryset=None):
         obj = super().get_object(queryset)
@@ -64,18 +71,14 @@ class RecipeDetailView(DetailView):
             context['planned_meals'] = []
             
         # paginate comments (10 per page), hide reported/moderated ones
-        all_comments = self.object.comments.filter(is_hidden=False).select_related('user').order_by('-created_at')
+        all_comments = self.object.comments.filter(is_hidden=False).select_related('user').order_by('-created_at', '-pk')
         comment_count = all_comments.count()
 
-        paginator = Paginator(all_comments, 10)
-        page = self.request.GET.get('comments_page')
-
-        try:
-            comments_page = paginator.page(page)
-        except PageNotAnInteger:
-            comments_page = paginator.page(1)
-        except EmptyPage:
-            comments_page = paginator.page(paginator.num_pages)
+        # comment_count above already covers the total, so cursor pages skip it
+        comments_page = paginate(
+            self.request, all_comments, 10, ('-created_at', '-pk'),
+            page_param='comments_page', cursor_param='comments_cursor', count=False,
+        )
 
         context['comments'] = comments_page.object_list
         context['comments_page_obj'] = comments_page
@@ -100,17 +103,25 @@ class RateRecipeView(LoginRequiredMixin, CreateView):
         
         return super().dispatch(request, *args, **kwargs)
     
+    @staticmethod
+    @retry_on_locked
+    def save_rating(recipe, user, stars):
+        # update existing rating or create new one; the recipe stats are
+        # adjusted by the rating signals inside the same transaction
+        with transaction.atomic():
+            return Rating.objects.update_or_create(
+                recipe=recipe,
+                user=user,
+                defaults={'stars': stars}
+            )
+
     def form_valid(self, form):
-        # update existing rating or create new one
-        rating, created = Rating.objects.update_or_create(
-            recipe=self.recipe,
-            user=self.request.user,
-            defaults={'stars': form.cleaned_data['stars']}
-        )
+        rating, created = self.save_rating(self.recipe, self.request.user, form.cleaned_data['stars'])
         
         # only notify author for new ratings, not updates
         if created and self.recipe.author != self.request.user:
-            Notification.create_rating_notification(
+            enqueue(
+                Notification.create_rating_notification,
                 self.request.user,
                 self.recipe,
                 form.cleaned_data['stars']
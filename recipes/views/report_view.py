@@ -6,6 +6,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse
 from recipes.models import Recipe, Comment, Report, Notification
 from recipes.forms.report_form import ReportForm
+from recipes.write_queue import enqueue
 
 
 @login_required
@@ -51,7 +52,7 @@ def report_recipe(request, recipe_pk):
             )
             
             # Notify the reporter
-            Notification.create_report_received_notification(request.user)
+            enqueue(Notification.create_report_received_notification, request.user)
             
             # Check if auto-hide threshold reached (e.g., 5 reports)
             report_count = Report.objects.filter(
@@ -65,7 +66,8 @@ def report_recipe(request, recipe_pk):
                 recipe.save()
                 # Notify author
                 if recipe.author != request.user:
-                    Notification.create_content_removed_notification(
+                    enqueue(
+                        Notification.create_content_removed_notification,
                         recipe.author,
                         'recipe',
                         recipe.title,
@@ -135,7 +137,7 @@ def report_comment(request, comment_pk):
             )
             
             # Notify the reporter
-            Notification.create_report_received_notification(request.user)
+            enqueue(Notification.create_report_received_notification, request.user)
             
             # Check if auto-hide threshold reached (e.g., 3 reports for comments)
             report_count = Report.objects.filter(
@@ -149,7 +151,8 @@ def report_comment(request, comment_pk):
                 comment.save()
                 # Notify author
                 if comment.user != request.user:
-                    Notification.create_content_removed_notification(
+                    enqueue(
+                        Notification.create_content_removed_notification,
                         comment.user,
                         'comment',
                         comment.text[:50],
@@ -0,0 +1,46 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from recipes.helpers import visible_recipes_for
+from recipes.pagination import CursorPaginator, InvalidCursor
+from recipes.search import search_recipe_titles
+
+__all__ = ['search_recipes_ajax']
+
+# results per request of the recipe picker
+RECIPE_SEARCH_PAGE_SIZE = 20
+
+
+@login_required
+def search_recipes_ajax(request):
+    """
+    JSON recipe search for the planner's recipe picker.
+
+    Accepts ``q`` (matched as word prefixes against titles) and ``cursor``
+    (the ``next`` value of the previous response). Only recipes visible to
+    the current user are returned, ordered by title.
+    """
+    query = request.GET.get('q', '').strip()
+
+    recipes = visible_recipes_for(request.user).select_related('author').only(
+        'id', 'title', 'author__username'
+    )
+    if query:
+        recipes = search_recipe_titles(recipes, query)
+
+    paginator = CursorPaginator(recipes, RECIPE_SEARCH_PAGE_SIZE, ('title', 'pk'), count=False)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        page = paginator.page()
+
+    return JsonResponse({
+        'results': [
+            {
+                'id': recipe.pk,
+                'title': recipe.title,
+                'author': recipe.author.username,
+            }
+            for recipe in page
+        ],
+        'next': page.next_cursor,
+    })
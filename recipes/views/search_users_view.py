@@ -1,9 +1,9 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.http import JsonResponse
-from django.db.models import Q
 from django.core.paginator import Paginator
 from recipes.models import User
+from recipes.user_search import matching_users, search
 
 
 @login_required
@@ -16,11 +16,7 @@ def search_users(request):
     
     # Apply search filter if search query exists
     if search_query:
-        users = users.filter(
-            Q(username__icontains=search_query) |
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query)
-        )
+        users = matching_users(users, search_query)
     
     # Pagination
     paginator = Paginator(users, 12)  # Show 12 users per page
@@ -40,33 +36,11 @@ def search_users(request):
 @login_required
 def search_users_ajax(request):
     """Handle AJAX requests for user search with debouncing."""
-    query = request.GET.get('q', '').strip()
-    
-    if not query:
-        # Return all users except current user if no search query
-        users = User.objects.exclude(id=request.user.id).order_by('username')
-    else:
-        # Search in username, first name, and last name
-        users = User.objects.filter(
-            Q(username__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query)
-        ).exclude(id=request.user.id).order_by('username')
-    
-    # Prepare user data for JSON response
-    users_data = [
-        {
-            'id': user.id,
-            'username': user.username,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'full_name': user.full_name(),
-            'gravatar_url': user.mini_gravatar(),
-        }
-        for user in users[:50]  # Limit to 50 results
-    ]
-    
+    # prefix matches on indexed keys, with a capped count (recipes.user_search)
+    users_data, count, capped = search(request.GET.get('q', ''), request.user)
+
     return JsonResponse({
         'users': users_data,
-        'count': users.count()
+        'count': count,
+        'count_capped': capped,
     })
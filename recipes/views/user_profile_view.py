@@ -1,6 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404, render
 from recipes.models import Follow, FollowRequest, Recipe
+from recipes.follow_acceptance import progress as acceptance_progress
+from recipes.fragments import prefetch_fragment_versions
+from recipes.suggestions import suggestions_for
+from recipes.viewers import prefetch_active_viewers
 
 User = get_user_model()
 
@@ -19,6 +23,8 @@ def user_profile(request, user_id):
     is_following = False
     request_pending = False
     incoming_follow_requests = None
+    follow_request_progress = None
+    follow_suggestions = None
     is_own_profile = False
     
     if request.user.is_authenticated:
@@ -42,12 +48,19 @@ def user_profile(request, user_id):
         else:
             incoming_follow_requests = FollowRequest.objects.filter(
                 to_user=profile_user
-            )
+            ).select_related("from_user")
+            # set while a large backlog is being accepted in the background
+            follow_request_progress = acceptance_progress(profile_user.pk)
+            # precomputed friends-of-friends, one indexed query
+            follow_suggestions = suggestions_for(profile_user)
     
     # Fetch all recipes created by the profile user (newest first)
-    recipes = Recipe.objects.filter(
+    recipes = Recipe.objects.for_cards().filter(
         author=profile_user
     ).order_by('-created_at')
+    # one cache round trip each for the cards' trending badges and fragment versions
+    recipes = prefetch_active_viewers(recipes)
+    recipes = prefetch_fragment_versions(recipes)
     
     context = {
         'profile_user': profile_user,
@@ -55,8 +68,10 @@ def user_profile(request, user_id):
         'is_own_profile': is_own_profile,
         'request_pending': request_pending,
         'incoming_follow_requests': incoming_follow_requests,
-        'followers_count': profile_user.follower_relations.count(),
-        'following_count': profile_user.following_relations.count(),
+        'follow_request_progress': follow_request_progress,
+        'follow_suggestions': follow_suggestions,
+        'followers_count': profile_user.followers_count,
+        'following_count': profile_user.following_count,
         'recipes': recipes,
     }
     
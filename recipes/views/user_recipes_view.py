@@ -1,13 +1,15 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView
 from recipes.models import Recipe
+from recipes.pagination import CursorPaginationMixin
 
 
-class UserRecipesView(LoginRequiredMixin, ListView):
+class UserRecipesView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Recipe
     template_name = 'user_recipes.html'
     context_object_name = 'recipes'
     paginate_by = 10
+    cursor_ordering = ('time', 'pk')
     
     def get_queryset(self):
-        return Recipe.objects.filter(author=self.request.user)
\ No newline at end of file
+        return Recipe.objects.for_cards().filter(author=self.request.user).order_by('time', 'pk')
@@ -0,0 +1,125 @@
+"""
+Which recipes a user may see, as one cached, join-free predicate.
+
+A recipe is visible when its author is the user, a public account, or a
+private account the user follows. Instead of joining users and follows
+(and de-duplicating with DISTINCT) on every query, two small id sets are
+cached:
+
+* ``visibility:private_authors`` - ids of all private accounts,
+* ``visibility:followed:<user>`` - ids of the accounts a user follows.
+
+The recipes a user may *not* see are exactly those by private accounts
+they neither are nor follow. Private accounts are the minority, so that
+list is usually short and the predicate is ``NOT author_id IN (...)`` on
+the indexed foreign key. Once it is longer than INLINE_IDS_LIMIT, the same
+condition is sent as a subquery on the users and follows tables instead,
+so the query size stays bounded (and below SQLite's parameter limit).
+
+The signal handlers in recipes/signals.py invalidate the sets when a
+follow is created or deleted (which covers accepted follow requests) and
+when an account's privacy changes. Bulk writes that skip signals must call
+``invalidate_followed`` / ``invalidate_private_authors`` themselves.
+``VISIBILITY_CACHE_TIMEOUT = 0`` turns the caching off.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+PRIVATE_AUTHORS_KEY = 'visibility:private_authors'
+FOLLOWED_KEY = 'visibility:followed:{}'
+
+# hidden authors passed as literal parameters, more become a subquery
+INLINE_IDS_LIMIT = 100
+
+
+def _cached(key, load):
+    # the sets are invalidated on change, the timeout only bounds memory use
+    timeout = getattr(settings, 'VISIBILITY_CACHE_TIMEOUT', 60 * 60)
+    if not timeout:
+        return load()
+    ids = cache.get(key)
+    if ids is None:
+        ids = load()
+        cache.set(key, ids, timeout)
+    return ids
+
+
+def private_author_ids():
+    from recipes.models import User
+    return _cached(
+        PRIVATE_AUTHORS_KEY,
+        lambda: frozenset(User.objects.filter(is_private=True).values_list('pk', flat=True)),
+    )
+
+
+def followed_author_ids(user):
+    from recipes.models import Follow
+    return _cached(
+        FOLLOWED_KEY.format(user.pk),
+        lambda: frozenset(Follow.objects.filter(follower_id=user.pk).values_list('following_id', flat=True)),
+    )
+
+
+def hidden_author_ids(user):
+    """Authors whose recipes ``user`` may not see."""
+    hidden = private_author_ids()
+    if is_signed_in(user):
+        hidden = hidden - followed_author_ids(user) - {user.pk}
+    return hidden
+
+
+def is_signed_in(user):
+    return bool(user and user.is_authenticated and user.pk is not None)
+
+
+def _hidden_authors_subquery(user):
+    from recipes.models import Follow, User
+
+    hidden = User.objects.filter(is_private=True)
+    if is_signed_in(user):
+        hidden = hidden.exclude(pk=user.pk).exclude(
+            pk__in=Follow.objects.filter(follower_id=user.pk).values('following_id')
+        )
+    return hidden.values('pk')
+
+
+def visible_recipes_q(user):
+    """A join-free Q matching the recipes ``user`` may see."""
+    hidden = hidden_author_ids(user)
+    if not hidden:
+        return Q()
+    if len(hidden) > INLINE_IDS_LIMIT:
+        return ~Q(author_id__in=_hidden_authors_subquery(user))
+    return ~Q(author_id__in=sorted(hidden))
+
+
+def visible_recipes_for(user, queryset=None):
+    """Recipes (from ``queryset``, by default all of them) that ``user`` may see."""
+    if queryset is None:
+        from recipes.models import Recipe
+        queryset = Recipe.objects.all()
+    return queryset.filter(visible_recipes_q(user))
+
+
+def _delete_now_and_on_commit(*keys):
+    # deleting again after commit stops a concurrent request from caching
+    # the set as it was before this transaction
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_followed(user_id):
+    _delete_now_and_on_commit(FOLLOWED_KEY.format(user_id))
+
+
+def invalidate_followed_many(user_ids):
+    """invalidate_followed for many users, in one cache round trip."""
+    keys = [FOLLOWED_KEY.format(user_id) for user_id in user_ids]
+    if keys:
+        _delete_now_and_on_commit(*keys)
+
+
+def invalidate_private_authors():
+    _delete_now_and_on_commit(PRIVATE_AUTHORS_KEY)
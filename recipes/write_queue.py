@@ -0,0 +1,263 @@
+"""
+Single-writer queue for non-critical database writes.
+
+SQLite allows one writer at a time, so bursts of small writes from request
+threads (notifications, view count flushes) queue up on the database lock
+and show up as lock timeouts and slow responses. Instead, request threads
+hand such writes to this queue and return immediately. One writer thread
+drains it and groups the queued writes into batched transactions, so a
+burst of N writes costs a handful of lock acquisitions instead of N.
+
+* ``enqueue(func, *args, **kwargs)`` queues a write that is run inside the
+  writer's batch transaction (each in its own savepoint, so one failure
+  does not undo the rest of the batch).
+* ``enqueue_unbatched(...)`` queues work that manages its own transaction,
+  such as the view counter flush.
+* ``metrics()`` reports queue depth, lag and throughput.
+
+With ``WRITE_QUEUE['ENABLED']`` off (the test settings) every write runs
+inline, and a full queue also falls back to running the write inline
+rather than dropping it. Pending writes are drained on shutdown.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from recipes.retry import retry_on_locked
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BATCH_SIZE': 100,
+    # how long the writer waits for more writes before committing a batch
+    'MAX_BATCH_DELAY': 0.05,
+    'MAX_SIZE': 10000,
+}
+
+
+def queue_settings():
+    return {**DEFAULTS, **getattr(settings, 'WRITE_QUEUE', {})}
+
+
+class _Job:
+    __slots__ = ('func', 'args', 'kwargs', 'batched', 'enqueued_at')
+
+    def __init__(self, func, args, kwargs, batched):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.batched = batched
+        self.enqueued_at = time.monotonic()
+
+    def run(self):
+        return self.func(*self.args, **self.kwargs)
+
+    def __str__(self):
+        return getattr(self.func, '__qualname__', repr(self.func))
+
+
+class WriteQueue:
+    """An in-process queue drained by a single writer thread."""
+
+    def __init__(self, batch_size=100, max_batch_delay=0.05, max_size=10000):
+        self.batch_size = batch_size
+        self.max_batch_delay = max_batch_delay
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopping = False
+
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    # ------------------------
+    # Producers
+    # ------------------------
+
+    def put(self, job):
+        """Queue ``job``, or run it inline if the queue is full or shutting down."""
+        if not self._stopping:
+            self._ensure_writer()
+            try:
+                self._queue.put_nowait(job)
+                return
+            except queue.Full:
+                logger.warning('Write queue full, running %s inline', job)
+        self._run_inline(job)
+
+    def _run_inline(self, job):
+        try:
+            job.run()
+        except Exception:
+            self.failed += 1
+            logger.exception('Queued write %s failed', job)
+        else:
+            self.processed += 1
+
+    # ------------------------
+    # Writer thread
+    # ------------------------
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='recipes-db-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            batch = [job]
+            deadline = time.monotonic() + self.max_batch_delay
+            while len(batch) < self.batch_size:
+                try:
+                    job = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    # stop after this batch
+                    self._queue.put_nowait(None)
+                    self._queue.task_done()
+                    break
+                batch.append(job)
+
+            try:
+                self._process(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                close_old_connections()
+
+    def _process(self, batch):
+        now = time.monotonic()
+        self.last_lag = now - batch[0].enqueued_at
+        self.max_lag = max(self.max_lag, self.last_lag)
+
+        batched = [job for job in batch if job.batched]
+        if batched:
+            try:
+                self._commit_batch(batched)
+            except Exception:
+                logger.exception('Write batch of %d failed, retrying the writes one by one', len(batched))
+                for job in batched:
+                    self._run_inline(job)
+            else:
+                self.batches += 1
+
+        for job in batch:
+            if not job.batched:
+                self._run_inline(job)
+
+    @retry_on_locked
+    def _commit_batch(self, jobs):
+        processed = failed = 0
+        with transaction.atomic():
+            for job in jobs:
+                try:
+                    with transaction.atomic():
+                        job.run()
+                except Exception:
+                    failed += 1
+                    logger.exception('Queued write %s failed', job)
+                else:
+                    processed += 1
+        # only count once the batch has committed (it may be retried)
+        self.processed += processed
+        self.failed += failed
+
+    # ------------------------
+    # Control and metrics
+    # ------------------------
+
+    def drain(self, timeout=None):
+        """Block until every queued write has been processed."""
+        if self._thread is None or not self._thread.is_alive():
+            # nothing will drain it, run what is left here
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                if job is not None:
+                    self._run_inline(job)
+                self._queue.task_done()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return
+            time.sleep(0.01)
+
+    def shutdown(self, timeout=10):
+        self.drain(timeout=timeout)
+        self._stopping = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def metrics(self):
+        return {
+            'depth': self._queue.qsize(),
+            'last_lag': round(self.last_lag, 4),
+            'max_lag': round(self.max_lag, 4),
+            'processed': self.processed,
+            'failed': self.failed,
+            'batches': self.batches,
+            'writer_alive': self._thread is not None and self._thread.is_alive(),
+        }
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                config = queue_settings()
+                _queue = WriteQueue(
+                    batch_size=config['BATCH_SIZE'],
+                    max_batch_delay=config['MAX_BATCH_DELAY'],
+                    max_size=config['MAX_SIZE'],
+                )
+    return _queue
+
+
+def enqueue(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` on the writer thread, batched with other writes."""
+    if not queue_settings()['ENABLED']:
+        return func(*args, **kwargs)
+    get_queue().put(_Job(func, args, kwargs, batched=True))
+
+
+def enqueue_unbatched(func, *args, **kwargs):
+    """Run ``func`` on the writer thread outside any batch transaction."""
+    if not queue_settings()['ENABLED']:
+        return func(*args, **kwargs)
+    get_queue().put(_Job(func, args, kwargs, batched=False))
+
+
+def metrics():
+    """Depth, lag (seconds) and throughput counters of this process's queue."""
+    return get_queue().metrics()
+
+
+@atexit.register
+def _shutdown():
+    if _queue is not None:
+        _queue.shutdown()
@@ -79,6 +79,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'recipes.context_processors.notifications',
             ],
         },
     },
@@ -90,13 +91,116 @@ WSGI_APPLICATION = 'recipify.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuning, applied to every new connection. WAL lets readers carry on
+# while a write is in progress, and IMMEDIATE transactions take the write lock
+# up front so the busy timeout (seconds) applies instead of failing mid-way.
+# Connections are kept open for CONN_MAX_AGE seconds between requests.
+SQLITE_TUNING = {
+    'production': {
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64000,  # negative means KiB, i.e. 64 MB
+            'temp_store': 'MEMORY',
+        },
+        'BUSY_TIMEOUT': 20,
+        'CONN_MAX_AGE': 600,
+    },
+    'development': {
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 64 * 1024 * 1024,
+            'cache_size': -16000,
+            'temp_store': 'MEMORY',
+        },
+        'BUSY_TIMEOUT': 10,
+        'CONN_MAX_AGE': 60,
+    },
+    # the test database lives in memory, so only the cheap pragmas matter
+    'test': {
+        'PRAGMAS': {
+            'temp_store': 'MEMORY',
+        },
+        'BUSY_TIMEOUT': 5,
+        'CONN_MAX_AGE': 0,
+    },
+}[ENVIRONMENT]
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': SQLITE_TUNING['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': SQLITE_TUNING['BUSY_TIMEOUT'],
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}' for name, value in SQLITE_TUNING['PRAGMAS'].items()
+            ),
+        },
     }
 }
 
+# Writes wrapped in recipes.retry.retry_on_locked are retried this many times
+# with exponential backoff starting at the base delay (seconds)
+DB_WRITE_RETRY_ATTEMPTS = 5
+DB_WRITE_RETRY_BASE_DELAY = 0.05
+
+# Non-critical writes (notifications, view count flushes) go through the
+# single writer thread in recipes.write_queue and are committed in batches.
+# Disabled in tests so those writes happen before the response returns.
+WRITE_QUEUE = {
+    'ENABLED': ENVIRONMENT != 'test',
+    'BATCH_SIZE': 100,
+    'MAX_BATCH_DELAY': 0.05,
+    'MAX_SIZE': 10000,
+}
+
+
+# Live updates (recipes.live): Server-Sent Events pushed to open tabs. The
+# stream endpoint must be served by an ASGI worker (recipify.asgi); under WSGI
+# (runserver, PythonAnywhere) each open tab would hold a worker forever, so it
+# is off unless ENABLED is set on an ASGI deployment.
+LIVE_EVENTS = {
+    'ENABLED': False,
+    'HEARTBEAT': 15,
+    'POLL_INTERVAL': 5,
+    'QUEUE_SIZE': 16,
+    'MAX_RECIPES': 20,
+}
+
+
+# Cache
+# Production shares one SQLite-backed cache between all worker processes so
+# viewer counts and buffered view totals agree; tests always get an isolated
+# in-memory cache. RECIPIFY_CACHE_BACKEND=sqlite|locmem overrides the choice
+# outside tests and RECIPIFY_CACHE_PATH moves the cache file.
+
+CACHE_BACKEND = os.getenv('RECIPIFY_CACHE_BACKEND', 'sqlite' if ENVIRONMENT == 'production' else 'locmem')
+
+if ENVIRONMENT == 'test' or CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'recipify-test' if ENVIRONMENT == 'test' else 'recipify',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'recipify.sqlite_cache.SQLiteCache',
+            'LOCATION': os.getenv('RECIPIFY_CACHE_PATH', str(BASE_DIR / 'cache.sqlite3')),
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'MAX_ENTRIES': 100000,
+                'BUSY_TIMEOUT': 5,
+            },
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -171,3 +275,20 @@ if ENVIRONMENT == 'production':
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
     SECURE_HSTS_PRELOAD = True
+
+# Recipe view counts are buffered in the cache and written in batches every
+# this many seconds (0 writes each view straight away, which tests rely on)
+VIEW_COUNT_FLUSH_INTERVAL = 0 if ENVIRONMENT == 'test' else 5
+
+# The author id sets behind recipe visibility (recipes.visibility) are cached
+# for this many seconds. Tests roll back their writes without the signals that
+# invalidate the sets, so they read them from the database every time (0)
+VISIBILITY_CACHE_TIMEOUT = 0 if ENVIRONMENT == 'test' else 60 * 60
+
+# The navbar's unread count and latest notifications (recipes.notification_cache)
+# are cached for this many seconds; 0 in tests for the same reason as above
+NOTIFICATION_CACHE_TIMEOUT = 0 if ENVIRONMENT == 'test' else 10 * 60
+
+# Results of short (popular) user search prefixes (recipes.user_search) are
+# shared between users for this many seconds; 0 in tests for the same reason
+USER_SEARCH_CACHE_TIMEOUT = 0 if ENVIRONMENT == 'test' else 30
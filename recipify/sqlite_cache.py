@@ -0,0 +1,219 @@
+"""
+Cache backend storing entries in a local SQLite database in WAL mode.
+
+LocMemCache is private to each worker process, so active viewers, buffered
+view counts and anything else cached disagree between workers and vanish
+on restart. This backend keeps the cache in one SQLite file that every
+process on the host opens, without running a cache server.
+
+* ``incr``/``decr`` and ``add`` are single SQL statements, so they are
+  atomic across processes.
+* Integers are stored as SQL integers (so ``incr`` can update them in
+  place), everything else is pickled.
+* Expired rows are ignored on read and culled every ``CULL_EVERY`` writes.
+
+Configure it in ``CACHES`` with the database file as ``LOCATION``::
+
+    'BACKEND': 'recipify.sqlite_cache.SQLiteCache',
+    'LOCATION': BASE_DIR / 'cache.sqlite3',
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# keeps IN (...) lists below SQLite's host parameter limit
+BATCH_SIZE = 500
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        options = params.get('OPTIONS', {})
+        self._busy_timeout = options.get('BUSY_TIMEOUT', 5)
+        self._cull_every = options.get('CULL_EVERY', 1000)
+        self._local = threading.local()
+        self._writes = 0
+
+    # ------------------------
+    # Connection handling
+    # ------------------------
+
+    def _connection(self):
+        """
+        One connection per thread, reopened after a fork.
+
+        Connections are kept for the life of the thread (BaseCache.close is
+        a no-op), so the pragmas and schema check run once per thread.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entry ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ------------------------
+    # Encoding
+    # ------------------------
+
+    def _encode(self, value):
+        # plain ints stay SQL integers so incr can work on them in SQL
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _decode(self, value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    # ------------------------
+    # Reads
+    # ------------------------
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT value FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return default if row is None else self._decode(row[0])
+
+    def get_many(self, keys, version=None):
+        keys_by_cache_key = {self.make_and_validate_key(key, version=version): key for key in keys}
+        cache_keys = list(keys_by_cache_key)
+        result = {}
+        now = time.time()
+        conn = self._connection()
+        for start in range(0, len(cache_keys), BATCH_SIZE):
+            batch = cache_keys[start:start + BATCH_SIZE]
+            placeholders = ', '.join('?' * len(batch))
+            rows = conn.execute(
+                f'SELECT key, value FROM cache_entry WHERE key IN ({placeholders}) '
+                f'AND (expires IS NULL OR expires > ?)',
+                (*batch, now),
+            )
+            for cache_key, value in rows:
+                result[keys_by_cache_key[cache_key]] = self._decode(value)
+        return result
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache_entry WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    # ------------------------
+    # Writes
+    # ------------------------
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._encode(value), self.get_backend_timeout(timeout)),
+        )
+        self._wrote()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self.make_and_validate_key(key, version=version), self._encode(value), expires)
+            for key, value in data.items()
+        ]
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)', rows)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._wrote(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        # inserts, or overwrites only an expired entry; rowcount says which
+        cursor = self._connection().execute(
+            'INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?',
+            (key, self._encode(value), self.get_backend_timeout(timeout), now),
+        )
+        self._wrote()
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'UPDATE cache_entry SET value = value + ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?) AND typeof(value) = \'integer\' '
+            'RETURNING value',
+            (delta, cache_key, time.time()),
+        ).fetchall()
+        if not row:
+            raise ValueError("Key '%s' not found" % key)
+        return row[0][0]
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        cache_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        conn = self._connection()
+        for start in range(0, len(cache_keys), BATCH_SIZE):
+            batch = cache_keys[start:start + BATCH_SIZE]
+            conn.execute(f'DELETE FROM cache_entry WHERE key IN ({", ".join("?" * len(batch))})', batch)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entry')
+
+    # ------------------------
+    # Culling
+    # ------------------------
+
+    def _wrote(self, count=1):
+        self._writes += count
+        if self._writes >= self._cull_every:
+            self._writes = 0
+            self._cull()
+
+    def _cull(self):
+        """Drop expired entries, then the soonest-to-expire ones if over MAX_ENTRIES."""
+        conn = self._connection()
+        conn.execute('DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+        count = conn.execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        if count > self._max_entries and self._cull_frequency:
+            conn.execute(
+                'DELETE FROM cache_entry WHERE key IN ('
+                'SELECT key FROM cache_entry ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
@@ -23,6 +23,7 @@ urlpatterns = [
     path('users/<int:user_id>/unfollow/', views.unfollow_user, name = 'unfollow_user'),
     path('search-users/', views.search_users, name='search_users'),
     path('search-users-ajax/', views.search_users_ajax, name='search_users_ajax'),
+    path('search-recipes-ajax/', views.search_recipes_ajax, name='search_recipes_ajax'),
     path('recipes/<int:pk>/', views.RecipeDetailView.as_view(), name='recipe_detail'),
     path('recipes/<int:recipe_pk>/rate/', views.RateRecipeView.as_view(), name='rate_recipe'),
     path("user/<int:user_id>/followers/", views.user_followers, name="user_followers"),
@@ -43,8 +44,10 @@ urlpatterns = [
     path('notifications/dropdown/', views.notifications_dropdown, name='notifications_dropdown'),
     path('notifications/<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
     path('notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
+    path('events/', views.live_events, name='live_events'),
     path("planner/range/", views.planner_range, name="planner_range"),
     path("planner/events/", views.planner_events, name="planner_events"),
+    path('metrics/write-queue/', views.write_queue_metrics, name='write_queue_metrics'),
     path('planner/<str:date>/', views.planner_day, name='planner_day'),
 ]
 
@@ -0,0 +1,59 @@
+// Live updates over Server-Sent Events (the live_events view).
+//
+// One EventSource per tab replaces polling: it updates the navbar's unread
+// badge and, on pages that mark elements with data-live-viewers="<recipe id>",
+// the "viewing now" count. The browser reconnects on its own if the stream
+// drops.
+(function () {
+  var script = document.currentScript;
+  if (!script || !window.EventSource) {
+    return;
+  }
+
+  function recipeIds() {
+    var ids = [];
+    document.querySelectorAll("[data-live-viewers]").forEach(function (el) {
+      if (ids.indexOf(el.dataset.liveViewers) === -1) {
+        ids.push(el.dataset.liveViewers);
+      }
+    });
+    return ids;
+  }
+
+  function updateBadge(count) {
+    var badge = document.getElementById("notification-badge");
+    if (!badge) {
+      return;
+    }
+    badge.firstChild.nodeValue = count + " ";
+    badge.style.display = count > 0 ? "" : "none";
+  }
+
+  function updateViewers(data) {
+    document.querySelectorAll('[data-live-viewers="' + data.recipe + '"]').forEach(function (el) {
+      el.textContent = data.active_viewers + " viewing now";
+      el.style.display = data.active_viewers > 0 ? "" : "none";
+    });
+  }
+
+  function connect() {
+    var url = script.dataset.url;
+    var ids = recipeIds();
+    if (ids.length) {
+      url += "?recipes=" + ids.join(",");
+    }
+    var source = new EventSource(url);
+    source.addEventListener("notifications", function (e) {
+      updateBadge(JSON.parse(e.data).unread_count);
+    });
+    source.addEventListener("viewers", function (e) {
+      updateViewers(JSON.parse(e.data));
+    });
+  }
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", connect);
+  } else {
+    connect();
+  }
+})();
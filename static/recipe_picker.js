@@ -0,0 +1,79 @@
+// Recipe picker: fills a <datalist> from the recipe search endpoint as the user types.
+//
+// Markup: <input data-recipe-picker data-search-url="..." list="some-id"> plus an
+// empty <datalist id="some-id">. Option values are recipe ids (what the form
+// posts), option labels are titles. Only the first page of matches is shown;
+// typing more narrows the search.
+(function () {
+  if (window.recipePickerLoaded) {
+    return;
+  }
+  window.recipePickerLoaded = true;
+
+  var DEBOUNCE_MS = 250;
+
+  function fill(datalist, results) {
+    datalist.innerHTML = "";
+    results.forEach(function (recipe) {
+      var option = document.createElement("option");
+      option.value = recipe.id;
+      option.label = recipe.title;
+      option.textContent = recipe.title + " (" + recipe.author + ")";
+      datalist.appendChild(option);
+    });
+  }
+
+  function attach(input) {
+    var datalist = document.getElementById(input.getAttribute("list"));
+    var url = input.dataset.searchUrl;
+    var timer = null;
+    var query = null;
+    var controller = null;
+
+    function load() {
+      if (controller) {
+        controller.abort();
+      }
+      controller = new AbortController();
+      fetch(url + "?" + new URLSearchParams({ q: query }).toString(), {
+        headers: { "X-Requested-With": "XMLHttpRequest" },
+        signal: controller.signal,
+      })
+        .then(function (response) { return response.json(); })
+        .then(function (data) { fill(datalist, data.results); })
+        .catch(function () {});
+    }
+
+    input.addEventListener("input", function () {
+      var value = input.value.trim();
+      // a picked option puts its id in the input, nothing to search for
+      if (/^\d+$/.test(value)) {
+        return;
+      }
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        if (value !== query) {
+          query = value;
+          load();
+        }
+      }, DEBOUNCE_MS);
+    });
+
+    input.addEventListener("focus", function () {
+      if (query === null) {
+        query = "";
+        load();
+      }
+    });
+  }
+
+  function init() {
+    document.querySelectorAll("[data-recipe-picker]").forEach(attach);
+  }
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", init);
+  } else {
+    init();
+  }
+})();